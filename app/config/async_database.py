@@ -0,0 +1,52 @@
+"""Async engine for the ASGI serving mode (asgi.py).
+
+Uses the same DATABASE_URL and DB_* pool settings as app.config.database,
+with the driver swapped for its asyncio counterpart: asyncpg for PostgreSQL,
+aiosqlite for SQLite. Needs the packages in requirements-async.txt; the WSGI
+app never imports this module.
+
+asgi.py binds SessionLocal to ``async_engine.sync_engine``, so this pool
+serves every request and the sync engine's pool only backs the background
+threads (rollup fold, catalog LISTEN) and the catalog version poll. It is
+reported as ``async`` in get_pool_stats().
+"""
+import os
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config.database import DATABASE_URL, _engine_options, register_pool
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url):
+	"""DATABASE_URL with its driver replaced by the asyncio one (postgresql+asyncpg, sqlite+aiosqlite)."""
+	url = make_url(url)
+	backend = url.get_backend_name()
+	if backend not in ASYNC_DRIVERS:
+		raise ValueError(f"No async driver configured for {backend!r} (supported: {', '.join(ASYNC_DRIVERS)})")
+	url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+	if backend == "postgresql" and "sslmode" in url.query:
+		# asyncpg takes the libpq sslmode values as ``ssl``
+		url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+	return url
+
+
+def _async_engine_options(url):
+	options = _engine_options(url)
+	# The async engine wraps its own pool class (AsyncAdaptedQueuePool); keep the sizes only
+	options.pop("poolclass", None)
+	backend = make_url(url).get_backend_name()
+	if backend == "sqlite" and "pool_size" in options:
+		# SQLite has a single writer: overlapping transactions on several connections
+		# fail with "database is locked", so queue requests on one connection instead
+		options.update(pool_size=1, max_overflow=0)
+	statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+	if statement_timeout and backend == "postgresql":
+		options["connect_args"] = {"server_settings": {"statement_timeout": str(int(statement_timeout))}}
+	return options
+
+
+async_engine = create_async_engine(async_url(DATABASE_URL), **_async_engine_options(DATABASE_URL))
+register_pool("async", async_engine.sync_engine.pool)
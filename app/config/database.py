@@ -1,25 +1,135 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
 load_dotenv()
 
-db = SQLAlchemy()
-#ma = Marshmallow()
-
 DATABASE_URL = os.getenv('DATABASE_URL')
 if not DATABASE_URL:
 	raise ValueError("Environment variable DATABASE_URL belum diset!")
 
-engine = create_engine(DATABASE_URL, echo=True)
+
+def _env_bool(name, default=False):
+	value = os.getenv(name)
+	if value is None:
+		return default
+	return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Pool checkout statistics (wait time for a connection from the pool)
+_pool_stats_lock = threading.Lock()
+_pool_stats = {"checkouts": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+
+class TimedQueuePool(QueuePool):
+	"""QueuePool that records how long each checkout waited for a connection."""
+
+	def _do_get(self):
+		start = time.perf_counter()
+		try:
+			return super()._do_get()
+		finally:
+			waited = time.perf_counter() - start
+			with _pool_stats_lock:
+				_pool_stats["checkouts"] += 1
+				_pool_stats["wait_seconds_total"] += waited
+				if waited > _pool_stats["wait_seconds_max"]:
+					_pool_stats["wait_seconds_max"] = waited
+
+
+def _engine_options(url):
+	"""Build create_engine() options from the environment.
+
+	DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+	DB_STATEMENT_TIMEOUT_MS (PostgreSQL only) and SQL_ECHO.
+	"""
+	url = make_url(url)
+	options = {
+		"echo": _env_bool("SQL_ECHO"),
+		"pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+	}
+	in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+	if not in_memory:
+		options.update(
+			poolclass=TimedQueuePool,
+			pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+			max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+			pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+			pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+		)
+	statement_timeout = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+	if statement_timeout and url.get_backend_name() == "postgresql":
+		options["connect_args"] = {"options": f"-c statement_timeout={int(statement_timeout)}"}
+	return options
+
+
+# Single engine/pool shared by SessionLocal (controllers) and Flask-SQLAlchemy (Model.query);
+# the ASGI mode swaps in its async engine with use_request_engine()
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+
+class SharedEngineSQLAlchemy(SQLAlchemy):
+	"""Flask-SQLAlchemy extension that reuses SessionLocal's engine instead of building its own pool."""
+
+	def _make_engine(self, bind_key, options, app):
+		if bind_key is None:
+			return SessionLocal.kw["bind"]
+		return super()._make_engine(bind_key, options, app)
+
+
+db = SharedEngineSQLAlchemy()
+#ma = Marshmallow()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+def use_request_engine(bind):
+	"""Serve requests (SessionLocal, Model.query) from bind instead of the module engine.
+
+	Call before the Flask app is created (asgi.py passes the async engine's
+	``sync_engine``). Background threads and CLI commands keep using ``engine``.
+	"""
+	SessionLocal.configure(bind=bind)
+
+
+# Further pools on the same database (e.g. the ASGI app's async engine), reported by get_pool_stats()
+_extra_pools = {}
+
+
+def register_pool(name, pool):
+	"""Report pool under stats[name] in get_pool_stats() (and the pool gauges)."""
+	_extra_pools[name] = pool
+
+
+def _queue_pool_stats(pool):
+	if not isinstance(pool, QueuePool):
+		return {}
+	return {
+		"size": pool.size(),
+		"checked_out": pool.checkedout(),
+		"overflow": pool.overflow(),
+		"checked_in": pool.checkedin(),
+	}
+
+
+def get_pool_stats():
+	"""Snapshot of connection pool usage and checkout wait times (plus any registered pools)."""
+	with _pool_stats_lock:
+		stats = dict(_pool_stats)
+	stats.update(_queue_pool_stats(engine.pool))
+	for name, pool in _extra_pools.items():
+		stats[name] = _queue_pool_stats(pool)
+	return stats
+
+
 def get_db():
 	"""Yield a SQLAlchemy session for use in scripts or dependency injection."""
 	db_session = SessionLocal()
@@ -0,0 +1,74 @@
+from app.config.database import SessionLocal
+from app.utils.cache import catalog_cache
+from app.utils.catalog_sync import publish_catalog_change
+from app.utils.catalog_io import FORMATS, export_query, import_catalog, iter_export
+from app.utils.streaming import NDJSON_MIMETYPE
+from flask import Response, request, stream_with_context
+import io
+import logging
+
+logger = logging.getLogger("3awan.controllers.catalog")
+
+_MIMETYPES = {"csv": "text/csv", "ndjson": NDJSON_MIMETYPE}
+
+
+def _catalog_format():
+    """?format=, else ndjson for an NDJSON request body, else csv; ValueError if unsupported."""
+    fmt = request.args.get("format")
+    if fmt is None:
+        fmt = "ndjson" if request.mimetype in (NDJSON_MIMETYPE, "application/jsonl") else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def export_catalog():
+    """Stream the active catalog as CSV or NDJSON (?format=, default csv)."""
+    try:
+        fmt = _catalog_format()
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    def generate():
+        db = SessionLocal()
+        try:
+            yield from iter_export(export_query(db), fmt)
+        except Exception:
+            logger.exception("Failed while streaming catalog export")
+            raise
+        finally:
+            db.close()
+
+    response = Response(stream_with_context(generate()), mimetype=_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename=catalog.{fmt}"
+    return response
+
+
+def import_catalog_file():
+    """Load a CSV/NDJSON request body (streamed, chunked, one transaction); returns import stats."""
+    try:
+        fmt = _catalog_format()
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    dry_run = request.args.get("dry_run", "false").lower() in ("1", "true", "yes", "on")
+    db = SessionLocal()
+    try:
+        lines = io.TextIOWrapper(request.stream, encoding="utf-8-sig", newline="")
+        try:
+            stats = import_catalog(db, lines, fmt)
+        except (ValueError, UnicodeDecodeError) as e:
+            db.rollback()
+            return {"error": str(e)}, 400
+        if dry_run:
+            db.rollback()
+        else:
+            publish_catalog_change(db)
+            db.commit()
+            catalog_cache.invalidate()
+        return {**stats.as_dict(), "dry_run": dry_run}
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to import catalog")
+        return {"error": str(e)}, 500
+    finally:
+        db.close()
@@ -1,51 +1,80 @@
 from app.models.category import Category
 from app.config.database import SessionLocal
-from app.utils.serializers import serialize_category, serialize_categories
-from flask import jsonify
-from app.utils.validators import validate_category_input
+from app.utils.serializers import serialize_category, serialize_rows
+from flask import request
+from app.utils.validators import validate_category_input, validate_id
+from app.utils.queries import category_query, category_rows_query
+from app.utils.pagination import get_page_params, fetch_page, page_response
+from app.utils.cache import catalog_cache, cached_json_response, request_cache_key
+from app.utils.catalog_sync import publish_catalog_change
+from app.utils.fieldsets import parse_shape
+from app.utils.bulk import BulkResult, bulk_rows, is_atomic
+from sqlalchemy import insert, select, update
 import datetime
 import logging
 
 logger = logging.getLogger("3awan.controllers.category")
 
 
-def get_all_categories():
+def _category_page_params():
+    return get_page_params(request.args, Category.category_id, {"created_at": Category.created_at})
+
+
+def _load_categories(page, shape=None, include_deleted=False):
     db = SessionLocal()
     try:
-        items = db.query(Category).filter(Category.deleted_at.is_(None)).all()
-        return jsonify(serialize_categories(items))
+        query = category_rows_query(db, include_deleted=include_deleted, shape=shape,
+                                    extra_columns=page.sort_columns)
+        rows, next_cursor = fetch_page(query, page)
+        columns = shape.fields if shape is not None else None
+        return page_response(serialize_rows(Category, rows, columns), next_cursor, page)
+    finally:
+        db.close()
+
+
+def get_all_categories():
+    try:
+        page = _category_page_params()
+        shape = parse_shape(Category, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        return cached_json_response(
+            request_cache_key("categories"),
+            lambda: _load_categories(page, shape),
+        )
     except Exception as e:
         logger.exception("Failed to fetch categories")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
 def get_all_categories_list():
-    db = SessionLocal()
     try:
-        items = db.query(Category).all()
-        return jsonify(serialize_categories(items))
+        page = _category_page_params()
+        shape = parse_shape(Category, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        return cached_json_response(
+            request_cache_key("categories_all"),
+            lambda: _load_categories(page, shape, include_deleted=True),
+        )
     except Exception as e:
         logger.exception("Failed to fetch categories")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
-def get_category_by_id(cat_id: int):
-    db = SessionLocal()
+def get_category_by_id(cat_id: int, db):
     try:
-        item = db.query(Category).filter(
-            Category.category_id == cat_id,
-            Category.deleted_at.is_(None)
-        ).first()
+        shape = parse_shape(Category, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        item = category_query(db, shape=shape).filter(Category.category_id == cat_id).first()
         if not item:
             return {"error": "Category not found"}, 404
-        return serialize_category(item)
+        return serialize_category(item, shape=shape)
     except Exception as e:
         logger.exception("Failed to fetch category by id")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
 
 def create_category(data):
@@ -57,7 +86,9 @@ def create_category(data):
     try:
         item = Category(**validated)
         db.add(item)
+        publish_catalog_change(db)
         db.commit()
+        catalog_cache.invalidate()
         db.refresh(item)
         logger.info("Created category", extra={"category_id": item.category_id})
         return serialize_category(item), 201
@@ -69,6 +100,97 @@ def create_category(data):
         db.close()
 
 
+def _validate_category_rows(rows, result, with_id=False):
+    """{index: validated values} for rows that pass validation; failures go to result."""
+    validated = {}
+    for index, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("Each row must be a JSON object")
+            values = validate_category_input(row)
+            if with_id:
+                values["category_id"] = validate_id(row, "category_id")
+            validated[index] = values
+        except ValueError as e:
+            result.fail(index, str(e))
+    return validated
+
+
+def bulk_create_categories(data):
+    """Create many categories in one transaction; returns one result per input row."""
+    try:
+        rows = bulk_rows(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    atomic = is_atomic(request.args)
+    result = BulkResult(len(rows))
+    validated = _validate_category_rows(rows, result)
+    if not validated or (atomic and result.error_count):
+        return result.response("created", atomic)
+    db = SessionLocal()
+    try:
+        indexes = list(validated)
+        category_ids = db.scalars(
+            insert(Category).returning(Category.category_id, sort_by_parameter_order=True),
+            [validated[i] for i in indexes],
+        ).all()
+        publish_catalog_change(db)
+        db.commit()
+        catalog_cache.invalidate()
+        for index, category_id in zip(indexes, category_ids):
+            result.ok(index, "created", category_id=category_id)
+        logger.info("Bulk created categories", extra={"rows": len(rows), "failed": result.error_count})
+        return result.response("created", atomic)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to bulk create categories")
+        return {"error": str(e)}, 500
+    finally:
+        db.close()
+
+
+def bulk_update_categories(data):
+    """Rename many categories (each row carries its category_id) in one transaction."""
+    try:
+        rows = bulk_rows(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    atomic = is_atomic(request.args)
+    result = BulkResult(len(rows))
+    validated = _validate_category_rows(rows, result, with_id=True)
+    seen = set()
+    for index, values in list(validated.items()):
+        if values["category_id"] in seen:
+            result.fail(index, f"Duplicate category_id {values['category_id']}")
+            del validated[index]
+        seen.add(values["category_id"])
+    db = SessionLocal()
+    try:
+        existing = set(db.scalars(
+            select(Category.category_id).where(Category.category_id.in_(seen), Category.deleted_at.is_(None))
+        ))
+        for index, values in list(validated.items()):
+            if values["category_id"] not in existing:
+                result.fail(index, "Category not found")
+                del validated[index]
+        if validated and not (atomic and result.error_count):
+            now = datetime.datetime.utcnow()
+            db.execute(update(Category), [{**values, "updated_at": now} for values in validated.values()])
+            publish_catalog_change(db)
+            db.commit()
+            catalog_cache.invalidate()
+            for index, values in validated.items():
+                result.ok(index, "updated", category_id=values["category_id"])
+        logger.info("Bulk updated categories", extra={"rows": len(rows), "failed": result.error_count})
+        return result.response("updated", atomic)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to bulk update categories")
+        return {"error": str(e)}, 500
+    finally:
+        db.close()
+
+
 def update_category(cat_id: int, data):
     db = SessionLocal()
     item = db.query(Category).filter(
@@ -87,7 +209,9 @@ def update_category(cat_id: int, data):
     try:
         for k, v in validated.items():
             setattr(item, k, v)
+        publish_catalog_change(db)
         db.commit()
+        catalog_cache.invalidate()
         db.refresh(item)
         logger.info("Updated category", extra={"category_id": item.category_id})
         return serialize_category(item)
@@ -111,7 +235,9 @@ def delete_category(cat_id: int, type: int):
             if not item:
                 return {"error": "Category not found"}, 404
             item.deleted_at = datetime.datetime.utcnow()
+            publish_catalog_change(db)
             db.commit()
+            catalog_cache.invalidate()
             logger.info("Soft deleted category", extra={"category_id": item.category_id})
             return {"detail": "Category soft deleted"}
         elif type == 2:
@@ -123,7 +249,9 @@ def delete_category(cat_id: int, type: int):
             if not item:
                 return {"error": "Category not found or not deleted"}, 404
             item.deleted_at = None
+            publish_catalog_change(db)
             db.commit()
+            catalog_cache.invalidate()
             logger.info("Recovered category", extra={"category_id": item.category_id})
             return {"detail": "Category recovered"}
         elif type == 3:
@@ -135,7 +263,9 @@ def delete_category(cat_id: int, type: int):
             if not item:
                 return {"error": "Category not found or not soft-deleted"}, 404
             db.delete(item)
+            publish_catalog_change(db)
             db.commit()
+            catalog_cache.invalidate()
             logger.info("Hard deleted category", extra={"category_id": cat_id})
             return {"detail": "Category hard deleted"}
         else:
@@ -2,81 +2,107 @@ from app.models.menu import Menu
 from app.models.category import Category
 from app.config.database import SessionLocal
 from app.utils.serializers import serialize_menu, serialize_menus
-from flask import jsonify
-from app.utils.validators import validate_menu_input
+from flask import request
+from app.utils.validators import validate_menu_input, validate_id, ReferenceBatch
+from app.utils.queries import menu_query, menu_detail_query
+from app.utils.pagination import get_page_params, fetch_page, page_response
+from app.utils.cache import catalog_cache, cached_json_response, request_cache_key
+from app.utils.catalog_sync import publish_catalog_change
+from app.utils.fieldsets import parse_shape
+from app.utils.bulk import BulkResult, bulk_rows, is_atomic
+from sqlalchemy import insert, select, update
 import datetime
 import logging
 
 logger = logging.getLogger("3awan.controllers.menu")
 
 
-def get_all_menus(category_id=None):
+def _menu_page_params():
+    return get_page_params(request.args, Menu.menu_id, {"created_at": Menu.created_at})
+
+
+def _load_menus(page, shape=None, category_id=None, include_deleted=False):
     db = SessionLocal()
     try:
         # Base query: join Category and filter out soft-deleted entries
-        query = (
-            db.query(Menu)
-            .join(Category, Menu.category_id == Category.category_id)
-            .filter(
-                Menu.deleted_at.is_(None),
-                Category.deleted_at.is_(None)
-            )
-        )
+        query = menu_query(db, include_deleted=include_deleted, shape=shape, extra_columns=page.sort_columns)
 
         # Optional filtering by category_id when provided
         if category_id is not None:
             query = query.filter(Menu.category_id == category_id)
 
-        menus = query.all()
+        menus, next_cursor = fetch_page(query, page)
         logger.info("Fetched menus", extra={"count": len(menus), "category_id": category_id})
-        data = serialize_menus(menus)
+        data = serialize_menus(menus, shape=shape)
         logger.info("Serialized menus", extra={"count": len(data)})
-        return jsonify(data)
+        return page_response(data, next_cursor, page)
+    finally:
+        db.close()
+
+
+def get_all_menus(category_id=None):
+    try:
+        page = _menu_page_params()
+        shape = parse_shape(Menu, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        return cached_json_response(
+            request_cache_key("menus"),
+            lambda: _load_menus(page, shape, category_id),
+        )
     except Exception as e:
         logger.exception("Failed to fetch menus")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
 def get_all_menu_list():
-    db = SessionLocal()
     try:
-        items = db.query(Menu).all()
-        return jsonify(serialize_menus(items))
+        page = _menu_page_params()
+        shape = parse_shape(Menu, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        return cached_json_response(
+            request_cache_key("menus_all"),
+            lambda: _load_menus(page, shape, include_deleted=True),
+        )
     except Exception as e:
         logger.exception("Failed to fetch menus")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
 
-def get_menu_by_id(menu_id: int):
-    db = SessionLocal()
+def get_menu_by_id(menu_id: int, db):
+    try:
+        shape = parse_shape(Menu, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
     try:
-        menu = db.query(Menu).filter(
-            Menu.menu_id == menu_id,
-            Menu.deleted_at.is_(None)
-        ).first()
+        menu = menu_detail_query(db, shape=shape).filter(Menu.menu_id == menu_id).first()
         if not menu:
             return {"error": "Menu not found"}, 404
-        return serialize_menu(menu)
+        return serialize_menu(menu, shape=shape)
     except Exception as e:
         logger.exception("Failed to fetch menu by id")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
 
 def create_menu(menu_data):
+    references = ReferenceBatch()
     try:
-        validated = validate_menu_input(menu_data)
+        validated = validate_menu_input(menu_data, references=references)
     except ValueError as e:
         return {"error": str(e)}, 400
     db = SessionLocal()
     try:
+        try:
+            references.resolve(db)
+        except ValueError as e:
+            return {"error": str(e)}, 400
         menu = Menu(**validated)
         db.add(menu)
+        publish_catalog_change(db)
         db.commit()
+        catalog_cache.invalidate()
         db.refresh(menu)
         logger.info("Created menu", extra={"menu_id": menu.menu_id})
         return serialize_menu(menu), 201
@@ -88,6 +114,112 @@ def create_menu(menu_data):
         db.close()
 
 
+def _validate_menu_rows(rows, result, references, partial=False):
+    """{index: validated values} for rows that pass validation; failures go to result."""
+    validated = {}
+    for index, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("Each row must be a JSON object")
+            values = validate_menu_input(row, partial=partial, references=references)
+            if partial:
+                values["menu_id"] = validate_id(row, "menu_id")
+            validated[index] = values
+        except ValueError as e:
+            result.fail(index, str(e))
+    return validated
+
+
+def _drop_missing_categories(validated, result, references):
+    missing = references.missing(Category)
+    for index, values in list(validated.items()):
+        if values.get("category_id") in missing:
+            result.fail(index, f"Referenced Category with id {values['category_id']} not found")
+            del validated[index]
+
+
+def bulk_create_menus(data):
+    """Create many menus in one transaction; returns one result per input row."""
+    try:
+        rows = bulk_rows(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    atomic = is_atomic(request.args)
+    result = BulkResult(len(rows))
+    references = ReferenceBatch()
+    validated = _validate_menu_rows(rows, result, references)
+    db = SessionLocal()
+    try:
+        # One IN query checks the categories of every row
+        references.resolve(db, strict=False)
+        _drop_missing_categories(validated, result, references)
+        if validated and not (atomic and result.error_count):
+            indexes = list(validated)
+            menu_ids = db.scalars(
+                insert(Menu).returning(Menu.menu_id, sort_by_parameter_order=True),
+                [{"description": None, "image_url": None, **validated[i]} for i in indexes],
+            ).all()
+            publish_catalog_change(db)
+            db.commit()
+            catalog_cache.invalidate()
+            for index, menu_id in zip(indexes, menu_ids):
+                result.ok(index, "created", menu_id=menu_id)
+        logger.info("Bulk created menus", extra={"rows": len(rows), "failed": result.error_count})
+        return result.response("created", atomic)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to bulk create menus")
+        return {"error": str(e)}, 500
+    finally:
+        db.close()
+
+
+def bulk_update_menus(data):
+    """Partially update many menus (each row carries its menu_id) in one transaction."""
+    try:
+        rows = bulk_rows(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    atomic = is_atomic(request.args)
+    result = BulkResult(len(rows))
+    references = ReferenceBatch()
+    validated = _validate_menu_rows(rows, result, references, partial=True)
+    seen = set()
+    for index, values in list(validated.items()):
+        if values["menu_id"] in seen:
+            result.fail(index, f"Duplicate menu_id {values['menu_id']}")
+            del validated[index]
+        seen.add(values["menu_id"])
+    db = SessionLocal()
+    try:
+        references.resolve(db, strict=False)
+        _drop_missing_categories(validated, result, references)
+        existing = set(db.scalars(
+            select(Menu.menu_id).where(Menu.menu_id.in_(seen), Menu.deleted_at.is_(None))
+        ))
+        for index, values in list(validated.items()):
+            if values["menu_id"] not in existing:
+                result.fail(index, "Menu not found")
+                del validated[index]
+        if validated and not (atomic and result.error_count):
+            now = datetime.datetime.utcnow()
+            # ORM bulk UPDATE by primary key: executemany grouped by the set of changed columns
+            db.execute(update(Menu), [{**values, "updated_at": now} for values in validated.values()])
+            publish_catalog_change(db)
+            db.commit()
+            catalog_cache.invalidate()
+            for index, values in validated.items():
+                result.ok(index, "updated", menu_id=values["menu_id"])
+        logger.info("Bulk updated menus", extra={"rows": len(rows), "failed": result.error_count})
+        return result.response("updated", atomic)
+    except Exception as e:
+        db.rollback()
+        logger.exception("Failed to bulk update menus")
+        return {"error": str(e)}, 500
+    finally:
+        db.close()
+
+
 def update_menu(menu_id: int, menu_data):
     db = SessionLocal()
     menu = db.query(Menu).filter(
@@ -97,8 +229,10 @@ def update_menu(menu_id: int, menu_data):
     if not menu:
         db.close()
         return {"error": "Menu not found"}, 404
+    references = ReferenceBatch()
     try:
-        validated = validate_menu_input(menu_data, partial=True)
+        validated = validate_menu_input(menu_data, partial=True, references=references)
+        references.resolve(db)
     except ValueError as e:
         db.close()
         return {"error": str(e)}, 400
@@ -106,7 +240,9 @@ def update_menu(menu_id: int, menu_data):
     try:
         for key, value in validated.items():
             setattr(menu, key, value)
+        publish_catalog_change(db)
         db.commit()
+        catalog_cache.invalidate()
         db.refresh(menu)
         logger.info("Updated menu", extra={"menu_id": menu.menu_id})
         return serialize_menu(menu)
@@ -130,7 +266,9 @@ def delete_menu(menu_id: int, type: int):
             if not item:
                 return {"error": "Menu not found"}, 404
             item.deleted_at = datetime.datetime.utcnow()
+            publish_catalog_change(db)
             db.commit()
+            catalog_cache.invalidate()
             logger.info("Soft deleted menu", extra={"menu_id": menu_id})
             return {"detail": "Menu soft deleted"}
         elif type == 2:
@@ -142,7 +280,9 @@ def delete_menu(menu_id: int, type: int):
             if not item:
                 return {"error": "Menu not found or not deleted"}, 404
             item.deleted_at = None
+            publish_catalog_change(db)
             db.commit()
+            catalog_cache.invalidate()
             logger.info("Recovered menu", extra={"menu_id": menu_id})
             return {"detail": "Menu recovered"}
         elif type == 3:
@@ -154,7 +294,9 @@ def delete_menu(menu_id: int, type: int):
             if not item:
                 return {"error": "Menu not found or not soft-deleted"}, 404
             db.delete(item)
+            publish_catalog_change(db)
             db.commit()
+            catalog_cache.invalidate()
             logger.info("Hard deleted menu", extra={"menu_id": menu_id})
             return {"detail": "Menu hard deleted"}
         else:
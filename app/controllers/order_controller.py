@@ -4,93 +4,157 @@ from app.models.menu import Menu
 from app.config.database import SessionLocal
 from app.utils.serializers import serialize_order, serialize_orders
 from flask import jsonify, request
-from app.utils.validators import validate_order_input
+from app.utils.validators import validate_order_input, ReferenceBatch
+from app.utils.queries import order_query, order_detail_query, order_page_validator
+from app.utils.pagination import get_page_params, keyset_order, fetch_page, page_response
+from app.utils.streaming import wants_ndjson, stream_ndjson
+from app.utils.fieldsets import parse_shape
+from app.utils.filters import order_filters
+from app.utils.rollups import track_orders
+from app.utils.price_index import menu_references
+from sqlalchemy import insert
 import datetime
 import logging
 
 logger = logging.getLogger("3awan.controllers.order")
 
 
-def get_all_orders():
-    db = SessionLocal()
+def _order_page_params():
+    return get_page_params(request.args, Order.order_id,
+                           {"created_at": Order.created_at, "order_date": Order.order_date},
+                           export=wants_ndjson())
+
+
+def _order_list_query(db, page, shape, filters, include_deleted=False):
+    query = order_query(db, include_deleted=include_deleted, shape=shape, extra_columns=page.sort_columns)
+    return query.filter(*filters)
+
+
+def order_list_validator(include_deleted=False):
+    """Validator for the requested page of orders (None for NDJSON exports and invalid args)."""
+    if wants_ndjson():
+        return None
+    try:
+        page = _order_page_params()
+        filters = order_filters(request.args)
+    except ValueError:
+        return None
+    return order_page_validator(page, filters, include_deleted=include_deleted)
+
+
+def get_all_orders(db):
+    try:
+        page = _order_page_params()
+        shape = parse_shape(Order, request.args)
+        filters = order_filters(request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
     try:
-        items = db.query(Order).filter(Order.deleted_at.is_(None)).all()
+        items, next_cursor = fetch_page(_order_list_query(db, page, shape, filters), page)
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return jsonify(serialize_orders(items, tz_name=tz, tz_style=tz_style))
+        data = serialize_orders(items, tz_name=tz, tz_style=tz_style, shape=shape)
+        return jsonify(page_response(data, next_cursor, page))
     except Exception as e:
         logger.exception("Failed to fetch orders")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
-def get_all_order_list():
-    db = SessionLocal()
+def get_all_order_list(db):
     try:
-        items = db.query(Order).all()
+        page = _order_page_params()
+        shape = parse_shape(Order, request.args)
+        filters = order_filters(request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if wants_ndjson():
+        # Full-history export: stream rows instead of materializing the whole list
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return jsonify(serialize_orders(items, tz_name=tz, tz_style=tz_style))
+        return stream_ndjson(
+            lambda db: keyset_order(_order_list_query(db, page, shape, filters, include_deleted=True), page),
+            lambda row: serialize_order(row, tz_name=tz, tz_style=tz_style, shape=shape),
+        )
+    try:
+        items, next_cursor = fetch_page(_order_list_query(db, page, shape, filters, include_deleted=True), page)
+        tz = request.args.get('tz')
+        tz_style = request.args.get('tz_style', 'offset')
+        data = serialize_orders(items, tz_name=tz, tz_style=tz_style, shape=shape)
+        return jsonify(page_response(data, next_cursor, page))
     except Exception as e:
         logger.exception("Failed to fetch orders")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
-def get_order_by_id(order_id: int):
-    db = SessionLocal()
+def get_order_by_id(order_id: int, db):
     try:
-        item = db.query(Order).filter(
-            Order.order_id == order_id,
-            Order.deleted_at.is_(None)
-        ).first()
+        shape = parse_shape(Order, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        item = order_detail_query(db, shape=shape).filter(Order.order_id == order_id).first()
         if not item:
             return {"error": "Order not found"}, 404
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return serialize_order(item, tz_name=tz, tz_style=tz_style)
+        return serialize_order(item, tz_name=tz, tz_style=tz_style, shape=shape)
     except Exception as e:
         logger.exception("Failed to fetch order by id")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
+
+
+def _insert_order_items(db, order_id, items, menus):
+    """Bulk insert order items in one executemany, defaulting price from the resolved menus."""
+    rows = [
+        {
+            "order_id": order_id,
+            "menu_id": it["menu_id"],
+            "quantity": it["quantity"],
+            # default price from menu if not provided
+            "price": it["price"] if "price" in it else menus[it["menu_id"]].price,
+        }
+        for it in items
+    ]
+    if rows:
+        db.execute(insert(OrderItem), rows)
+
+
+def create_order_in(db, validated, references, tz=None, tz_style="offset"):
+    """Create a validated order (see validate_order_input) in db and commit; returns (body, status).
+
+    Exceptions propagate (the caller rolls back).
+    """
+    order_items_data = validated.pop("order_items", [])
+    customer_name = validated.get("customer_name")
+    # One IN lookup validates every referenced menu and supplies default prices
+    try:
+        references.resolve(db)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    menus = references.instances(Menu)
+    order = Order(order_date=datetime.datetime.utcnow(), customer_name=customer_name)
+    db.add(order)
+    db.flush()
+    order_id = order.order_id
+    rollup = track_orders(db, [], new_order_ids=[order_id])
+    _insert_order_items(db, order_id, order_items_data, menus)
+    rollup.apply()
+    db.commit()
+    # Single joined SELECT returns the created order graph
+    order = order_detail_query(db).filter(Order.order_id == order_id).one()
+    logger.info("Created order", extra={"order_id": order.order_id})
+    return serialize_order(order, tz_name=tz, tz_style=tz_style), 201
 
 
 def create_order(data):
+    references = ReferenceBatch(lookups=menu_references())
     try:
-        validated = validate_order_input(data)
+        validated = validate_order_input(data, references=references)
     except ValueError as e:
         return {"error": str(e)}, 400
-    order_items_data = validated.pop("order_items", [])
-    customer_name = validated.get("customer_name")
     db = SessionLocal()
     try:
-        order = Order(order_date=datetime.datetime.utcnow(), customer_name=customer_name)
-        db.add(order)
-        db.commit()
-        db.refresh(order)
-        # create order items
-        for it in order_items_data:
-            # default price from menu if not provided
-            if "price" not in it:
-                menu = db.query(Menu).filter(Menu.menu_id == it["menu_id"]).first()
-                if not menu:
-                    db.close()
-                    return {"error": f"Menu id {it['menu_id']} not found"}, 400
-                it["price"] = menu.price
-            oi = OrderItem(
-                order_id=order.order_id,
-                menu_id=it["menu_id"],
-                quantity=it["quantity"],
-                price=it["price"],
-            )
-            db.add(oi)
-        db.commit()
-        db.refresh(order)
-        logger.info("Created order", extra={"order_id": order.order_id})
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return serialize_order(order, tz_name=tz, tz_style=tz_style), 201
+        return create_order_in(db, validated, references, tz, tz_style)
     except Exception as e:
         db.rollback()
         logger.exception("Failed to create order")
@@ -108,35 +172,26 @@ def update_order(order_id: int, data):
     if not order:
         db.close()
         return {"error": "Order not found"}, 404
+    references = ReferenceBatch(lookups=menu_references())
     try:
-        validated = validate_order_input(data, partial=True)
+        validated = validate_order_input(data, partial=True, references=references)
+        references.resolve(db)
     except ValueError as e:
         db.close()
         return {"error": str(e)}, 400
     validated["updated_at"] = datetime.datetime.utcnow()
     try:
+        rollup = track_orders(db, [order.order_id])
         if "status" in validated and validated["status"] is not None:
             order.status = validated["status"]
         if "order_items" in validated:
             # clear and replace order items
             now = datetime.datetime.utcnow()
             db.query(OrderItem).filter(OrderItem.order_id == order.order_id).update({"deleted_at": now})
-            for it in validated["order_items"]:
-                if "price" not in it:
-                    menu = db.query(Menu).filter(Menu.menu_id == it["menu_id"]).first()
-                    if not menu:
-                        db.close()
-                        return {"error": f"Menu id {it['menu_id']} not found"}, 400
-                    it["price"] = menu.price
-                oi = OrderItem(
-                    order_id=order.order_id,
-                    menu_id=it["menu_id"],
-                    quantity=it["quantity"],
-                    price=it["price"],
-                )
-                db.add(oi)
+            _insert_order_items(db, order.order_id, validated["order_items"], references.instances(Menu))
+        rollup.apply()
         db.commit()
-        db.refresh(order)
+        order = order_detail_query(db).filter(Order.order_id == order_id).one()
         logger.info("Updated order", extra={"order_id": order.order_id})
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
@@ -159,9 +214,11 @@ def delete_order(order_id: int):
         db.close()
         return {"error": "Order not found"}, 404
     try:
+        rollup = track_orders(db, [order.order_id])
         now = datetime.datetime.utcnow()
         order.deleted_at = now
         db.query(OrderItem).filter(OrderItem.order_id == order.order_id).update({"deleted_at": now})
+        rollup.apply()
         db.commit()
         logger.info("Deleted order", extra={"order_id": order.order_id})
         return {"detail": "Order deleted"}
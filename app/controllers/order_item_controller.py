@@ -3,74 +3,111 @@ from app.models.menu import Menu
 from app.config.database import SessionLocal
 from app.utils.serializers import serialize_order_item, serialize_order_items
 from flask import jsonify, request
-from app.utils.validators import validate_order_item_input
+from app.utils.validators import validate_order_item_input, ReferenceBatch
+from app.utils.queries import order_item_query, order_item_page_validator
+from app.utils.pagination import get_page_params, keyset_order, fetch_page, page_response
+from app.utils.streaming import wants_ndjson, stream_ndjson
+from app.utils.fieldsets import parse_shape
+from app.utils.rollups import track_orders
+from app.utils.price_index import menu_references
 import datetime
 import logging
 
 logger = logging.getLogger("3awan.controllers.order_item")
 
 
-def get_all_order_items():
-    db = SessionLocal()
+def _order_item_page_params():
+    return get_page_params(request.args, OrderItem.order_item_id, {"created_at": OrderItem.created_at},
+                           export=wants_ndjson())
+
+
+def order_item_list_validator(include_deleted=False):
+    """Validator for the requested page of order items (None for NDJSON exports and invalid args)."""
+    if wants_ndjson():
+        return None
     try:
-        items = db.query(OrderItem).filter(OrderItem.deleted_at.is_(None)).all()
+        page = _order_item_page_params()
+    except ValueError:
+        return None
+    return order_item_page_validator(page, include_deleted=include_deleted)
+
+
+def get_all_order_items(db):
+    try:
+        page = _order_item_page_params()
+        shape = parse_shape(OrderItem, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        items, next_cursor = fetch_page(order_item_query(db, shape=shape, extra_columns=page.sort_columns), page)
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return jsonify(serialize_order_items(items, tz_name=tz, tz_style=tz_style))
+        data = serialize_order_items(items, tz_name=tz, tz_style=tz_style, shape=shape)
+        return jsonify(page_response(data, next_cursor, page))
     except Exception as e:
         logger.exception("Failed to fetch order items")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
-def get_all_order_item_list():
-    db = SessionLocal()
+def get_all_order_item_list(db):
+    try:
+        page = _order_item_page_params()
+        shape = parse_shape(OrderItem, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    if wants_ndjson():
+        # Full-history export: stream rows instead of materializing the whole list
+        tz = request.args.get('tz')
+        tz_style = request.args.get('tz_style', 'offset')
+        return stream_ndjson(
+            lambda db: keyset_order(order_item_query(db, include_deleted=True, shape=shape, extra_columns=page.sort_columns), page),
+            lambda row: serialize_order_item(row, tz_name=tz, tz_style=tz_style, shape=shape),
+        )
     try:
-        items = db.query(OrderItem).all()
+        items, next_cursor = fetch_page(order_item_query(db, include_deleted=True, shape=shape, extra_columns=page.sort_columns), page)
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return jsonify(serialize_order_items(items, tz_name=tz, tz_style=tz_style))
+        data = serialize_order_items(items, tz_name=tz, tz_style=tz_style, shape=shape)
+        return jsonify(page_response(data, next_cursor, page))
     except Exception as e:
         logger.exception("Failed to fetch order items")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
-def get_order_item_by_id(item_id: int):
-    db = SessionLocal()
+def get_order_item_by_id(item_id: int, db):
     try:
-        item = db.query(OrderItem).filter(
-            OrderItem.order_item_id == item_id,
-            OrderItem.deleted_at.is_(None)
-        ).first()
+        shape = parse_shape(OrderItem, request.args)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    try:
+        item = order_item_query(db, shape=shape).filter(OrderItem.order_item_id == item_id).first()
         if not item:
             return {"error": "OrderItem not found"}, 404
         tz = request.args.get('tz')
         tz_style = request.args.get('tz_style', 'offset')
-        return serialize_order_item(item, tz_name=tz, tz_style=tz_style)
+        return serialize_order_item(item, tz_name=tz, tz_style=tz_style, shape=shape)
     except Exception as e:
         logger.exception("Failed to fetch order item by id")
         return {"error": str(e)}, 500
-    finally:
-        db.close()
 
 
 def create_order_item(data):
+    references = ReferenceBatch(lookups=menu_references())
     try:
-        validated = validate_order_item_input(data)
+        validated = validate_order_item_input(data, references=references)
     except ValueError as e:
         return {"error": str(e)}, 400
     db = SessionLocal()
     try:
-        # Default price from menu if not provided
+        try:
+            references.resolve(db)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        # Default price from the already-resolved menu if not provided
         if "price" not in validated:
-            menu = db.query(Menu).filter(Menu.menu_id == validated["menu_id"]).first()
-            if not menu:
-                db.close()
-                return {"error": f"Menu id {validated['menu_id']} not found"}, 400
-            validated["price"] = menu.price
+            validated["price"] = references.get(Menu, validated["menu_id"]).price
+        rollup = track_orders(db, [validated["order_id"]])
         item = OrderItem(**validated)
         db.add(item)
+        rollup.apply()
         db.commit()
         db.refresh(item)
         logger.info("Created order_item", extra={"order_item_id": item.order_item_id})
@@ -94,15 +131,20 @@ def update_order_item(item_id: int, data):
     if not item:
         db.close()
         return {"error": "OrderItem not found"}, 404
+    references = ReferenceBatch(lookups=menu_references())
     try:
-        validated = validate_order_item_input(data, partial=True)
+        validated = validate_order_item_input(data, partial=True, references=references)
+        references.resolve(db)
     except ValueError as e:
         db.close()
         return {"error": str(e)}, 400
     validated["updated_at"] = datetime.datetime.utcnow()
     try:
+        # An item moved to another order changes both orders' totals
+        rollup = track_orders(db, {item.order_id, validated.get("order_id", item.order_id)})
         for k, v in validated.items():
             setattr(item, k, v)
+        rollup.apply()
         db.commit()
         db.refresh(item)
         logger.info("Updated order_item", extra={"order_item_id": item.order_item_id})
@@ -127,7 +169,9 @@ def delete_order_item(item_id: int):
         db.close()
         return {"error": "OrderItem not found"}, 404
     try:
+        rollup = track_orders(db, [item.order_id])
         item.deleted_at = datetime.datetime.utcnow()
+        rollup.apply()
         db.commit()
         logger.info("Deleted order_item", extra={"order_item_id": item.order_item_id})
         return {"detail": "OrderItem deleted"}
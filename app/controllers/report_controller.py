@@ -0,0 +1,152 @@
+from app.config.database import SessionLocal
+from app.models.order import Order
+from app.utils.analytics import (
+    basket_stmt, category_sales_stmt, menu_sales_stmt, resolve_tz, revenue_by_period_stmt,
+    rollup_basket_stmt, rollup_category_sales_stmt, rollup_menu_sales_stmt, rollup_revenue_by_period_stmt,
+    whole_hour_offset,
+)
+from app.utils.filters import bucket_bounds, date_range
+from app.utils.rollups import rollup_state
+from flask import request
+import logging
+
+logger = logging.getLogger("3awan.controllers.report")
+
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+
+def _range(args):
+    """Order date criteria, rollup bucket bounds (None = scan base tables) and the echoed range."""
+    criteria = date_range(Order.order_date, args)
+    bounds = bucket_bounds(args) if rollup_state.usable else None
+    return criteria, bounds, {"from": args.get("from"), "to": args.get("to")}
+
+
+def _limit(args):
+    limit = args.get("limit")
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError("limit must be a valid number")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return limit
+
+
+# Report builders: (statement, render(rows) -> body) from the query args; raise ValueError
+# on bad input. The Flask views below run them through _run_report.
+
+def revenue_report_query(args, dialect):
+    """Revenue, quantity and order count per day or hour."""
+    criteria, bounds, meta = _range(args)
+    granularity = args.get("granularity", "day")
+    tz = resolve_tz(args.get("tz"))
+    if bounds is not None and whole_hour_offset(tz):
+        stmt = rollup_revenue_by_period_stmt(bounds, granularity, dialect, tz)
+    else:
+        stmt = revenue_by_period_stmt(criteria, granularity, dialect, tz)
+
+    def render(rows):
+        data = [
+            {"period": r.period, "orders": r.orders, "quantity": int(r.quantity or 0), "revenue": _money(r.revenue)}
+            for r in rows
+        ]
+        return {**meta, "granularity": granularity, "tz": tz, "data": data}
+    return stmt, render
+
+
+def menu_sales_report_query(args, dialect):
+    """Quantity and revenue per menu (top sellers first)."""
+    criteria, bounds, meta = _range(args)
+    sort, limit = args.get("sort", "revenue"), _limit(args)
+    if bounds is not None:
+        stmt = rollup_menu_sales_stmt(bounds, sort, limit)
+    else:
+        stmt = menu_sales_stmt(criteria, sort, limit)
+
+    def render(rows):
+        data = [
+            {
+                "menu_id": r.menu_id,
+                "menu_name": r.menu_name,
+                "category_id": r.category_id,
+                "quantity": int(r.quantity or 0),
+                "revenue": _money(r.revenue),
+            }
+            for r in rows
+        ]
+        return {**meta, "data": data}
+    return stmt, render
+
+
+def category_sales_report_query(args, dialect):
+    """Quantity and revenue per category."""
+    criteria, bounds, meta = _range(args)
+    stmt = rollup_category_sales_stmt(bounds) if bounds is not None else category_sales_stmt(criteria)
+
+    def render(rows):
+        data = [
+            {
+                "category_id": r.category_id,
+                "category_name": r.category_name,
+                "quantity": int(r.quantity or 0),
+                "revenue": _money(r.revenue),
+            }
+            for r in rows
+        ]
+        return {**meta, "data": data}
+    return stmt, render
+
+
+def basket_report_query(args, dialect):
+    """Average basket size (items and revenue per order) over the range."""
+    criteria, bounds, meta = _range(args)
+    stmt = rollup_basket_stmt(bounds) if bounds is not None else basket_stmt(criteria)
+
+    def render(rows):
+        r = rows[0]
+        return {
+            **meta,
+            "orders": r.orders,
+            "quantity": int(r.quantity or 0),
+            "revenue": _money(r.revenue),
+            "avg_quantity": round(float(r.avg_quantity or 0), 2),
+            "avg_revenue": _money(r.avg_revenue),
+        }
+    return stmt, render
+
+
+def _run_report(build, name):
+    db = SessionLocal()
+    try:
+        rollup_state.refresh(db)
+        try:
+            stmt, render = build(request.args, db.get_bind().dialect.name)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        return render(db.execute(stmt).all())
+    except Exception as e:
+        logger.exception("Failed to build %s report", name)
+        return {"error": str(e)}, 500
+    finally:
+        db.close()
+
+
+def get_revenue_report():
+    return _run_report(revenue_report_query, "revenue")
+
+
+def get_menu_sales_report():
+    return _run_report(menu_sales_report_query, "menu sales")
+
+
+def get_category_sales_report():
+    return _run_report(category_sales_report_query, "category sales")
+
+
+def get_basket_report():
+    return _run_report(basket_report_query, "basket")
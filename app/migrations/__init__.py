@@ -0,0 +1,8 @@
+"""Versioned schema migrations.
+
+Run before starting (or deploying) the app; the app itself performs no DDL:
+
+    python -m app.migrations upgrade     # apply pending migrations
+    python -m app.migrations status      # list applied/pending migrations
+"""
+from app.migrations.runner import discover_migrations, pending_migrations, upgrade  # noqa: F401
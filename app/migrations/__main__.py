@@ -0,0 +1,32 @@
+"""Command line entry point: python -m app.migrations {upgrade,status}."""
+import argparse
+import sys
+
+from app.migrations.runner import discover_migrations, pending_migrations, upgrade
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Database schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--target", help="stop after this version (e.g. 0003)")
+    commands.add_parser("status", help="list applied and pending migrations")
+    args = parser.parse_args(argv)
+
+    from app.utils.request_logging import configure_logging
+
+    configure_logging()
+    if args.command == "upgrade":
+        applied = upgrade(args.target)
+        print(f"Applied {len(applied)} migration(s): {', '.join(applied) or '-'}")
+        return 0
+
+    pending = {m.version for m in pending_migrations()}
+    for migration in discover_migrations():
+        state = "pending" if migration.version in pending else "applied"
+        print(f"{migration.version}  {state:<8} {migration.description}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Idempotent DDL helpers for migrations.
+
+Migrations must be safe to re-run against databases that were created by the
+old ``db.create_all()`` / one-off scripts, so every helper checks first.
+"""
+from sqlalchemy import inspect, text
+
+
+def has_table(conn, table_name: str) -> bool:
+    return inspect(conn).has_table(table_name)
+
+
+def has_column(conn, table_name: str, column_name: str) -> bool:
+    if not has_table(conn, table_name):
+        return False
+    return column_name in {c["name"] for c in inspect(conn).get_columns(table_name)}
+
+
+def add_column(conn, table_name: str, column_name: str, ddl_type: str):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    if has_column(conn, table_name, column_name):
+        return
+    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {ddl_type}"))
+
+
+def drop_column(conn, table_name: str, column_name: str):
+    """ALTER TABLE ... DROP COLUMN if the column exists."""
+    if not has_column(conn, table_name, column_name):
+        return
+    conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {column_name}"))
+
+
+def _invalid_postgres_index(conn, name: str) -> bool:
+    return bool(conn.execute(
+        text(
+            "SELECT NOT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ),
+        {"name": name},
+    ).scalar())
+
+
+def create_index(conn, name: str, table_name: str, columns: str, where: str = None,
+                 postgresql_columns: str = None, concurrently: bool = False):
+    """CREATE INDEX IF NOT EXISTS; CONCURRENTLY on PostgreSQL when requested.
+
+    concurrently requires an autocommit connection (a migration with
+    ``transactional = False``). An invalid index left behind by an interrupted
+    concurrent build is dropped and rebuilt.
+    """
+    postgres = conn.dialect.name == "postgresql"
+    concurrently = concurrently and postgres
+    if postgres and postgresql_columns:
+        columns = postgresql_columns
+    if concurrently and _invalid_postgres_index(conn, name):
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    ddl = "CREATE INDEX {}IF NOT EXISTS {} ON {} ({})".format(
+        "CONCURRENTLY " if concurrently else "", name, table_name, columns
+    )
+    if where:
+        ddl += f" WHERE {where}"
+    conn.execute(text(ddl))
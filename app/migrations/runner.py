@@ -0,0 +1,180 @@
+"""Versioned schema migration runner.
+
+Migrations live in ``app/migrations/versions`` as modules named
+``NNNN_description.py`` exposing ``upgrade(conn)``. Applied versions are
+recorded in the ``schema_migrations`` table; pending ones run in version order.
+
+- Only one process migrates at a time: a PostgreSQL advisory lock (held on a
+  dedicated connection for the whole run), or a file lock for other databases.
+- Each migration runs in its own transaction together with its
+  ``schema_migrations`` row, unless the module sets ``transactional = False``
+  (needed for ``CREATE INDEX CONCURRENTLY``); those run in autocommit mode and
+  must be idempotent, since a failure can leave part of them applied.
+"""
+import contextlib
+import datetime
+import fcntl
+import hashlib
+import importlib
+import logging
+import os
+import pkgutil
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select, text
+
+from app.config.database import engine
+
+logger = logging.getLogger("3awan.migrations")
+
+VERSIONS_PACKAGE = "app.migrations.versions"
+# Advisory lock key shared by every process migrating this database
+LOCK_KEY = zlib.crc32(b"3awan.schema_migrations")
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String(32), primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    module: object
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+    @property
+    def description(self) -> str:
+        doc = (self.module.__doc__ or "").strip()
+        return doc.splitlines()[0] if doc else self.name
+
+
+def discover_migrations():
+    """All migrations in VERSIONS_PACKAGE, ordered by version."""
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        version, _, name = info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(version, name, module))
+    migrations.sort(key=lambda m: int(m.version))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {VERSIONS_PACKAGE}: {versions}")
+    return migrations
+
+
+def applied_versions(conn):
+    if not engine.dialect.has_table(conn, schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations():
+    """Migrations not yet recorded in schema_migrations (read-only)."""
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [m for m in discover_migrations() if m.version not in applied]
+
+
+@contextlib.contextmanager
+def migration_lock():
+    """Hold the cross-process migration lock for the duration of the block."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            logger.info("Waiting for migration lock")
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+        return
+    # Other databases (SQLite in development): lock file keyed by the database URL
+    digest = hashlib.sha1(str(engine.url).encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(tempfile.gettempdir(), f"3awan-migrate-{digest}.lock")
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def _no_statement_timeout(conn):
+    # DB_STATEMENT_TIMEOUT_MS is meant for requests; index builds can take much longer
+    if conn.dialect.name != "postgresql":
+        yield
+        return
+    conn.execute(text("SET statement_timeout = 0"))
+    try:
+        yield
+    finally:
+        conn.execute(text("RESET statement_timeout"))
+
+
+def _begin_ddl_transaction(conn):
+    # pysqlite opens its transaction only before DML, so DDL would autocommit
+    # and a failed migration could not be rolled back
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN")
+
+
+def _record(conn, migration):
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version,
+        name=migration.name,
+        applied_at=datetime.datetime.now(datetime.timezone.utc),
+    ))
+
+
+def _apply(migration):
+    start = time.perf_counter()
+    logger.info("Applying migration %s %s", migration.version, migration.description)
+    if migration.transactional:
+        with engine.begin() as conn, _no_statement_timeout(conn):
+            _begin_ddl_transaction(conn)
+            migration.module.upgrade(conn)
+            _record(conn, migration)
+    else:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            with _no_statement_timeout(conn):
+                migration.module.upgrade(conn)
+                _record(conn, migration)
+    logger.info("Applied migration %s in %.2fs", migration.version, time.perf_counter() - start)
+
+
+def upgrade(target=None):
+    """Apply pending migrations (up to and including `target`); return the versions applied."""
+    migrations = discover_migrations()
+    applied_now = []
+    with migration_lock():
+        with engine.begin() as conn:
+            schema_migrations.create(conn, checkfirst=True)
+            # Re-read under the lock: another process may have just finished migrating
+            applied = applied_versions(conn)
+        for migration in migrations:
+            if target is not None and int(migration.version) > int(target):
+                break
+            if migration.version in applied:
+                continue
+            _apply(migration)
+            applied_now.append(migration.version)
+    if not applied_now:
+        logger.info("Database schema is up to date")
+    return applied_now
@@ -0,0 +1,56 @@
+"""Create the base tables (categories, menus, orders, order_items).
+
+Table definitions are a snapshot of the schema at this version, independent of
+the current models. Existing tables (from the former ``db.create_all()``) are
+left untouched; later migrations bring them up to date.
+"""
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text, func
+
+metadata = MetaData()
+
+Table(
+    "categories", metadata,
+    Column("category_id", Integer, primary_key=True),
+    Column("category_name", String(100), nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("deleted_at", DateTime),
+)
+
+Table(
+    "menus", metadata,
+    Column("menu_id", Integer, primary_key=True),
+    Column("menu_name", String(100), nullable=False),
+    Column("description", Text),
+    Column("price", Float, nullable=False),
+    Column("category_id", Integer, ForeignKey("categories.category_id"), nullable=False),
+    Column("image_url", String(255)),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("deleted_at", DateTime),
+)
+
+Table(
+    "orders", metadata,
+    Column("order_id", Integer, primary_key=True),
+    Column("order_date", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("deleted_at", DateTime),
+)
+
+Table(
+    "order_items", metadata,
+    Column("order_item_id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.order_id"), nullable=False),
+    Column("menu_id", Integer, ForeignKey("menus.menu_id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("price", Float, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Column("updated_at", DateTime(timezone=True)),
+    Column("deleted_at", DateTime),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
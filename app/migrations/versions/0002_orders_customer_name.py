@@ -0,0 +1,6 @@
+"""Add orders.customer_name (formerly add_customer_name_column.py)."""
+from app.migrations import ops
+
+
+def upgrade(conn):
+    ops.add_column(conn, "orders", "customer_name", "VARCHAR(100)")
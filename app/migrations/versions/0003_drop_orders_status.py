@@ -0,0 +1,6 @@
+"""Drop the unused orders.status column (formerly drop_column.py / drop_status_column.py)."""
+from app.migrations import ops
+
+
+def upgrade(conn):
+    ops.drop_column(conn, "orders", "status")
@@ -0,0 +1,24 @@
+"""Create catalog_version, the cross-worker catalog cache version counter.
+
+The single row (id=1) is seeded here, so writers only ever UPDATE it.
+"""
+import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, Table, exists, select
+
+metadata = MetaData()
+
+catalog_version = Table(
+    "catalog_version", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("version", BigInteger, nullable=False),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    if not conn.execute(select(exists().where(catalog_version.c.id == 1))).scalar():
+        conn.execute(catalog_version.insert().values(
+            id=1, version=0, updated_at=datetime.datetime.now(datetime.timezone.utc),
+        ))
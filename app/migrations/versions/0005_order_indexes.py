@@ -0,0 +1,24 @@
+"""Add the order filtering/listing indexes (formerly add_order_indexes.py).
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL so orders stay writable
+while the indexes are created.
+"""
+from app.migrations import ops
+
+# CONCURRENTLY cannot run inside a transaction block
+transactional = False
+
+ACTIVE = "deleted_at IS NULL"
+
+
+def upgrade(conn):
+    ops.create_index(conn, "ix_orders_order_date", "orders", "order_date", concurrently=True)
+    ops.create_index(conn, "ix_orders_active_order_id", "orders", "order_id", where=ACTIVE, concurrently=True)
+    ops.create_index(conn, "ix_orders_active_order_date", "orders", "order_date, order_id", where=ACTIVE,
+                     concurrently=True)
+    ops.create_index(conn, "ix_orders_customer_name_lower", "orders", "lower(customer_name)",
+                     postgresql_columns="lower(customer_name) text_pattern_ops", concurrently=True)
+    ops.create_index(conn, "ix_order_items_order_id", "order_items", "order_id", concurrently=True)
+    ops.create_index(conn, "ix_order_items_menu_id", "order_items", "menu_id", concurrently=True)
+    ops.create_index(conn, "ix_order_items_active_menu_id", "order_items", "menu_id, order_id", where=ACTIVE,
+                     concurrently=True)
@@ -0,0 +1,47 @@
+"""Create the sales rollup tables.
+
+They start empty: backfilling the whole order history here would hold the
+release-phase transaction (and its locks) for as long as the scan takes.
+``python -m app.utils.rollups rebuild`` fills them in batches after the
+deploy; reports use the base tables until it has (see 0008).
+"""
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, Integer, MetaData, Table
+
+metadata = MetaData()
+
+Table(
+    "sales_hourly", metadata,
+    Column("bucket_start", DateTime, primary_key=True),
+    Column("orders", BigInteger, nullable=False),
+    Column("quantity", BigInteger, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+
+Table(
+    "sales_daily", metadata,
+    Column("bucket_date", Date, primary_key=True),
+    Column("orders", BigInteger, nullable=False),
+    Column("quantity", BigInteger, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+
+Table(
+    "menu_sales_hourly", metadata,
+    Column("bucket_start", DateTime, primary_key=True),
+    Column("menu_id", Integer, primary_key=True),
+    Column("quantity", BigInteger, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+
+Table(
+    "menu_sales_daily", metadata,
+    Column("bucket_date", Date, primary_key=True),
+    Column("menu_id", Integer, primary_key=True),
+    Column("quantity", BigInteger, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
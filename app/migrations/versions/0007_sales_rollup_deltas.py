@@ -0,0 +1,19 @@
+"""Create sales_rollup_deltas, the append-only queue of pending rollup changes."""
+from sqlalchemy import BigInteger, Column, Date, DateTime, Float, Integer, MetaData, Table
+
+metadata = MetaData()
+
+Table(
+    "sales_rollup_deltas", metadata,
+    Column("delta_id", Integer, primary_key=True, autoincrement=True),
+    Column("bucket_start", DateTime, nullable=False),
+    Column("bucket_date", Date, nullable=False),
+    Column("menu_id", Integer, nullable=True),
+    Column("orders", BigInteger, nullable=False),
+    Column("quantity", BigInteger, nullable=False),
+    Column("revenue", Float, nullable=False),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,33 @@
+"""Create sales_rollup_state, which records whether the rollups cover all history.
+
+Databases without orders (or whose rollups an earlier 0006 already filled)
+start ready. Otherwise reports aggregate the base tables until
+``python -m app.utils.rollups rebuild`` has backfilled everything.
+"""
+import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, Table, exists, select
+
+metadata = MetaData()
+
+sales_rollup_state = Table(
+    "sales_rollup_state", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("ready", Boolean, nullable=False),
+    Column("rebuilt_at", DateTime(timezone=True), nullable=True),
+)
+
+# Snapshots of the tables read here (not part of metadata: never created here)
+_source = MetaData()
+orders = Table("orders", _source, Column("order_id", Integer, primary_key=True))
+sales_hourly = Table("sales_hourly", _source, Column("bucket_start", DateTime, primary_key=True))
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    has_orders = conn.execute(select(exists(select(orders.c.order_id)))).scalar()
+    backfilled = conn.execute(select(exists(select(sales_hourly.c.bucket_start)))).scalar()
+    ready = bool(backfilled or not has_orders)
+    conn.execute(sales_rollup_state.insert().values(
+        id=1, ready=ready, rebuilt_at=datetime.datetime.now(datetime.timezone.utc) if ready else None,
+    ))
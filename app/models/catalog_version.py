@@ -0,0 +1,14 @@
+from app.config.database import db
+from datetime import datetime
+
+
+class CatalogVersion(db.Model):
+    """Single-row counter bumped on every menu/category write (cross-worker cache coherence)."""
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<CatalogVersion {self.version}>'
@@ -13,6 +13,18 @@ class Order(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now())
     deleted_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_orders_order_date', 'order_date'),
+        # Active (non-deleted) orders: default listing by id and date-range/sort by order_date
+        db.Index('ix_orders_active_order_id', 'order_id',
+                 postgresql_where=db.text('deleted_at IS NULL'), sqlite_where=db.text('deleted_at IS NULL')),
+        db.Index('ix_orders_active_order_date', 'order_date', 'order_id',
+                 postgresql_where=db.text('deleted_at IS NULL'), sqlite_where=db.text('deleted_at IS NULL')),
+        # Case-insensitive prefix search on customer_name (LIKE 'abc%')
+        db.Index('ix_orders_customer_name_lower', func.lower(customer_name).label('customer_name_lower'),
+                 postgresql_ops={'customer_name_lower': 'text_pattern_ops'}),
+    )
     
     # Relationships
     # cascade so that when an Order is added/removed the related OrderItems follow
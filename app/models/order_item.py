@@ -13,6 +13,14 @@ class OrderItem(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), onupdate=func.now())
     deleted_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_menu_id', 'menu_id'),
+        # "orders containing menu X" lookups only consider active items
+        db.Index('ix_order_items_active_menu_id', 'menu_id', 'order_id',
+                 postgresql_where=db.text('deleted_at IS NULL'), sqlite_where=db.text('deleted_at IS NULL')),
+    )
     
     def __repr__(self):
         return f'<OrderItem {self.order_item_id}>'
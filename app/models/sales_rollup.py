@@ -0,0 +1,85 @@
+from app.config.database import db
+
+
+class SalesHourly(db.Model):
+    """Active orders, quantity and revenue per UTC hour (maintained by app.utils.rollups)."""
+    __tablename__ = 'sales_hourly'
+
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    orders = db.Column(db.BigInteger, nullable=False, default=0)
+    quantity = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesHourly {self.bucket_start}>'
+
+
+class SalesDaily(db.Model):
+    """Active orders, quantity and revenue per UTC day."""
+    __tablename__ = 'sales_daily'
+
+    bucket_date = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.BigInteger, nullable=False, default=0)
+    quantity = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesDaily {self.bucket_date}>'
+
+
+class MenuSalesHourly(db.Model):
+    """Quantity and revenue per menu per UTC hour."""
+    __tablename__ = 'menu_sales_hourly'
+
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    menu_id = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MenuSalesHourly {self.bucket_start} {self.menu_id}>'
+
+
+class MenuSalesDaily(db.Model):
+    """Quantity and revenue per menu per UTC day."""
+    __tablename__ = 'menu_sales_daily'
+
+    bucket_date = db.Column(db.Date, primary_key=True)
+    menu_id = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<MenuSalesDaily {self.bucket_date} {self.menu_id}>'
+
+
+class SalesRollupDelta(db.Model):
+    """Pending rollup change appended by an order write; folded into the tables above.
+
+    ``orders`` carries the order count change of the bucket on one of its rows
+    (menu_id is NULL only when no menu total changed with it).
+    """
+    __tablename__ = 'sales_rollup_deltas'
+
+    delta_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    bucket_date = db.Column(db.Date, nullable=False)
+    menu_id = db.Column(db.Integer, nullable=True)
+    orders = db.Column(db.BigInteger, nullable=False, default=0)
+    quantity = db.Column(db.BigInteger, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<SalesRollupDelta {self.delta_id} {self.bucket_start} {self.menu_id}>'
+
+
+class SalesRollupState(db.Model):
+    """Single row: whether the rollups cover all history (set by a full ``rollups rebuild``)."""
+    __tablename__ = 'sales_rollup_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    ready = db.Column(db.Boolean, nullable=False, default=False)
+    rebuilt_at = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self):
+        return f'<SalesRollupState ready={self.ready}>'
@@ -4,19 +4,28 @@ import logging
 # Import entity-specific controllers
 from app.controllers.category_controller import (
     get_all_categories_list, get_all_categories, get_category_by_id, create_category, update_category, delete_category,
+    bulk_create_categories, bulk_update_categories,
 )
 from app.controllers.menu_controller import (
     get_all_menu_list, get_all_menus, get_menu_by_id, create_menu, update_menu, delete_menu,
+    bulk_create_menus, bulk_update_menus,
 )
 from app.controllers.order_controller import (
     get_all_order_list, get_all_orders, get_order_by_id, create_order, update_order, delete_order,
+    order_list_validator,
 )
 from app.controllers.order_item_controller import (
     get_all_order_item_list, get_all_order_items, get_order_item_by_id, create_order_item, update_order_item, delete_order_item,
+    order_item_list_validator,
+)
+from app.controllers.catalog_controller import export_catalog, import_catalog_file
+from app.controllers.report_controller import (
+    get_revenue_report, get_menu_sales_report, get_category_sales_report, get_basket_report,
+)
+from app.utils.conditional import conditional_get
+from app.utils.queries import (
+    category_validator, menu_validator, order_validator, order_item_validator,
 )
-from app.config.database import SessionLocal
-from app.models.menu import Menu
-from app.utils.serializers import serialize_menus
 
 # Define a single blueprint 'web'
 web = Blueprint("web", __name__, url_prefix="/api")
@@ -52,8 +61,9 @@ def categories_all_list():
 
 
 @web.route('/categories/<int:category_id>', methods=['GET'])
-def categories_get(category_id):
-    return get_category_by_id(category_id)
+@conditional_get(lambda category_id: category_validator(category_id))
+def categories_get(category_id, db):
+    return get_category_by_id(category_id, db)
 
 
 @web.route('/categories', methods=['POST'])
@@ -61,6 +71,16 @@ def categories_post():
     return create_category(request.get_json() or {})
 
 
+@web.route('/categories/bulk', methods=['POST'])
+def categories_bulk_post():
+    return bulk_create_categories(request.get_json(silent=True))
+
+
+@web.route('/categories/bulk', methods=['PUT'])
+def categories_bulk_put():
+    return bulk_update_categories(request.get_json(silent=True))
+
+
 @web.route('/categories/<int:category_id>', methods=['PUT'])
 def categories_put(category_id):
     return update_category(category_id, request.get_json() or {})
@@ -87,20 +107,6 @@ def menus_list():
 def menus_all_list():
     return get_all_menu_list()
 
-# Diagnostic route to isolate DB + serialization directly in route
-@web.route('/menus_diag', methods=['GET'])
-def menus_diag():
-    try:
-        s = SessionLocal()
-        try:
-            menus = s.query(Menu).filter(Menu.deleted_at.is_(None)).all()
-            return serialize_menus(menus), 200
-        finally:
-            s.close()
-    except Exception as e:
-        logger.exception("Error in menus_diag")
-        return {"error": str(e)}, 500
-
 # Simple diagnostic route to verify routing works
 @web.route('/menus_static', methods=['GET'])
 def menus_static():
@@ -108,8 +114,9 @@ def menus_static():
 
 
 @web.route('/menus/<int:menu_id>', methods=['GET'])
-def menus_get(menu_id):
-    return get_menu_by_id(menu_id)
+@conditional_get(lambda menu_id: menu_validator(menu_id))
+def menus_get(menu_id, db):
+    return get_menu_by_id(menu_id, db)
 
 
 @web.route('/menus', methods=['POST'])
@@ -117,6 +124,16 @@ def menus_post():
     return create_menu(request.get_json() or {})
 
 
+@web.route('/menus/bulk', methods=['POST'])
+def menus_bulk_post():
+    return bulk_create_menus(request.get_json(silent=True))
+
+
+@web.route('/menus/bulk', methods=['PUT'])
+def menus_bulk_put():
+    return bulk_update_menus(request.get_json(silent=True))
+
+
 @web.route('/menus/<int:menu_id>', methods=['PUT'])
 def menus_put(menu_id):
     return update_menu(menu_id, request.get_json() or {})
@@ -132,17 +149,20 @@ def menus_delete(menu_id, type):
 
 # Orders
 @web.route('/orders', methods=['GET'])
-def orders_list():
-    return get_all_orders()
+@conditional_get(lambda: order_list_validator())
+def orders_list(db):
+    return get_all_orders(db)
 
 @web.route('/orders/all', methods=['GET'])
-def orders_all_list():
-    return get_all_order_list()
+@conditional_get(lambda: order_list_validator(include_deleted=True))
+def orders_all_list(db):
+    return get_all_order_list(db)
 
 
 @web.route('/orders/<int:order_id>', methods=['GET'])
-def orders_get(order_id):
-    return get_order_by_id(order_id)
+@conditional_get(lambda order_id: order_validator(order_id))
+def orders_get(order_id, db):
+    return get_order_by_id(order_id, db)
 
 
 @web.route('/orders', methods=['POST'])
@@ -162,16 +182,19 @@ def orders_delete(order_id):
 
 # Order Items
 @web.route('/order_items', methods=['GET'])
-def order_items_list():
-    return get_all_order_items()
+@conditional_get(lambda: order_item_list_validator())
+def order_items_list(db):
+    return get_all_order_items(db)
 
 @web.route('/order_items/all', methods=['GET'])
-def order_items_all_list():
-    return get_all_order_item_list()
+@conditional_get(lambda: order_item_list_validator(include_deleted=True))
+def order_items_all_list(db):
+    return get_all_order_item_list(db)
 
 @web.route('/order_items/<int:order_item_id>', methods=['GET'])
-def order_items_get(order_item_id):
-    return get_order_item_by_id(order_item_id)
+@conditional_get(lambda order_item_id: order_item_validator(order_item_id))
+def order_items_get(order_item_id, db):
+    return get_order_item_by_id(order_item_id, db)
 
 
 @web.route('/order_items', methods=['POST'])
@@ -187,3 +210,36 @@ def order_items_put(order_item_id):
 @web.route('/order_items/<int:order_item_id>', methods=['DELETE'])
 def order_items_delete(order_item_id):
     return delete_order_item(order_item_id)
+
+
+# Reports (aggregated in SQL; all accept ?from=&to=)
+@web.route('/reports/revenue', methods=['GET'])
+def reports_revenue():
+    # ?granularity=day|hour&tz=Asia/Jakarta
+    return get_revenue_report()
+
+
+@web.route('/reports/menus', methods=['GET'])
+def reports_menus():
+    # ?sort=revenue|quantity&limit=10
+    return get_menu_sales_report()
+
+
+@web.route('/reports/categories', methods=['GET'])
+def reports_categories():
+    return get_category_sales_report()
+
+
+@web.route('/reports/basket', methods=['GET'])
+def reports_basket():
+    return get_basket_report()
+
+
+@web.route('/catalog/export', methods=['GET'])
+def catalog_export():
+    return export_catalog()
+
+
+@web.route('/catalog/import', methods=['POST'])
+def catalog_import():
+    return import_catalog_file()
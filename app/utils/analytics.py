@@ -0,0 +1,251 @@
+"""SQL aggregation statements for the sales report endpoints.
+
+Everything is computed by the database with GROUP BY over
+``order_items.price * order_items.quantity`` and returned as plain rows; no
+ORM objects are loaded. Only active (non-deleted) orders and items count.
+
+The ``rollup_*`` variants answer the same questions from the pre-aggregated
+sales tables (app.utils.rollups) when the requested range is made of whole
+UTC buckets: daily tables for whole-day ranges, hourly ones otherwise. They
+read the tables together with the deltas not folded into them yet, and skip
+buckets whose net quantity is zero (everything in them was deleted).
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, desc, distinct, func, literal_column, select, union_all
+
+from app.models.category import Category
+from app.models.menu import Menu
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.sales_rollup import MenuSalesDaily, MenuSalesHourly, SalesDaily, SalesHourly, SalesRollupDelta
+
+GRANULARITIES = ("day", "hour")
+MENU_SORTS = {"revenue", "quantity"}
+
+_PG_FORMATS = {"day": "YYYY-MM-DD", "hour": 'YYYY-MM-DD"T"HH24":00"'}
+_STRFTIME_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H:00"}
+
+
+def revenue_expr():
+    return func.sum(OrderItem.price * OrderItem.quantity)
+
+
+def resolve_tz(tz_name):
+    """Validated IANA zone name (or None); raises ValueError for unknown zones."""
+    if not tz_name:
+        return None
+    try:
+        ZoneInfo(tz_name)
+    except Exception:
+        raise ValueError("tz must be a valid IANA timezone, e.g. Asia/Jakarta")
+    return tz_name
+
+
+def period_expr(column, granularity: str, dialect_name: str, tz_name=None, utc_naive=False):
+    """Expression formatting column as its day ("2024-05-01") or hour ("2024-05-01T13:00") bucket.
+
+    utc_naive marks a timestamp-without-zone column holding UTC (the rollup buckets).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if dialect_name == "postgresql":
+        if tz_name and utc_naive:
+            column = func.timezone("UTC", column)
+        value = func.timezone(tz_name, column) if tz_name else column
+        return func.to_char(value, _PG_FORMATS[granularity])
+    modifiers = []
+    if tz_name:
+        # SQLite has no zone database: shift by the zone's current UTC offset
+        offset = datetime.now(ZoneInfo(tz_name)).utcoffset()
+        modifiers.append(f"{int(offset.total_seconds() // 60):+d} minutes")
+    return func.strftime(_STRFTIME_FORMATS[granularity], column, *modifiers)
+
+
+def _active_items(criteria):
+    """FROM order_items JOIN orders restricted to active rows and the given order criteria."""
+    return and_(
+        OrderItem.order_id == Order.order_id,
+        OrderItem.deleted_at.is_(None),
+        Order.deleted_at.is_(None),
+        *criteria,
+    )
+
+
+def revenue_by_period_stmt(criteria, granularity: str, dialect_name: str, tz_name=None):
+    period = period_expr(Order.order_date, granularity, dialect_name, tz_name).label("period")
+    return (
+        select(
+            period,
+            func.count(distinct(Order.order_id)).label("orders"),
+            func.sum(OrderItem.quantity).label("quantity"),
+            revenue_expr().label("revenue"),
+        )
+        .select_from(OrderItem)
+        .join(Order, _active_items(criteria))
+        .group_by(period)
+        .order_by(period)
+    )
+
+
+def menu_sales_stmt(criteria, sort: str = "revenue", limit=None):
+    if sort not in MENU_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(sorted(MENU_SORTS))}")
+    quantity = func.sum(OrderItem.quantity).label("quantity")
+    revenue = revenue_expr().label("revenue")
+    stmt = (
+        select(Menu.menu_id, Menu.menu_name, Menu.category_id, quantity, revenue)
+        .select_from(OrderItem)
+        .join(Order, _active_items(criteria))
+        .join(Menu, Menu.menu_id == OrderItem.menu_id)
+        .group_by(Menu.menu_id, Menu.menu_name, Menu.category_id)
+        .order_by(desc(revenue if sort == "revenue" else quantity), Menu.menu_id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def category_sales_stmt(criteria):
+    revenue = revenue_expr().label("revenue")
+    return (
+        select(
+            Category.category_id,
+            Category.category_name,
+            func.sum(OrderItem.quantity).label("quantity"),
+            revenue,
+        )
+        .select_from(OrderItem)
+        .join(Order, _active_items(criteria))
+        .join(Menu, Menu.menu_id == OrderItem.menu_id)
+        .join(Category, Category.category_id == Menu.category_id)
+        .group_by(Category.category_id, Category.category_name)
+        .order_by(desc(revenue), Category.category_id)
+    )
+
+
+def basket_stmt(criteria):
+    """One row: order count, average items/revenue per order and total revenue."""
+    per_order = (
+        select(
+            Order.order_id,
+            func.sum(OrderItem.quantity).label("quantity"),
+            revenue_expr().label("revenue"),
+        )
+        .select_from(OrderItem)
+        .join(Order, _active_items(criteria))
+        .group_by(Order.order_id)
+        .subquery()
+    )
+    return select(
+        func.count().label("orders"),
+        func.sum(per_order.c.quantity).label("quantity"),
+        func.sum(per_order.c.revenue).label("revenue"),
+        func.avg(per_order.c.quantity).label("avg_quantity"),
+        func.avg(per_order.c.revenue).label("avg_revenue"),
+    )
+
+
+# Rollup-backed variants ----------------------------------------------------------
+
+def whole_hour_offset(tz_name) -> bool:
+    """True when hourly UTC buckets map onto whole local hours (not e.g. +05:30)."""
+    if not tz_name:
+        return True
+    offset = datetime.now(ZoneInfo(tz_name)).utcoffset()
+    return offset.total_seconds() % 3600 == 0
+
+
+def _sales_source(daily: bool):
+    """sales_daily/sales_hourly rows plus pending deltas as (bucket, orders, quantity, revenue)."""
+    model, bucket = (SalesDaily, SalesDaily.bucket_date) if daily else (SalesHourly, SalesHourly.bucket_start)
+    delta_bucket = SalesRollupDelta.bucket_date if daily else SalesRollupDelta.bucket_start
+    return union_all(
+        select(bucket.label("bucket"), model.orders, model.quantity, model.revenue),
+        select(delta_bucket.label("bucket"), SalesRollupDelta.orders, SalesRollupDelta.quantity,
+               SalesRollupDelta.revenue),
+    ).subquery()
+
+
+def _menu_source(daily: bool):
+    """menu_sales_daily/hourly rows plus pending deltas as (bucket, menu_id, quantity, revenue)."""
+    model = MenuSalesDaily if daily else MenuSalesHourly
+    bucket = model.bucket_date if daily else model.bucket_start
+    delta_bucket = SalesRollupDelta.bucket_date if daily else SalesRollupDelta.bucket_start
+    return union_all(
+        select(bucket.label("bucket"), model.menu_id, model.quantity, model.revenue),
+        select(delta_bucket.label("bucket"), SalesRollupDelta.menu_id, SalesRollupDelta.quantity,
+               SalesRollupDelta.revenue).where(SalesRollupDelta.menu_id.is_not(None)),
+    ).subquery()
+
+
+def rollup_revenue_by_period_stmt(bounds, granularity: str, dialect_name: str, tz_name=None):
+    daily = granularity == "day" and not tz_name and bounds.whole_days
+    source = _sales_source(daily)
+    period = period_expr(source.c.bucket, granularity, dialect_name, tz_name, utc_naive=True).label("period")
+    return (
+        select(
+            period,
+            func.sum(source.c.orders).label("orders"),
+            func.sum(source.c.quantity).label("quantity"),
+            func.sum(source.c.revenue).label("revenue"),
+        )
+        .where(*bounds.criteria(source.c.bucket))
+        .group_by(period)
+        .having(func.sum(source.c.quantity) > 0)
+        .order_by(period)
+    )
+
+
+def rollup_menu_sales_stmt(bounds, sort: str = "revenue", limit=None):
+    if sort not in MENU_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(sorted(MENU_SORTS))}")
+    source = _menu_source(bounds.whole_days)
+    quantity = func.sum(source.c.quantity).label("quantity")
+    revenue = func.sum(source.c.revenue).label("revenue")
+    stmt = (
+        select(Menu.menu_id, Menu.menu_name, Menu.category_id, quantity, revenue)
+        .select_from(source)
+        .join(Menu, Menu.menu_id == source.c.menu_id)
+        .where(*bounds.criteria(source.c.bucket))
+        .group_by(Menu.menu_id, Menu.menu_name, Menu.category_id)
+        .having(func.sum(source.c.quantity) > 0)
+        .order_by(desc(revenue if sort == "revenue" else quantity), Menu.menu_id)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def rollup_category_sales_stmt(bounds):
+    source = _menu_source(bounds.whole_days)
+    revenue = func.sum(source.c.revenue).label("revenue")
+    return (
+        select(
+            Category.category_id,
+            Category.category_name,
+            func.sum(source.c.quantity).label("quantity"),
+            revenue,
+        )
+        .select_from(source)
+        .join(Menu, Menu.menu_id == source.c.menu_id)
+        .join(Category, Category.category_id == Menu.category_id)
+        .where(*bounds.criteria(source.c.bucket))
+        .group_by(Category.category_id, Category.category_name)
+        .having(func.sum(source.c.quantity) > 0)
+        .order_by(desc(revenue), Category.category_id)
+    )
+
+
+def rollup_basket_stmt(bounds):
+    source = _sales_source(bounds.whole_days)
+    orders = func.coalesce(func.sum(source.c.orders), 0)
+    per_order = func.nullif(orders, 0)
+    return select(
+        orders.label("orders"),
+        func.sum(source.c.quantity).label("quantity"),
+        func.sum(source.c.revenue).label("revenue"),
+        (func.sum(source.c.quantity) * literal_column("1.0") / per_order).label("avg_quantity"),
+        (func.sum(source.c.revenue) / per_order).label("avg_revenue"),
+    ).where(*bounds.criteria(source.c.bucket))
@@ -0,0 +1,65 @@
+"""Helpers for the bulk create/update endpoints (``POST``/``PUT /api/<resource>/bulk``).
+
+The request body is a JSON array of objects (or ``{"items": [...]}``). Every
+row is validated up front; foreign keys for all rows are checked with one IN
+query per model (ReferenceBatch), and the valid rows are written with a single
+executemany in one transaction. The response lists one result per input row::
+
+    {"created": 2, "failed": 1, "results": [
+        {"index": 0, "status": "created", "menu_id": 41},
+        {"index": 1, "status": "error", "error": "price must be a valid number"},
+        ...]}
+
+With ``?atomic=true`` any invalid row rejects the whole batch (400, nothing
+written).
+"""
+import os
+
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "1000"))
+
+_TRUE = ("1", "true", "yes", "on")
+
+
+def bulk_rows(data):
+    """The list of row objects in a bulk request body; raises ValueError when malformed."""
+    if isinstance(data, dict) and "items" in data:
+        data = data["items"]
+    if not isinstance(data, list) or not data:
+        raise ValueError("Request body must be a non-empty JSON array")
+    if len(data) > BULK_MAX_ROWS:
+        raise ValueError(f"At most {BULK_MAX_ROWS} rows per request")
+    return data
+
+
+def is_atomic(args) -> bool:
+    return str(args.get("atomic", "false")).strip().lower() in _TRUE
+
+
+class BulkResult:
+    """Per-row outcome of a bulk request, indexed like the input array."""
+
+    def __init__(self, size: int):
+        self._results = [None] * size
+
+    def fail(self, index: int, error: str):
+        self._results[index] = {"index": index, "status": "error", "error": error}
+
+    def ok(self, index: int, status: str, **fields):
+        self._results[index] = {"index": index, "status": status, **fields}
+
+    def failed(self, index: int) -> bool:
+        result = self._results[index]
+        return result is not None and result["status"] == "error"
+
+    @property
+    def error_count(self) -> int:
+        return sum(1 for r in self._results if r is not None and r["status"] == "error")
+
+    def response(self, status: str, atomic: bool):
+        """(body, http status); rows not reached in an aborted atomic batch are reported as skipped."""
+        errors = self.error_count
+        if atomic and errors:
+            results = [r if r is not None and r["status"] == "error" else
+                       {"index": i, "status": "skipped"} for i, r in enumerate(self._results)]
+            return {status: 0, "failed": errors, "results": results}, 400
+        return {status: len(self._results) - errors, "failed": errors, "results": self._results}, 200
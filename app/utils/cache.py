@@ -0,0 +1,118 @@
+"""In-process cache for catalog (menu/category) read responses.
+
+Entries hold the pre-serialized JSON body, its ETag and its compressed
+variants, so a hit (or a 304 for a client that already has it) costs neither
+a database query, serialization nor compression. The cache is versioned: every menu/category write
+calls ``catalog_cache.invalidate()``, which bumps the version and drops all
+entries. Entries also expire after CATALOG_CACHE_TTL seconds and the cache
+keeps at most CATALOG_CACHE_MAX_ENTRIES (least recently used evicted first).
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from app.utils.compression import CompressedVariants, apply_encoding, choose_encoding, etag_matches
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256"))
+
+
+class CatalogCache:
+    """Versioned TTL + LRU cache of serialized payloads."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._freshness_checks = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def add_freshness_check(self, check):
+        """Register a callable run before each read (e.g. cross-worker version polling)."""
+        self._freshness_checks.append(check)
+
+    def check_freshness(self):
+        for check in self._freshness_checks:
+            check()
+
+    def get(self, key):
+        self.check_freshness()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.version or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, payload, version: int):
+        """Store payload if no invalidation happened since `version` was read."""
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (version, time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+catalog_cache = CatalogCache(CATALOG_CACHE_TTL, CATALOG_CACHE_MAX_ENTRIES)
+
+
+def request_cache_key(name: str):
+    """Cache key for the current request: endpoint name plus all query parameters."""
+    return (name, tuple(sorted(request.args.items(multi=True))))
+
+
+def cached_json_response(key, build):
+    """Serve the cached JSON body for key, or build(), serialize and cache it.
+
+    Honours If-None-Match against the payload's strong ETag and serves the
+    cached gzip/brotli variant when the client accepts one.
+
+    build() returns JSON-serializable data; exceptions propagate and nothing is cached.
+    """
+    if not catalog_cache.enabled:
+        return current_app.json.response(build())
+
+    entry = catalog_cache.get(key)
+    status = "HIT"
+    if entry is None:
+        status = "MISS"
+        # Read the version before loading so a concurrent write can't leave stale data cached
+        version = catalog_cache.version
+        payload = current_app.json.response(build()).get_data()
+        # The strong ETag is the payload hash, computed once per cache fill
+        entry = CompressedVariants(payload, hashlib.sha1(payload).hexdigest())
+        catalog_cache.set(key, entry, version)
+    if etag_matches(entry.etag):
+        response = Response(status=304)
+        response.set_etag(entry.etag)
+    else:
+        response = Response(entry.payload, mimetype="application/json")
+        response.set_etag(entry.etag)
+        encoding = choose_encoding()
+        body = entry.encoded(encoding)
+        if body is not None:
+            apply_encoding(response, body, encoding)
+    response.headers["X-Cache"] = status
+    return response
@@ -0,0 +1,318 @@
+"""Streaming catalog import/export (CSV or NDJSON).
+
+One row per menu, with the category given by name::
+
+    category_name,menu_name,price,description,image_url
+    Drinks,Iced Tea,5.0,,
+    Drinks,,,,                 <- category without menus (menu_name empty)
+
+Import parses the input line by line and validates each row with the regular
+validators. Categories are resolved by name with one lookup of the active
+categories (missing ones are created), and menus are written in chunks of
+CATALOG_IMPORT_CHUNK rows: an active menu with the same (category, menu_name)
+is updated, otherwise a new one is inserted (one executemany per chunk each).
+Only the current chunk is held in memory. Invalid rows are skipped and
+reported, and the whole import is a single transaction.
+
+Export streams the active catalog with a server-side cursor in the same format.
+
+    python -m app.utils.catalog_io import catalog.csv
+    python -m app.utils.catalog_io export --format ndjson > catalog.ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import and_, insert, select, tuple_, update
+
+from app.models.category import Category
+from app.models.menu import Menu
+from app.utils.validators import validate_number, validate_string
+
+FORMATS = ("csv", "ndjson")
+FIELDS = ("category_name", "menu_name", "price", "description", "image_url")
+CATALOG_IMPORT_CHUNK = int(os.getenv("CATALOG_IMPORT_CHUNK", "1000"))
+MAX_REPORTED_ERRORS = 100
+
+logger = logging.getLogger("3awan.catalog_io")
+
+
+# Parsing ---------------------------------------------------------------------
+
+def parse_csv(lines):
+    """Yield (line_number, row dict) from CSV text lines with a header row."""
+    reader = csv.DictReader(lines)
+    missing = [name for name in ("category_name", "menu_name") if name not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV header must include: {', '.join(missing)}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def parse_ndjson(lines):
+    """Yield (line_number, row) from NDJSON lines; blank lines are skipped, bad JSON is passed on as an error."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, ValueError("invalid JSON")
+
+
+def parse(lines, fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    return parse_csv(lines) if fmt == "csv" else parse_ndjson(lines)
+
+
+def _given(row):
+    # CSV has no null: empty cells (and nulls) mean "not given"
+    return {
+        k: v for k, v in row.items()
+        if k is not None and v is not None and not (isinstance(v, str) and not v.strip())
+    }
+
+
+def validate_row(row):
+    """Normalized {category_name, menu_name, price, description, image_url}; raises ValueError."""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    row = _given(row)
+    category_name = validate_string(row, "category_name", max_length=100)
+    if not category_name:
+        raise ValueError("category_name is required")
+    values = {"category_name": category_name.strip(), "menu_name": None}
+    menu_name = validate_string(row, "menu_name", required=False, max_length=100)
+    if menu_name:
+        values.update(
+            menu_name=menu_name.strip(),
+            price=validate_number(row, "price", min_value=0),
+            description=validate_string(row, "description", required=False),
+            image_url=validate_string(row, "image_url", required=False, max_length=255),
+        )
+    return values
+
+
+# Import ----------------------------------------------------------------------
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    categories_created: int = 0
+    menus_created: int = 0
+    menus_updated: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "categories_created": self.categories_created,
+            "menus_created": self.menus_created,
+            "menus_updated": self.menus_updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+        }
+
+
+class CatalogImporter:
+    """Loads validated rows chunk by chunk into one open session/transaction (caller commits)."""
+
+    def __init__(self, db, chunk_size: int = CATALOG_IMPORT_CHUNK):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.stats = ImportStats()
+        # The one category lookup: every active category by name
+        self.category_ids = {}
+        for category_id, name in db.execute(
+            select(Category.category_id, Category.category_name)
+            .where(Category.deleted_at.is_(None))
+            .order_by(Category.category_id)
+        ):
+            # Duplicate names resolve to the oldest category
+            self.category_ids.setdefault(name, category_id)
+
+    def run(self, parsed_rows):
+        started = time.perf_counter()
+        chunk = []
+        for line_number, raw in parsed_rows:
+            self.stats.rows += 1
+            try:
+                chunk.append((line_number, validate_row(raw)))
+            except ValueError as e:
+                self.stats.error(line_number, str(e))
+            if len(chunk) >= self.chunk_size:
+                self._load(chunk)
+                chunk = []
+        if chunk:
+            self._load(chunk)
+        self.stats.seconds = time.perf_counter() - started
+        return self.stats
+
+    def _ensure_categories(self, names):
+        new = sorted(name for name in names if name not in self.category_ids)
+        if not new:
+            return
+        ids = self.db.scalars(
+            insert(Category).returning(Category.category_id, sort_by_parameter_order=True),
+            [{"category_name": name} for name in new],
+        ).all()
+        self.category_ids.update(zip(new, ids))
+        self.stats.categories_created += len(new)
+
+    def _load(self, chunk):
+        self._ensure_categories({values["category_name"] for _, values in chunk})
+        # Last row wins when a chunk repeats the same menu
+        menus = {}
+        for _, values in chunk:
+            if values["menu_name"] is None:
+                continue
+            category_id = self.category_ids[values["category_name"]]
+            menus[(category_id, values["menu_name"])] = {
+                "category_id": category_id,
+                "menu_name": values["menu_name"],
+                "price": values["price"],
+                "description": values["description"],
+                "image_url": values["image_url"],
+            }
+        if not menus:
+            return
+        existing = {
+            (category_id, menu_name): menu_id
+            for menu_id, category_id, menu_name in self.db.execute(
+                select(Menu.menu_id, Menu.category_id, Menu.menu_name).where(
+                    tuple_(Menu.category_id, Menu.menu_name).in_(list(menus)),
+                    Menu.deleted_at.is_(None),
+                )
+            )
+        }
+        creates = [values for key, values in menus.items() if key not in existing]
+        updates = [{**values, "menu_id": existing[key]} for key, values in menus.items() if key in existing]
+        if creates:
+            self.db.execute(insert(Menu), creates)
+            self.stats.menus_created += len(creates)
+        if updates:
+            self.db.execute(update(Menu), updates)
+            self.stats.menus_updated += len(updates)
+
+
+def import_catalog(db, lines, fmt: str, chunk_size: int = CATALOG_IMPORT_CHUNK) -> ImportStats:
+    """Parse and load lines into db's transaction (not committed); raises ValueError on a bad header/format."""
+    stats = CatalogImporter(db, chunk_size).run(parse(lines, fmt))
+    logger.info(
+        "Imported catalog",
+        extra={"rows": stats.rows, "failed": stats.failed, "rows_per_sec": round(stats.rows_per_sec, 1)},
+    )
+    return stats
+
+
+# Export ----------------------------------------------------------------------
+
+def export_query(db, batch_size: int = CATALOG_IMPORT_CHUNK):
+    """Active categories with their active menus (one row per menu, menu columns NULL for empty categories)."""
+    return db.execute(
+        select(Category.category_name, Menu.menu_name, Menu.price, Menu.description, Menu.image_url)
+        .select_from(Category)
+        .outerjoin(Menu, and_(Menu.category_id == Category.category_id, Menu.deleted_at.is_(None)))
+        .where(Category.deleted_at.is_(None))
+        .order_by(Category.category_id, Menu.menu_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def iter_export(rows, fmt: str, batch_size: int = CATALOG_IMPORT_CHUNK):
+    """Yield text chunks of batch_size rows in fmt; logs throughput when done."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    started = time.perf_counter()
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(FIELDS)
+    for row in rows:
+        count += 1
+        if writer is not None:
+            writer.writerow(["" if v is None else v for v in row])
+        else:
+            buffer.write(json.dumps(dict(zip(FIELDS, row)), separators=(",", ":")) + "\n")
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+    seconds = time.perf_counter() - started
+    logger.info("Exported catalog", extra={"rows": count, "rows_per_sec": round(count / seconds, 1) if seconds else 0})
+
+
+# CLI ---------------------------------------------------------------------------
+
+def _format_for(path, fmt):
+    if fmt:
+        return fmt
+    return "ndjson" if path and path.endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.utils.catalog_io", description="Catalog import/export")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="load a CSV/NDJSON catalog file ('-' for stdin)")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--chunk-size", type=int, default=CATALOG_IMPORT_CHUNK)
+    import_parser.add_argument("--dry-run", action="store_true", help="validate and load, then roll back")
+    export_parser = commands.add_parser("export", help="write the active catalog to stdout")
+    export_parser.add_argument("--format", choices=FORMATS, default="csv")
+    args = parser.parse_args(argv)
+
+    from app.config.database import SessionLocal
+    from app.models import catalog_version, order, order_item  # noqa: F401  (mapper configuration)
+    from app.utils.catalog_sync import publish_catalog_change
+    from app.utils.request_logging import configure_logging
+
+    configure_logging()
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            for text in iter_export(export_query(db), args.format):
+                sys.stdout.write(text)
+            return 0
+        fmt = _format_for(args.path, args.format)
+        source = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+        with source:
+            stats = import_catalog(db, source, fmt, args.chunk_size)
+        if args.dry_run:
+            db.rollback()
+        else:
+            publish_catalog_change(db)
+            db.commit()
+        print(json.dumps(stats.as_dict(), indent=2))
+        return 1 if stats.failed else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Cross-worker coherence for the in-process catalog cache.
+
+Every menu/category write calls ``publish_catalog_change(db)`` inside its
+transaction. That bumps the single row in ``catalog_version`` and, on
+PostgreSQL, issues ``NOTIFY catalog_changed`` (delivered only on commit).
+
+Each worker keeps its cache coherent in one of two ways:
+- PostgreSQL: a daemon thread LISTENs on the channel and invalidates the
+  cache as soon as a notification arrives.
+- Otherwise (or while the listener is disconnected): the version row is
+  polled at most every CATALOG_SYNC_INTERVAL seconds, on cache reads.
+
+Either way a stale entry survives at most about CATALOG_SYNC_INTERVAL seconds.
+"""
+import datetime
+import logging
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import select as sa_select, text, update
+
+from app.config.database import engine
+from app.models.catalog_version import CatalogVersion
+from app.utils.cache import catalog_cache
+from app.utils.greenlet_wsgi import run_blocking
+
+CATALOG_CHANNEL = "catalog_changed"
+CATALOG_SYNC_INTERVAL = float(os.getenv("CATALOG_SYNC_INTERVAL", "2"))
+CATALOG_SYNC_ENABLED = os.getenv("CATALOG_SYNC", "true").strip().lower() not in ("0", "false", "no", "off")
+
+CATALOG_VERSION_QUERY = sa_select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+logger = logging.getLogger("3awan.catalog_sync")
+
+
+def publish_catalog_change(db):
+    """Record a catalog change in the current transaction (call before commit).
+
+    The row is seeded by migration 0004, so this is a single UPDATE: concurrent
+    writers serialize on its row lock instead of racing to insert it. The bump
+    also feeds the catalog ETag validators, so it runs even with CATALOG_SYNC off.
+    """
+    db.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == 1)
+        .values(version=CatalogVersion.version + 1, updated_at=datetime.datetime.utcnow())
+    )
+    if CATALOG_SYNC_ENABLED and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": CATALOG_CHANNEL})
+
+
+def _read_version():
+    with engine.connect() as conn:
+        return conn.execute(CATALOG_VERSION_QUERY).scalar()
+
+
+class CatalogSync:
+    """Per-process watcher that invalidates catalog_cache when another worker writes."""
+
+    def __init__(self, cache, interval: float):
+        self.cache = cache
+        self.interval = interval
+        self.listening = False
+        self._seen_version = None
+        self._next_poll = 0.0
+        self._started_pid = None
+        self._lock = threading.Lock()
+
+    def poll_due(self) -> bool:
+        """True (claiming the slot) when the version row should be polled now."""
+        if not CATALOG_SYNC_ENABLED:
+            return False
+        self._ensure_listener()
+        now = time.monotonic()
+        if self.listening or now < self._next_poll:
+            return False
+        with self._lock:
+            if now < self._next_poll:
+                return False
+            self._next_poll = now + self.interval
+        return True
+
+    def observe(self, version):
+        """Invalidate the cache if version (the polled catalog_version) moved since the last poll."""
+        if version != self._seen_version:
+            if self._seen_version is not None:
+                self.cache.invalidate()
+            self._seen_version = version
+
+    def check(self):
+        """Called before every cache read; cheap unless a poll is due."""
+        if not self.poll_due():
+            return
+        try:
+            # On the sync engine, off the event loop under asgi.py: the request may already
+            # hold the async pool's only connection (SQLite), so a second one would never come
+            version = run_blocking(_read_version)
+        except Exception:
+            logger.exception("Failed to poll catalog version")
+            return
+        self.observe(version)
+
+    def _ensure_listener(self):
+        # Started lazily so each gunicorn worker gets its own thread after fork
+        if self._started_pid == os.getpid() or engine.dialect.name != "postgresql":
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self.listening = False
+        thread = threading.Thread(target=self._listen_forever, name="catalog-sync", daemon=True)
+        thread.start()
+
+    def _listen_forever(self):
+        while True:
+            raw = None
+            try:
+                raw = engine.raw_connection()
+                # Dedicated connection: never returned to the pool
+                raw.detach()
+                conn = raw.driver_connection
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CATALOG_CHANNEL}")
+                # Anything written before LISTEN took effect must not be missed
+                self.cache.invalidate()
+                self.listening = True
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        self.cache.invalidate()
+            except Exception:
+                logger.exception("Catalog LISTEN connection lost; falling back to polling")
+            finally:
+                self.listening = False
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+            time.sleep(self.interval)
+
+
+catalog_sync = CatalogSync(catalog_cache, CATALOG_SYNC_INTERVAL)
+catalog_cache.add_freshness_check(catalog_sync.check)
@@ -0,0 +1,179 @@
+"""gzip/brotli response compression negotiated through Accept-Encoding.
+
+``compress_response`` runs as an ``after_request`` hook on JSON/NDJSON
+responses:
+- buffered bodies smaller than COMPRESS_MIN_SIZE bytes are sent as-is
+- streamed (NDJSON) bodies are compressed chunk by chunk as they are produced
+- strong ETags get an ``-<encoding>`` suffix, since the encoded bytes differ
+
+Brotli is used when the ``brotli`` package is installed and the client prefers
+it (or rates it equal to gzip). Cached catalog responses keep their encoded
+variants next to the payload (see ``CompressedVariants``), so a menu list is
+compressed once per cache fill rather than once per request.
+"""
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESS_ENABLED = os.getenv("COMPRESS", "true").strip().lower() not in ("0", "false", "no", "off")
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_LEVEL = int(os.getenv("COMPRESS_BROTLI_LEVEL", "5"))
+COMPRESS_MIMETYPES = frozenset(("application/json", "application/x-ndjson"))
+
+
+def available_encodings():
+    """Supported content codings, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding():
+    """Best coding the client accepts for the current request, or None for identity."""
+    if not COMPRESS_ENABLED:
+        return None
+    accept = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_LEVEL)
+    # mtime=0 keeps the output (and anything derived from it) deterministic
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    return f"{etag}-{encoding}"
+
+
+def etag_matches(etag: str) -> bool:
+    """True when If-None-Match names etag or one of its encoded variants."""
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    if if_none_match.contains(etag):
+        return True
+    return any(if_none_match.contains(encoded_etag(etag, e)) for e in available_encodings())
+
+
+class CompressedVariants:
+    """A payload plus its lazily computed encoded forms (None when not worth sending)."""
+
+    __slots__ = ("payload", "etag", "_encoded")
+
+    def __init__(self, payload: bytes, etag: str):
+        self.payload = payload
+        self.etag = etag
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        if encoding is None or len(self.payload) < COMPRESS_MIN_SIZE:
+            return None
+        if encoding not in self._encoded:
+            body = compress(self.payload, encoding)
+            # Concurrent fills compute the same bytes; last write wins harmlessly
+            self._encoded[encoding] = body if len(body) < len(self.payload) else None
+        return self._encoded[encoding]
+
+
+def apply_encoding(response, body: bytes, encoding: str):
+    """Replace response's body with already-encoded bytes and set the matching headers."""
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(encoded_etag(etag, encoding))
+    return response
+
+
+class _StreamCompressor:
+    def __init__(self, encoding):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESS_BROTLI_LEVEL)
+            self._flush = self._compressor.flush
+            self._finish = self._compressor.finish
+            self.compress = self._compressor.process
+        else:
+            self._compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+            self.compress = self._compressor.compress
+
+    def flush(self):
+        return self._flush()
+
+    def finish(self):
+        return self._finish()
+
+
+def _compress_stream(chunks, encoding):
+    compressor = _StreamCompressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            # Flush per chunk so clients can parse rows as they arrive
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    """after_request hook: compress JSON/NDJSON bodies the client can decode."""
+    if not COMPRESS_ENABLED:
+        return response
+    if response.status_code == 304:
+        # Echo the variant the client holds so its cache entry stays matched
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.vary.add("Accept-Encoding")
+            for encoding in available_encodings():
+                if request.if_none_match.contains(encoded_etag(etag, encoding)):
+                    response.set_etag(encoded_etag(etag, encoding))
+                    break
+        return response
+    if response.mimetype not in COMPRESS_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+    if (response.status_code < 200 or response.status_code == 204
+            or "Content-Encoding" in response.headers or request.method == "HEAD"):
+        return response
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
+
+    if response.direct_passthrough:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    body = compress(data, encoding)
+    if len(body) >= len(data):
+        return response
+    return apply_encoding(response, body, encoding)
@@ -0,0 +1,95 @@
+"""Conditional GET support (ETag / If-None-Match, Last-Modified / If-Modified-Since).
+
+Validators are computed without serializing the response body:
+- cached catalog lists hash the already-cached payload (see app.utils.cache)
+- detail routes and order/order item pages run one query over the timestamps
+  of the rows the payload is built from (the target row or the page's keyset
+  window plus what it embeds, see app.utils.queries) and hash the result
+  together with the request path, query string and Accept header.
+"""
+import hashlib
+import logging
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request
+
+from app.config.database import SessionLocal
+from app.utils.compression import etag_matches
+
+logger = logging.getLogger("3awan.conditional")
+
+
+def make_etag(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def is_not_modified(etag: str, last_modified=None) -> bool:
+    """True when the client's cached copy matches (If-None-Match wins over If-Modified-Since)."""
+    if request.if_none_match:
+        return etag_matches(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def not_modified_response(etag: str, last_modified=None) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def read_validator(db, stmt):
+    """Run the validator SELECT; return (rows in a stable order, last_modified)."""
+    rows = sorted((tuple(row) for row in db.execute(stmt)), key=repr)
+    timestamps = [_as_utc(v) for row in rows for v in row if isinstance(v, datetime)]
+    last_modified = max(timestamps) if timestamps else None
+    return rows, last_modified
+
+
+def conditional_get(build_validator):
+    """Route decorator adding strong ETag/Last-Modified and 304 handling.
+
+    build_validator(**view_kwargs) returns a validator SELECT (see the
+    app.utils.queries *_validator functions), or None to skip. The view is
+    called with ``db``, the session the validator ran in, so a conditional
+    GET checks out one pooled connection.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            db = SessionLocal()
+            try:
+                stmt = build_validator(**kwargs)
+                if stmt is None:
+                    return view(*args, db=db, **kwargs)
+                try:
+                    rows, last_modified = read_validator(db, stmt)
+                except Exception:
+                    db.rollback()
+                    logger.exception("Failed to compute response validator")
+                    return view(*args, db=db, **kwargs)
+                etag = make_etag(request.path, sorted(request.args.items(multi=True)),
+                                 str(request.accept_mimetypes), rows)
+                if is_not_modified(etag, last_modified):
+                    return not_modified_response(etag, last_modified)
+                response = make_response(view(*args, db=db, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    response.set_etag(etag)
+                    if last_modified is not None:
+                        response.last_modified = last_modified
+                return response
+            finally:
+                db.close()
+        return wrapper
+    return decorator
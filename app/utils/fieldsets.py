@@ -0,0 +1,110 @@
+"""Sparse fieldsets (``?fields=``) and expansion control (``?expand=``).
+
+- fields: comma-separated columns to emit; dotted paths select columns of
+  embedded relations (``order_items.quantity,order_items.menu.menu_name``).
+  Naming a relation (``order_items``) embeds it with all its columns.
+- expand: comma-separated (dotted) relations to embed, e.g. ``order_items.menu``.
+
+Without either parameter responses keep their full legacy shape. Once one is
+given, only the relations named in ``expand`` or ``fields`` are embedded, so
+``/api/menus?expand=`` returns menus without their category.
+
+The parsed ``Shape`` drives both the query (``load_only`` columns, eager loads
+only for embedded relations; see app.utils.queries) and the compiled
+serializers, so unused columns and joins are never fetched.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import inspect as sa_inspect
+
+# Relations each resource may embed (the ones the default responses embed)
+EXPANDABLE = {
+    "orders": ("order_items",),
+    "order_items": ("menu",),
+    "menus": ("category",),
+    "categories": (),
+}
+
+
+@dataclass(frozen=True)
+class Shape:
+    """Columns to emit for model (None = all) plus embedded relations as (name, Shape)."""
+
+    model: type
+    fields: Optional[tuple] = None
+    expand: tuple = ()
+
+    def load_columns(self, extra=()):
+        """Column names to SELECT: emitted fields plus keys needed for relations/sorting."""
+        names = set(self.fields or ())
+        names.update(extra)
+        mapper = sa_inspect(self.model)
+        names.update(c.key for c in mapper.primary_key)
+        for name, _ in self.expand:
+            names.update(c.key for c in mapper.relationships[name].local_columns)
+        return tuple(c.name for c in self.model.__table__.columns if c.name in names)
+
+
+def _resource(model):
+    return model.__tablename__
+
+
+def _new_node():
+    return {"fields": None, "expand": {}}
+
+
+def _child(node, model, name, path):
+    if name not in EXPANDABLE.get(_resource(model), ()):
+        raise ValueError(f"Cannot expand '{path}' on {_resource(model)}")
+    related = sa_inspect(model).relationships[name].mapper.class_
+    return node["expand"].setdefault(name, _new_node()), related
+
+
+def _split(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _build(model, node):
+    fields = None
+    if node["fields"] is not None:
+        fields = tuple(c.name for c in model.__table__.columns if c.name in node["fields"])
+    expand = []
+    for name in EXPANDABLE.get(_resource(model), ()):
+        if name in node["expand"]:
+            related = sa_inspect(model).relationships[name].mapper.class_
+            expand.append((name, _build(related, node["expand"][name])))
+    return Shape(model, fields, tuple(expand))
+
+
+def parse_shape(model, args) -> Optional[Shape]:
+    """Shape requested by ?fields=/?expand=, or None for the default response shape.
+
+    Raises ValueError for unknown fields or relations that cannot be embedded.
+    """
+    fields_arg = args.get("fields")
+    expand_arg = args.get("expand")
+    if fields_arg is None and expand_arg is None:
+        return None
+
+    root = _new_node()
+    for path in _split(expand_arg or ""):
+        node, current = root, model
+        for name in path.split("."):
+            node, current = _child(node, current, name, path)
+
+    for path in _split(fields_arg or ""):
+        *relations, leaf = path.split(".")
+        node, current = root, model
+        for name in relations:
+            node, current = _child(node, current, name, path)
+        if leaf in current.__table__.columns:
+            if node["fields"] is None:
+                node["fields"] = set()
+            node["fields"].add(leaf)
+        elif leaf in sa_inspect(current).relationships:
+            _child(node, current, leaf, path)
+        else:
+            raise ValueError(f"Unknown field '{path}' for {_resource(model)}")
+
+    return _build(model, root)
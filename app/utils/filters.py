@@ -0,0 +1,116 @@
+"""Query-parameter filters for the order list and report endpoints.
+
+- from / to:     order_date range; ISO date or datetime. A date-only ``to``
+                 includes that whole day.
+- customer_name: case-insensitive prefix match
+- menu_id:       orders containing at least one active item for that menu
+
+Every filter maps onto an index declared on the models (order_date,
+lower(customer_name), order_items.menu_id partial index).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, exists, func
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+
+
+def _parse_datetime(value: str, name: str):
+    """Return (datetime, date_only) for an ISO date/datetime query parameter."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date or datetime")
+    return parsed, len(value) == len(date.min.isoformat())
+
+
+def _like_prefix(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.lower() + "%"
+
+
+def date_range(column, args):
+    """Criteria for ?from=/?to= on column; raises ValueError on bad input."""
+    criteria = []
+    date_from = args.get("from")
+    date_to = args.get("to")
+    if date_from:
+        start, _ = _parse_datetime(date_from, "from")
+        criteria.append(column >= start)
+    if date_to:
+        end, date_only = _parse_datetime(date_to, "to")
+        if date_only:
+            # A bare date as upper bound means "up to the end of that day"
+            criteria.append(column < end + timedelta(days=1))
+        else:
+            criteria.append(column <= end)
+    return criteria
+
+
+@dataclass(frozen=True)
+class BucketBounds:
+    """Half-open UTC range [start, end) made of whole rollup buckets (None = unbounded)."""
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+    @property
+    def whole_days(self) -> bool:
+        return all(b is None or b.hour == 0 for b in (self.start, self.end))
+
+    def criteria(self, column):
+        """Bounds on a rollup bucket column (DateTime bucket_start or Date bucket_date)."""
+        as_date = getattr(column.type, "python_type", None) is date
+        criteria = []
+        if self.start is not None:
+            criteria.append(column >= (self.start.date() if as_date else self.start))
+        if self.end is not None:
+            criteria.append(column < (self.end.date() if as_date else self.end))
+        return criteria
+
+
+def bucket_bounds(args) -> Optional[BucketBounds]:
+    """?from=/?to= as whole UTC hours, or None when the range splits an hour.
+
+    ``from`` must fall on an hour; ``to`` must be a bare date (a datetime ``to``
+    is inclusive, so it always ends mid-bucket). Raises ValueError on bad input.
+    """
+    start = end = None
+    date_from = args.get("from")
+    date_to = args.get("to")
+    if date_from:
+        start, _ = _parse_datetime(date_from, "from")
+        if start.tzinfo is not None:
+            start = start.astimezone(timezone.utc).replace(tzinfo=None)
+        if (start.minute, start.second, start.microsecond) != (0, 0, 0):
+            return None
+    if date_to:
+        end, date_only = _parse_datetime(date_to, "to")
+        if not date_only:
+            return None
+        end += timedelta(days=1)
+    return BucketBounds(start, end)
+
+
+def order_filters(args):
+    """SQL criteria for the order filter parameters in args; raises ValueError on bad input."""
+    criteria = date_range(Order.order_date, args)
+
+    customer_name = args.get("customer_name")
+    if customer_name:
+        criteria.append(func.lower(Order.customer_name).like(_like_prefix(customer_name), escape="\\"))
+
+    menu_id = args.get("menu_id")
+    if menu_id is not None:
+        try:
+            menu_id = int(menu_id)
+        except ValueError:
+            raise ValueError("menu_id must be a valid number")
+        criteria.append(exists().where(and_(
+            OrderItem.order_id == Order.order_id,
+            OrderItem.menu_id == menu_id,
+            OrderItem.deleted_at.is_(None),
+        )))
+    return criteria
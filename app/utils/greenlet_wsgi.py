@@ -0,0 +1,167 @@
+"""Serve a WSGI app over ASGI on SQLAlchemy's asyncio greenlet bridge.
+
+Each request runs the whole WSGI call (hooks, view, response body iteration)
+inside ``greenlet_spawn``. Sessions bound to an async engine's ``sync_engine``
+then await the asyncio driver (asyncpg, aiosqlite) at every statement instead
+of blocking, so the unchanged sync views serve many requests on one event-loop
+thread. Reading the request body and sending the response await the ASGI
+channel the same way.
+
+Anything else that blocks (file or socket I/O outside the engine) would stall
+the loop; run it through ``run_blocking()``. Don't hold a threading lock across
+a statement: another request on the same thread would block on it.
+"""
+import asyncio
+import io
+import logging
+import sys
+
+from sqlalchemy.util import await_only, greenlet_spawn
+from sqlalchemy.util.concurrency import have_greenlet, in_greenlet
+
+logger = logging.getLogger("3awan.asgi")
+
+
+def run_blocking(fn, *args):
+    """fn(*args); inside a greenlet-served request it runs in the loop's default executor."""
+    if not (have_greenlet and in_greenlet()):
+        return fn(*args)
+    return await_only(asyncio.get_running_loop().run_in_executor(None, fn, *args))
+
+
+class _RequestBody(io.RawIOBase):
+    """wsgi.input reading the ASGI ``http.request`` messages on demand."""
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._buffer = bytearray()
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and self._more:
+            message = await_only(self._receive())
+            if message["type"] == "http.disconnect":
+                raise OSError("Client disconnected before sending the request body")
+            self._buffer += message.get("body", b"")
+            self._more = message.get("more_body", False)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        del self._buffer[:size]
+        return size
+
+
+class _Response:
+    """start_response plus the ASGI sends for one request."""
+
+    def __init__(self, send):
+        self._send = send
+        self.started = False
+        self._status = None
+        self._headers = None
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info is not None and self.started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self._status = int(status.split(" ", 1)[0])
+        self._headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        return self.write
+
+    def _start(self):
+        if not self.started:
+            self.started = True
+            await_only(self._send({"type": "http.response.start", "status": self._status, "headers": self._headers}))
+
+    def write(self, data):
+        self._start()
+        if data:
+            await_only(self._send({"type": "http.response.body", "body": bytes(data), "more_body": True}))
+
+    def finish(self):
+        self._start()
+        await_only(self._send({"type": "http.response.body", "body": b"", "more_body": False}))
+
+
+def _environ(scope, body):
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = scope["client"][0], str(scope["client"][1])
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class GreenletWSGIMiddleware:
+    """ASGI app running wsgi_app per request in a SQLAlchemy greenlet.
+
+    on_shutdown: coroutine functions awaited on ASGI lifespan shutdown.
+    """
+
+    def __init__(self, wsgi_app, on_shutdown=()):
+        self.wsgi_app = wsgi_app
+        self.on_shutdown = list(on_shutdown)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await greenlet_spawn(self._handle, scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for callback in self.on_shutdown:
+                    await callback()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _handle(self, scope, receive, send):
+        response = _Response(send)
+        try:
+            result = self.wsgi_app(_environ(scope, _RequestBody(receive)), response.start_response)
+            try:
+                for chunk in result:
+                    response.write(chunk)
+                response.finish()
+            finally:
+                close = getattr(result, "close", None)
+                if close is not None:
+                    close()
+        except Exception:
+            if response.started:
+                raise
+            logger.exception("Unhandled exception in WSGI app")
+            response.start_response("500 Internal Server Error", [("Content-Type", "text/plain; charset=utf-8")])
+            response.write(b"Internal Server Error")
+            response.finish()
@@ -0,0 +1,312 @@
+"""Prometheus text-format metrics, aggregated across gunicorn workers.
+
+Each worker keeps its counters/histograms in memory and writes a snapshot to
+``METRICS_DIR/<pid>.json`` at most every METRICS_FLUSH_INTERVAL seconds (and
+at exit). ``GET /metrics`` flushes the serving worker, then merges every
+snapshot: counters and histograms are summed over all workers (including ones
+that have exited), gauges are reported per live worker with a ``pid`` label.
+
+Collected per route (``endpoint`` is the URL rule, e.g. ``/api/menus/<int:menu_id>``):
+- http_requests_total, http_request_duration_seconds, http_response_size_bytes
+- db_statements_per_request, db_time_per_request_seconds, db_statements_total
+
+plus connection pool gauges and catalog cache / price index counters.
+
+METRICS_DIR must be private to one deployment; by default it is a temp
+directory named after the parent (gunicorn master) pid, so a restart starts
+from zero. Set PROMETHEUS_MULTIPROC_DIR/METRICS_DIR to pin it (and clear it on
+deploy).
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+
+from app.config.database import get_pool_stats
+from app.utils.cache import catalog_cache
+from app.utils.greenlet_wsgi import run_blocking
+from app.utils.profiler import request_query_stats
+
+METRICS_ENABLED = os.getenv("METRICS", "true").strip().lower() not in ("0", "false", "no", "off")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by route, method and status.", None),
+    "http_request_duration_seconds": ("histogram", "Time spent handling the request (until the response "
+                                                   "is returned; streamed bodies excluded).", LATENCY_BUCKETS),
+    "http_response_size_bytes": ("histogram", "Response body size as sent (after compression); "
+                                              "streamed responses are not observed.", SIZE_BUCKETS),
+    "db_statements_total": ("counter", "SQL statements executed while handling requests.", None),
+    "db_statements_per_request": ("histogram", "SQL statements per request.", STATEMENT_BUCKETS),
+    "db_time_per_request_seconds": ("histogram", "Total SQL execution time per request.", LATENCY_BUCKETS),
+    "catalog_cache_hits_total": ("counter", "Catalog response cache hits.", None),
+    "catalog_cache_misses_total": ("counter", "Catalog response cache misses.", None),
+    "catalog_cache_hit_ratio": ("gauge", "Catalog cache hits / lookups over all workers since start.", None),
+    "price_index_loads_total": ("counter", "Menu price index loads (one IN query for ids it did not hold).", None),
+    "db_pool_checkouts_total": ("counter", "Connections checked out of the pool.", None),
+    "db_pool_wait_seconds_total": ("counter", "Time spent waiting for a pooled connection.", None),
+    "db_pool_size": ("gauge", "Configured pool size.", None),
+    "db_pool_checked_out": ("gauge", "Connections currently in use.", None),
+    "db_pool_overflow": ("gauge", "Connections currently open above the pool size.", None),
+    "db_pool_wait_seconds_max": ("gauge", "Longest pool checkout wait.", None),
+}
+
+logger = logging.getLogger("3awan.metrics")
+
+
+def metrics_dir():
+    path = os.getenv("METRICS_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), f"3awan-metrics-{os.getppid()}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class Registry:
+    """In-process metric values; snapshot() is what gets written for this worker."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def snapshot(self, gauges=(), counters=()):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": [[n, list(l), v] for (n, l), v in self._counters.items()] + list(counters),
+                "histograms": [[n, list(l), list(h[0]), h[1], h[2]] for (n, l), h in self._histograms.items()],
+                "gauges": list(gauges),
+            }
+
+
+registry = Registry()
+
+
+# Process-level values sampled at flush time ----------------------------------------
+
+def _process_values():
+    from app.utils.price_index import price_index
+
+    pool = get_pool_stats()
+    counters = [
+        ["catalog_cache_hits_total", [], catalog_cache.hits],
+        ["catalog_cache_misses_total", [], catalog_cache.misses],
+        ["price_index_loads_total", [], price_index.loads],
+        ["db_pool_checkouts_total", [], pool.get("checkouts", 0)],
+        ["db_pool_wait_seconds_total", [], pool.get("wait_seconds_total", 0.0)],
+    ]
+    gauges = [
+        [name, [], pool[key]]
+        for name, key in (
+            ("db_pool_size", "size"), ("db_pool_checked_out", "checked_out"),
+            ("db_pool_overflow", "overflow"), ("db_pool_wait_seconds_max", "wait_seconds_max"),
+        )
+        if key in pool
+    ]
+    # Registered extra pools (e.g. the ASGI async engine) get a ``pool`` label
+    gauges += [
+        [name, [["pool", pool_name]], stats[key]]
+        for pool_name, stats in pool.items() if isinstance(stats, dict)
+        for name, key in (("db_pool_size", "size"), ("db_pool_checked_out", "checked_out"),
+                          ("db_pool_overflow", "overflow"))
+        if key in stats
+    ]
+    return gauges, counters
+
+
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def flush(force=False):
+    """Write this worker's snapshot (atomically) if the flush interval elapsed."""
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < METRICS_FLUSH_INTERVAL:
+        return
+    with _flush_lock:
+        _last_flush = now
+        try:
+            directory = metrics_dir()
+            gauges, counters = _process_values()
+            path = os.path.join(directory, f"{os.getpid()}.json")
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(registry.snapshot(gauges, counters), f)
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.exception("Failed to write metrics snapshot")
+
+
+def flush_due() -> bool:
+    """True when the next flush() would write a snapshot."""
+    return time.monotonic() - _last_flush >= METRICS_FLUSH_INTERVAL
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _snapshots():
+    directory = metrics_dir()
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                yield json.load(f)
+        except (OSError, ValueError):
+            # Partially written or removed between listdir and open
+            continue
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Merge all worker snapshots into Prometheus text exposition format."""
+    counters, histograms, gauges = {}, {}, {}
+    for snapshot in _snapshots():
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            entry = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+            entry[1] += total
+            entry[2] += count
+        if _alive(snapshot["pid"]):
+            for name, labels, value in snapshot["gauges"]:
+                gauges[(name, tuple(map(tuple, labels)) + (("pid", snapshot["pid"]),))] = value
+
+    hits = counters.get(("catalog_cache_hits_total", ()), 0)
+    lookups = hits + counters.get(("catalog_cache_misses_total", ()), 0)
+    gauges[("catalog_cache_hit_ratio", ())] = hits / lookups if lookups else 0.0
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        values = counters if kind == "counter" else histograms if kind == "histogram" else gauges
+        keys = sorted(k for k in values if k[0] == name)
+        if not keys:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in keys:
+            labels = key[1]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(values[key])}")
+                continue
+            counts, total, count = values[key]
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+# Flask wiring ----------------------------------------------------------------------
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+
+
+def record_request(method, endpoint, status, duration, size=None, statements=None, db_seconds=None):
+    """Observe one finished request (size/statements None = not known, not observed)."""
+    labels = {"method": method, "endpoint": endpoint}
+    registry.inc("http_requests_total", {**labels, "status": str(status)})
+    registry.observe("http_request_duration_seconds", labels, duration)
+    if size is not None:
+        registry.observe("http_response_size_bytes", labels, size)
+    if statements is not None:
+        registry.inc("db_statements_total", labels, statements)
+        registry.observe("db_statements_per_request", labels, statements)
+        registry.observe("db_time_per_request_seconds", labels, db_seconds or 0.0)
+
+
+def _end_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    db_stats = request_query_stats()
+    statements, db_seconds = (db_stats.count, db_stats.seconds) if db_stats else (0, 0.0)
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    if endpoint == "/metrics":
+        return response
+    record_request(
+        request.method, endpoint, response.status_code, time.perf_counter() - start,
+        None if response.is_streamed else response.calculate_content_length() or 0,
+        statements, db_seconds,
+    )
+    if flush_due():
+        # Off the event loop when served by asgi.py (inline under WSGI)
+        run_blocking(flush)
+    return response
+
+
+def metrics_endpoint():
+    flush(force=True)
+    return Response(render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def init_metrics(app):
+    """Register the request hooks and GET /metrics (no-op when METRICS=false).
+
+    Call before registering other after_request hooks (e.g. compression): Flask
+    runs after_request hooks in reverse order, so this one then sees the final body.
+    """
+    if not METRICS_ENABLED:
+        return
+    app.before_request(_start_request)
+    app.after_request(_end_request)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
+    atexit.register(flush, force=True)
@@ -0,0 +1,179 @@
+"""Keyset (cursor) pagination helpers shared by the list endpoints.
+
+Query parameters:
+- limit: page size (PAGE_SIZE_DEFAULT when only ``after`` is sent), capped at PAGE_SIZE_MAX
+- after: opaque cursor returned as ``next_cursor`` by the previous page
+- sort:  sort key (e.g. ``id``, ``created_at``); prefix with ``-`` for descending
+
+Requests without ``limit``/``after`` keep the legacy plain-array response.
+Paginated requests get ``{"data": [...], "next_cursor": ..., "limit": n}``.
+NDJSON exports take ``after`` (to resume from a page's cursor) but not ``limit``.
+"""
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = int(os.getenv("PAGE_SIZE_DEFAULT", "50"))
+MAX_PAGE_SIZE = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+
+class PageParams:
+    """Parsed pagination/sort parameters for one list request."""
+
+    def __init__(self, sort_keys, limit: Optional[int] = None, after=None, sort: str = "id"):
+        # sort_keys: list of (column, descending); primary key is always last as tie-breaker
+        self.sort_keys = sort_keys
+        self.limit = limit
+        self.after = after
+        self.sort = sort
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None
+
+    @property
+    def sort_columns(self):
+        """Names of the columns the page is ordered by (they must be loaded for the cursor)."""
+        return tuple(column.key for column, _ in self.sort_keys)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(sort: str, values) -> str:
+    raw = json.dumps([sort, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise ValueError
+        return sort, values
+    except Exception:
+        raise ValueError("after must be a cursor returned by a previous page")
+
+
+def get_page_params(args, pk_column, sort_fields=None, export=False) -> PageParams:
+    """Parse limit/after/sort from request args.
+
+    sort_fields maps public sort names to columns; ``id`` always maps to pk_column.
+    export=True (NDJSON streams) rejects ``limit`` and keeps an ``after`` unpaginated.
+    Raises ValueError on invalid input.
+    """
+    fields = {"id": pk_column}
+    fields.update(sort_fields or {})
+
+    sort = args.get("sort") or "id"
+    name = sort[1:] if sort.startswith("-") else sort
+    if name not in fields:
+        raise ValueError(f"sort must be one of: {', '.join(sorted(fields))}")
+    descending = sort.startswith("-")
+    sort_keys = [(fields[name], descending)]
+    if fields[name] is not pk_column:
+        sort_keys.append((pk_column, descending))
+
+    limit = args.get("limit")
+    after = args.get("after")
+    if export and limit is not None:
+        raise ValueError("limit does not apply to NDJSON exports; resume one with after")
+    if limit is None and after is None:
+        return PageParams(sort_keys, sort=sort)
+
+    if export:
+        limit = None
+    elif limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError("limit must be a valid number")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+    if limit is not None:
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    if after is not None:
+        cursor_sort, values = decode_cursor(after)
+        if cursor_sort != sort or len(values) != len(sort_keys):
+            raise ValueError("after cursor does not match the requested sort")
+        try:
+            after = [_decode_value(col, v) for (col, _), v in zip(sort_keys, values)]
+        except (TypeError, ValueError):
+            raise ValueError("after must be a cursor returned by a previous page")
+    return PageParams(sort_keys, limit=limit, after=after, sort=sort)
+
+
+def _keyset_condition(sort_keys, values):
+    """Build ``(k1, k2, ...) > (v1, v2, ...)`` honouring per-key direction."""
+    clauses = []
+    for i, (column, descending) in enumerate(sort_keys):
+        equal = [col == values[j] for j, (col, _) in enumerate(sort_keys[:i])]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def apply_sort(query, page: PageParams):
+    """Order the query by the requested sort keys (primary key last)."""
+    return query.order_by(*[col.desc() if desc else col.asc() for col, desc in page.sort_keys])
+
+
+def keyset_order(query, page: PageParams):
+    """Order query and skip the rows up to and including the ``after`` cursor (if any)."""
+    query = apply_sort(query, page)
+    if page.after is not None:
+        query = query.filter(_keyset_condition(page.sort_keys, page.after))
+    return query
+
+
+def page_window(query, page: PageParams):
+    """Order query (ORM Query or Core select) and restrict it to the page's keyset window.
+
+    The window holds one row more than the page, which tells whether another page exists.
+    Unpaginated (legacy) requests only get the ordering.
+    """
+    query = keyset_order(query, page)
+    if not page.paginated:
+        return query
+    return query.limit(page.limit + 1)
+
+
+def fetch_page(query, page: PageParams):
+    """Apply ordering (and keyset window when paginated); return (items, next_cursor)."""
+    items = page_window(query, page).all()
+    if not page.paginated or len(items) <= page.limit:
+        return items, None
+    items = items[:page.limit]
+    last = items[-1]
+    values = [getattr(last, col.key) for col, _ in page.sort_keys]
+    return items, encode_cursor(page.sort, values)
+
+
+def page_response(data, next_cursor, page: PageParams):
+    """Wrap serialized rows in the paginated envelope (legacy array when not paginated)."""
+    if not page.paginated:
+        return data
+    return {"data": data, "next_cursor": next_cursor, "limit": page.limit}
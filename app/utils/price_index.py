@@ -0,0 +1,91 @@
+"""In-process menu price index used to validate and price order items.
+
+Keeps the current price and deleted flag of recently ordered menus, so order
+writes usually resolve menu references and default prices without a menus
+query. Ids the index doesn't hold are read with one IN query per lookup and
+added; at most PRICE_INDEX_SIZE entries are kept, least recently used first
+out, so memory doesn't grow with the menus table.
+
+The index follows the catalog cache version: menu writes (here or, via
+catalog_sync, in another worker) call ``catalog_cache.invalidate()``, and the
+next lookup starts from an empty index. Like cached responses it is also
+emptied after CATALOG_CACHE_TTL seconds, which bounds staleness when
+cross-worker sync is off.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import select
+
+from app.models.menu import Menu
+from app.utils.cache import catalog_cache
+
+PRICE_INDEX_SIZE = int(os.getenv("PRICE_INDEX_SIZE", "5000"))
+
+
+class MenuPrice(NamedTuple):
+    menu_id: int
+    price: float
+    deleted: bool
+
+
+def _menu_prices(db, ids):
+    stmt = select(Menu.menu_id, Menu.price, Menu.deleted_at.is_not(None)).where(Menu.menu_id.in_(ids))
+    return {menu_id: MenuPrice(menu_id, price, deleted) for menu_id, price, deleted in db.execute(stmt)}
+
+
+class PriceIndex:
+    def __init__(self, cache, max_size: int):
+        self.cache = cache
+        self.max_size = max_size
+        self.loads = 0
+        self._prices = OrderedDict()
+        self._version = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def _reset_if_stale(self):
+        """Empty the index after a catalog change or TTL expiry; returns the version it is valid for."""
+        with self._lock:
+            if self._version != self.cache.version or time.monotonic() >= self._expires:
+                self._prices.clear()
+                self._version = self.cache.version
+                self._expires = time.monotonic() + self.cache.ttl
+            return self._version
+
+    def lookup(self, db, ids):
+        """{menu_id: MenuPrice} for the active menus among ids (ReferenceBatch lookup signature)."""
+        self.cache.check_freshness()
+        version = self._reset_if_stale()
+        found = {}
+        with self._lock:
+            for menu_id in ids:
+                price = self._prices.get(menu_id)
+                if price is not None:
+                    self._prices.move_to_end(menu_id)
+                    found[menu_id] = price
+        unknown = [menu_id for menu_id in ids if menu_id not in found]
+        if unknown:
+            # No lock around the query: under asgi.py it yields to the event loop, and
+            # another request on that loop must not block on the lock meanwhile
+            loaded = _menu_prices(db, unknown)
+            found.update(loaded)
+            with self._lock:
+                self.loads += 1
+                # Rows read before an invalidation must not outlive it
+                if self._version == version == self.cache.version:
+                    self._prices.update(loaded)
+                    while len(self._prices) > self.max_size:
+                        self._prices.popitem(last=False)
+        return {menu_id: price for menu_id, price in found.items() if not price.deleted}
+
+
+price_index = PriceIndex(catalog_cache, PRICE_INDEX_SIZE)
+
+
+def menu_references():
+    """ReferenceBatch lookups that resolve Menu ids from the price index."""
+    return {Menu: price_index.lookup}
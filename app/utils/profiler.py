@@ -0,0 +1,176 @@
+"""SQL profiler: per-request statement accounting and a slow-query log.
+
+Engine event hooks time every statement and attribute it to the current route
+(URL rule) and the controller function that issued it. Per request they keep
+the statement count, total DB time and how often each statement text repeated
+(``request_query_stats()``; the metrics module reads the same numbers).
+
+- Statements slower than SLOW_QUERY_MS are logged on ``3awan.sql`` with their
+  parameters and, when SLOW_QUERY_EXPLAIN is on, the plan (``EXPLAIN`` on
+  PostgreSQL inside a savepoint, ``EXPLAIN QUERY PLAN`` on SQLite).
+- A statement repeated SQL_REPEAT_THRESHOLD times in one request is logged once
+  as a likely N+1.
+- With SQL_DEBUG_HEADERS on, responses carry ``X-DB-Query-Count``,
+  ``X-DB-Time-Ms`` and ``X-DB-Max-Repeat``.
+"""
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app.config.database import _env_bool, engine
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN = _env_bool("SLOW_QUERY_EXPLAIN", True)
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+SQL_DEBUG_HEADERS = _env_bool("SQL_DEBUG_HEADERS")
+MAX_LOGGED_PARAMS = 500
+
+_CONTROLLERS_DIR = os.sep + os.path.join("app", "controllers") + os.sep
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+logger = logging.getLogger("3awan.sql")
+
+
+class QueryStats:
+    """Statements run while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.repeats = Counter()
+        self.warned = set()
+
+    @property
+    def max_repeat(self) -> int:
+        return max(self.repeats.values(), default=0)
+
+
+def request_query_stats():
+    """QueryStats of the current request (None outside a request or before any statement)."""
+    if not has_request_context():
+        return None
+    return g.get("query_stats")
+
+
+def _controller():
+    """module.function of the innermost controller frame on the stack, else the view endpoint."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if _CONTROLLERS_DIR in frame.f_code.co_filename:
+            return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return request.endpoint if has_request_context() else None
+
+
+def _route():
+    if not has_request_context():
+        return None
+    return request.url_rule.rule if request.url_rule is not None else request.path
+
+
+def _format_params(parameters):
+    text = repr(parameters)
+    return text if len(text) <= MAX_LOGGED_PARAMS else text[:MAX_LOGGED_PARAMS] + "..."
+
+
+def _explain(conn, statement, parameters):
+    """Plan text for statement, or None for dialects/statements we don't explain."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        prefix = "EXPLAIN "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return None
+    dbapi_connection = conn.connection.dbapi_connection
+    # A failed EXPLAIN must not abort the caller's PostgreSQL transaction
+    savepoint = dialect == "postgresql" and not getattr(dbapi_connection, "autocommit", False)
+    cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT sql_profiler_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT sql_profiler_explain")
+                cursor.execute("RELEASE SAVEPOINT sql_profiler_explain")
+        return "\n".join(str(row[-1]) for row in rows)
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profiler_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profiler_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+
+    stats = None
+    if has_request_context():
+        stats = g.get("query_stats")
+        if stats is None:
+            stats = g.query_stats = QueryStats()
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.repeats[statement] += 1
+
+    slow = SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS
+    repeated = (
+        stats is not None and SQL_REPEAT_THRESHOLD > 0
+        and stats.repeats[statement] == SQL_REPEAT_THRESHOLD and statement not in stats.warned
+    )
+    if not (slow or repeated):
+        return
+    controller = _controller()
+    if repeated:
+        stats.warned.add(statement)
+        logger.warning(
+            "Statement repeated %d times in one request (possible N+1) route=%s controller=%s: %s",
+            SQL_REPEAT_THRESHOLD, _route(), controller, statement,
+        )
+    if slow:
+        plan = _explain(conn, statement, parameters) if SLOW_QUERY_EXPLAIN and not executemany else None
+        logger.warning(
+            "Slow query %.1f ms route=%s controller=%s: %s\nparameters: %s%s",
+            elapsed * 1000, _route(), controller, statement, _format_params(parameters),
+            f"\nplan:\n{plan}" if plan else "",
+        )
+
+
+def profile_engine(bind):
+    """Attach the statement hooks to bind (the module engine is profiled on import)."""
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+
+
+profile_engine(engine)
+
+
+def _debug_headers(response):
+    stats = request_query_stats()
+    response.headers["X-DB-Query-Count"] = str(stats.count if stats else 0)
+    response.headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}" if stats else "0.00"
+    response.headers["X-DB-Max-Repeat"] = str(stats.max_repeat if stats else 0)
+    return response
+
+
+def init_profiler(app):
+    """Add the X-DB-* debug headers when SQL_DEBUG_HEADERS is on (the engine hooks are always active)."""
+    if SQL_DEBUG_HEADERS:
+        app.after_request(_debug_headers)
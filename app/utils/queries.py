@@ -0,0 +1,272 @@
+"""Shared query builders used by the controllers.
+
+Each builder attaches the eager-loading strategy that matches the shape the
+corresponding serializer emits, so walking ``order.order_items -> menu ->
+category`` never falls back to per-row lazy loads:
+
+- one-to-many collections use ``selectinload`` (one extra ``IN`` query per level)
+- many-to-one references use ``joinedload`` / ``contains_eager`` (no extra query)
+
+Builders also accept a sparse-fieldset ``shape`` (see app.utils.fieldsets):
+only its columns are selected (``load_only``) and only its embedded relations
+are eager-loaded.
+"""
+from sqlalchemy import func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import configure_mappers, contains_eager, joinedload, load_only, selectinload
+
+from app.models.catalog_version import CatalogVersion
+from app.models.category import Category
+from app.models.menu import Menu
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.utils.pagination import page_window
+from app.utils.serializers import row_columns
+
+
+def _relationships():
+    # Backref attributes (Menu.category, OrderItem.menu) only exist once the mappers are configured
+    configure_mappers()
+    return Menu.category, OrderItem.menu
+
+
+def _shape_options(shape, loader=None, extra=(), joined=False, root_loaders=None):
+    """load_only + eager-load options for shape, chained below loader (None = query root).
+
+    extra names columns that must be selected although not emitted (sort keys,
+    foreign keys of the parent relation). root_loaders overrides the loader of
+    top-level relations (e.g. contains_eager over an existing join).
+    """
+    options = []
+    if shape.fields is not None:
+        columns = [getattr(shape.model, name) for name in shape.load_columns(extra)]
+        options.append(loader.load_only(*columns) if loader is not None else load_only(*columns))
+    relationships = sa_inspect(shape.model).relationships
+    for name, child in shape.expand:
+        prop = relationships[name]
+        attr = getattr(shape.model, name)
+        if loader is None and root_loaders and name in root_loaders:
+            child_loader = root_loaders[name]
+        else:
+            # Same strategies as the default builders: collections and menus (repeated
+            # across many items) via IN, other references joined; single rows all joined
+            strategy = selectinload if (prop.uselist or child.model is Menu) and not joined else joinedload
+            child_loader = getattr(loader, strategy.__name__)(attr) if loader is not None else strategy(attr)
+        options.append(child_loader)
+        remote_keys = tuple(c.key for c in prop.remote_side)
+        options.extend(_shape_options(child, child_loader, remote_keys, joined))
+    return options
+
+
+def category_query(db, include_deleted: bool = False, shape=None):
+    """Query categories; serialize_category emits columns only."""
+    query = db.query(Category)
+    if shape is not None:
+        query = query.options(*_shape_options(shape))
+    if not include_deleted:
+        query = query.filter(Category.deleted_at.is_(None))
+    return query
+
+
+def category_rows_query(db, include_deleted: bool = False, shape=None, extra_columns=()):
+    """Query category columns as plain rows (no ORM hydration), for serialize_rows.
+
+    With a shape, its fields come first (matching serialize_rows(Category, rows,
+    shape.fields)) followed by any extra columns needed for sorting.
+    """
+    if shape is None or shape.fields is None:
+        columns = row_columns(Category)
+    else:
+        columns = row_columns(Category, shape.fields)
+        columns += [Category.__table__.columns[name] for name in shape.load_columns(extra_columns)
+                    if name not in shape.fields]
+    query = db.query(*columns)
+    if not include_deleted:
+        query = query.filter(Category.deleted_at.is_(None))
+    return query
+
+
+def menu_query(db, include_deleted: bool = False, shape=None, extra_columns=()):
+    """Query menus with their category loaded, as emitted by serialize_menu.
+
+    The active listing already joins Category to filter out soft-deleted
+    categories, so that join is reused to populate ``menu.category``.
+    """
+    menu_category, _ = _relationships()
+    if include_deleted:
+        if shape is not None:
+            return db.query(Menu).options(*_shape_options(shape, extra=extra_columns))
+        return db.query(Menu).options(joinedload(menu_category))
+    if shape is not None:
+        options = _shape_options(shape, extra=extra_columns,
+                                 root_loaders={"category": contains_eager(menu_category)})
+    else:
+        options = [contains_eager(menu_category)]
+    return (
+        db.query(Menu)
+        .join(menu_category)
+        .options(*options)
+        .filter(
+            Menu.deleted_at.is_(None),
+            Category.deleted_at.is_(None)
+        )
+    )
+
+
+def menu_detail_query(db, include_deleted: bool = False, shape=None):
+    """Query a single menu with its category, without requiring an active category."""
+    menu_category, _ = _relationships()
+    if shape is not None:
+        query = db.query(Menu).options(*_shape_options(shape, joined=True))
+    else:
+        query = db.query(Menu).options(joinedload(menu_category))
+    if not include_deleted:
+        query = query.filter(Menu.deleted_at.is_(None))
+    return query
+
+
+def _order_item_menu_loader(loader):
+    """Attach menu (and its category) loading below an order item loader."""
+    menu_category, order_item_menu = _relationships()
+    # Menus repeat across many items, so load each one once via IN rather than per joined row
+    return loader.selectinload(order_item_menu).joinedload(menu_category)
+
+
+def order_item_query(db, include_deleted: bool = False, shape=None, extra_columns=()):
+    """Query order items with menu -> category loaded, as emitted by serialize_order_item."""
+    menu_category, order_item_menu = _relationships()
+    if shape is not None:
+        query = db.query(OrderItem).options(*_shape_options(shape, extra=extra_columns))
+    else:
+        query = db.query(OrderItem).options(
+            selectinload(order_item_menu).joinedload(menu_category)
+        )
+    if not include_deleted:
+        query = query.filter(OrderItem.deleted_at.is_(None))
+    return query
+
+
+def order_query(db, include_deleted: bool = False, shape=None, extra_columns=()):
+    """Query orders with items -> menu -> category loaded, as emitted by serialize_order."""
+    if shape is not None:
+        _relationships()
+        query = db.query(Order).options(*_shape_options(shape, extra=extra_columns))
+    else:
+        query = db.query(Order).options(
+            _order_item_menu_loader(selectinload(Order.order_items))
+        )
+    if not include_deleted:
+        query = query.filter(Order.deleted_at.is_(None))
+    return query
+
+
+def order_detail_query(db, include_deleted: bool = False, shape=None):
+    """Query a single order with items -> menu -> category in one joined SELECT.
+
+    Used where exactly one order is returned (detail/create/update), so the
+    row duplication of joined collections is negligible and the whole graph
+    costs a single round trip.
+    """
+    menu_category, order_item_menu = _relationships()
+    if shape is not None:
+        query = db.query(Order).options(*_shape_options(shape, joined=True))
+    else:
+        query = db.query(Order).options(
+            joinedload(Order.order_items).joinedload(order_item_menu).joinedload(menu_category)
+        )
+    if not include_deleted:
+        query = query.filter(Order.deleted_at.is_(None))
+    return query
+
+
+# Response validators (ETag/Last-Modified) --------------------------------------
+#
+# Each *_validator returns a SELECT over the timestamps of exactly the rows a
+# response is built from (the target row or page window, plus the rows it
+# embeds) and the catalog_version row, so any insert, update, soft or hard
+# delete changes the result. Every lookup is by primary key or by the page's
+# own keyset window; nothing aggregates over a whole table. Evaluated by
+# app.utils.conditional.conditional_get.
+
+def _stamps(model):
+    return [model.created_at, model.updated_at, model.deleted_at]
+
+
+def _catalog_version():
+    # Bumped on every menu/category write, even within the same second
+    row = CatalogVersion.id == 1
+    return [
+        select(CatalogVersion.version).where(row).scalar_subquery().label("catalog_version"),
+        select(CatalogVersion.updated_at).where(row).scalar_subquery().label("catalog_updated_at"),
+    ]
+
+
+def _order_items_stats(*criteria):
+    """Per-order item count and newest item/menu/category timestamps, for the orders in criteria."""
+    return (
+        select(
+            OrderItem.order_id,
+            func.count().label("item_count"),
+            *[func.max(column) for column in _stamps(OrderItem) + _stamps(Menu) + _stamps(Category)],
+        )
+        .outerjoin(Menu, OrderItem.menu_id == Menu.menu_id)
+        .outerjoin(Category, Menu.category_id == Category.category_id)
+        .where(*criteria)
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+
+
+def category_validator(category_id: int):
+    return select(*_stamps(Category), *_catalog_version()).where(Category.category_id == category_id)
+
+
+def menu_validator(menu_id: int):
+    return (
+        select(*_stamps(Menu), *_stamps(Category), *_catalog_version())
+        .outerjoin(Category, Menu.category_id == Category.category_id)
+        .where(Menu.menu_id == menu_id)
+    )
+
+
+def order_validator(order_id: int):
+    items = _order_items_stats(OrderItem.order_id == order_id)
+    return (
+        select(*_stamps(Order), *[c for c in items.c if c.key != "order_id"], *_catalog_version())
+        .outerjoin(items, items.c.order_id == Order.order_id)
+        .where(Order.order_id == order_id)
+    )
+
+
+def order_item_validator(order_item_id: int):
+    return (
+        select(*_stamps(OrderItem), *_stamps(Menu), *_stamps(Category), *_catalog_version())
+        .outerjoin(Menu, OrderItem.menu_id == Menu.menu_id)
+        .outerjoin(Category, Menu.category_id == Category.category_id)
+        .where(OrderItem.order_item_id == order_item_id)
+    )
+
+
+def order_page_validator(page, criteria=(), include_deleted: bool = False):
+    """Validator for one page of orders: the keyset window's rows and their items."""
+    if not include_deleted:
+        criteria = [*criteria, Order.deleted_at.is_(None)]
+    window = page_window(select(Order.order_id, *_stamps(Order)).where(*criteria), page).cte("order_window")
+    items = _order_items_stats(OrderItem.order_id.in_(select(window.c.order_id)))
+    return (
+        select(window, *[c for c in items.c if c.key != "order_id"], *_catalog_version())
+        .outerjoin(items, items.c.order_id == window.c.order_id)
+    )
+
+
+def order_item_page_validator(page, include_deleted: bool = False):
+    """Validator for one page of order items: the keyset window's rows and their menus."""
+    criteria = [] if include_deleted else [OrderItem.deleted_at.is_(None)]
+    window = page_window(
+        select(OrderItem.order_item_id, OrderItem.menu_id, *_stamps(OrderItem)).where(*criteria), page
+    ).subquery()
+    return (
+        select(window, *_stamps(Menu), *_stamps(Category), *_catalog_version())
+        .outerjoin(Menu, window.c.menu_id == Menu.menu_id)
+        .outerjoin(Category, Menu.category_id == Category.category_id)
+    )
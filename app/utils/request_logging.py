@@ -0,0 +1,255 @@
+"""Structured, queued logging with per-request IDs and success-log sampling.
+
+``configure_logging()`` replaces ``logging.basicConfig``. Records are
+rendered as one JSON object per line (LOG_FORMAT=json) with the message,
+logger, level, request ID and every ``extra={...}`` field. Alternatively,
+LOG_FORMAT=text gives the old one-line format plus the request ID. Callers
+only put records on an in-memory queue (QueueHandler). A QueueListener
+thread formats them and writes them to stderr, so log I/O happens off the
+request thread.
+
+``init_request_logging(app)`` gives each request an ID. The ID is taken
+from the X-Request-ID header when the client (or proxy) sends a sane one,
+otherwise it is generated. The ID is stored in a context variable, attached
+to every record logged while handling the request, and echoed in the
+response header. One access log line per request goes to ``3awan.access``.
+It carries method, route, status, duration, size and SQL statement count.
+
+LOG_SAMPLE_RATE samples successful requests. When a request is not sampled,
+its INFO/DEBUG records (access line and controller messages) are dropped
+before they reach the queue. Warnings, errors and the access line of any
+request answered with status >= 400 are always logged.
+"""
+import atexit
+import contextvars
+import copy
+import datetime
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+
+from flask import g, request
+
+from app.utils.profiler import request_query_stats
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    import json
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").strip().lower()
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").strip().lower() not in ("0", "false", "no", "off")
+LOG_SAMPLE_RATE = min(max(float(os.getenv("LOG_SAMPLE_RATE", "1")), 0.0), 1.0)
+REQUEST_ID_HEADER = os.getenv("REQUEST_ID_HEADER", "X-Request-ID")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s]: %(message)s"
+# Accept client/proxy IDs that are safe to log verbatim (UUIDs, trace ids, ...)
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:/+=-]{1,128}$")
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+_sampled_var = contextvars.ContextVar("log_sampled", default=True)
+
+logger = logging.getLogger("3awan.access")
+
+
+def current_request_id():
+    """ID of the request being handled in this context (None outside a request)."""
+    return request_id_var.get()
+
+
+# Formatting ------------------------------------------------------------------
+
+def _dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message, request_id, extras, exc_info."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(
+                timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return _dumps(entry)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps request_id on records and drops INFO/DEBUG of unsampled requests."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return record.levelno >= logging.WARNING or _sampled_var.get()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve what depends on the calling thread (message args, traceback) before the
+        # record crosses to the listener, but keep it a plain record so extras survive
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Setup -----------------------------------------------------------------------
+
+_listener = None
+
+
+def _start_listener(handler):
+    global _listener
+    _listener = logging.handlers.QueueListener(handler.queue, *handler.targets, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def configure_logging(level=None):
+    """Install the JSON/text stderr handler (behind a queue when LOG_QUEUE) on the root logger.
+
+    Safe to call more than once; later calls only adjust the level.
+    """
+    root = logging.getLogger()
+    root.setLevel(level or LOG_LEVEL)
+    if any(getattr(h, "_3awan", False) for h in root.handlers):
+        return
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+    if LOG_QUEUE:
+        handler = _QueueHandler(queue.SimpleQueue())
+        handler.targets = (stream,)
+        _start_listener(handler)
+        atexit.register(_stop_listener)
+        # The listener thread does not survive fork (e.g. gunicorn --preload)
+        os.register_at_fork(after_in_child=lambda: _start_listener(handler))
+    else:
+        handler = stream
+    handler.addFilter(RequestContextFilter())
+    handler._3awan = True
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+
+
+# Request context ---------------------------------------------------------------------
+
+def request_id_for(incoming):
+    """The client's request ID when it is safe to log verbatim, else a new one."""
+    if incoming and _VALID_REQUEST_ID.match(incoming):
+        return incoming
+    return os.urandom(16).hex()
+
+
+def enter_request(incoming_id):
+    """Set the request ID and sampling decision for this context; returns tokens for exit_request()."""
+    return (
+        request_id_var.set(request_id_for(incoming_id)),
+        _sampled_var.set(LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE),
+    )
+
+
+def exit_request(tokens):
+    try:
+        request_id_var.reset(tokens[0])
+        _sampled_var.reset(tokens[1])
+    except ValueError:
+        # Torn down in another context than it started in
+        request_id_var.set(None)
+        _sampled_var.set(True)
+
+
+def log_access(method, path, query, route, status, duration, size, db_statements, remote_addr):
+    """Write the access line (subject to sampling; always for status >= 400)."""
+    if status >= 400:
+        # Failed requests are always logged, from here on
+        _sampled_var.set(True)
+    if not logger.isEnabledFor(logging.INFO) or not _sampled_var.get():
+        return
+    logger.info(
+        "%s %s %s", method, path, status,
+        extra={
+            "method": method,
+            "path": path,
+            "query": query or None,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2) if duration is not None else None,
+            "bytes": size,
+            "db_statements": db_statements,
+            "remote_addr": remote_addr,
+        },
+    )
+
+
+# Flask wiring ----------------------------------------------------------------
+
+def _start_request():
+    g.log_tokens = enter_request(request.headers.get(REQUEST_ID_HEADER))
+    g.log_start = time.perf_counter()
+
+
+def _end_request(response):
+    request_id = request_id_var.get()
+    if request_id is not None:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    start = g.get("log_start")
+    stats = request_query_stats()
+    log_access(
+        request.method, request.path, request.query_string.decode("latin-1"),
+        request.url_rule.rule if request.url_rule is not None else None,
+        response.status_code,
+        time.perf_counter() - start if start is not None else None,
+        None if response.is_streamed else response.calculate_content_length(),
+        stats.count if stats else 0,
+        request.remote_addr,
+    )
+    return response
+
+
+def _teardown_request(exc):
+    tokens = g.pop("log_tokens", None)
+    if tokens is not None:
+        exit_request(tokens)
+
+
+def init_request_logging(app):
+    """Register request-ID, access-log and context cleanup hooks.
+
+    Register before the other hooks: its before_request then runs first (so
+    their records carry the ID) and its after_request runs last, logging the
+    final status and body size.
+    """
+    app.before_request(_start_request)
+    app.after_request(_end_request)
+    app.teardown_request(_teardown_request)
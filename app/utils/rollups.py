@@ -0,0 +1,477 @@
+"""Incrementally maintained sales rollups (hourly/daily totals and per-menu).
+
+Tables (app.models.sales_rollup), bucketed by ``orders.order_date`` in UTC:
+- sales_hourly / sales_daily: active orders, quantity, revenue
+- menu_sales_hourly / menu_sales_daily: quantity, revenue per menu
+
+Writers wrap their changes in ``track_orders``::
+
+    rollup = track_orders(db, [order_id])   # locks the orders, reads their contribution
+    ... insert / update / soft-delete orders and items ...
+    rollup.apply()                          # books the difference, before commit
+
+``apply`` flushes, re-reads the touched orders' contribution and appends the
+difference to ``sales_rollup_deltas`` in the writer's transaction. Nothing
+upserts the (hot) current hour/day rows there: ``fold`` moves the pending
+deltas into the tables in its own short transaction, every
+ROLLUP_FOLD_INTERVAL seconds from a background thread of each process that
+writes orders (or from cron with the ``fold`` command). Report reads never
+write: their statements add any deltas not folded yet, so they stay exact.
+
+``rebuild`` recomputes a range (or everything) from the base tables, one
+transaction per ``--batch-days`` days so no single transaction holds its locks
+for the whole history. Migrations create the tables empty; reports aggregate
+the base tables until a full rebuild has marked the rollups ready in
+``sales_rollup_state``:
+
+    python -m app.utils.rollups rebuild [--from 2024-01-01] [--to 2024-02-01] [--batch-days 7]
+    python -m app.utils.rollups fold        # e.g. from cron, with ROLLUP_FOLD_INTERVAL=0
+
+SALES_ROLLUPS=false disables maintenance and makes reports aggregate the base
+tables directly.
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import Date, and_, cast, delete, distinct, func, insert, select, text, update
+
+from app.models.menu import Menu  # noqa: F401  (mapper configuration)
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.sales_rollup import (
+    MenuSalesDaily, MenuSalesHourly, SalesDaily, SalesHourly, SalesRollupDelta, SalesRollupState,
+)
+from app.utils.filters import BucketBounds
+
+ROLLUPS_ENABLED = os.getenv("SALES_ROLLUPS", "true").strip().lower() not in ("0", "false", "no", "off")
+ROLLUP_FOLD_INTERVAL = float(os.getenv("ROLLUP_FOLD_INTERVAL", "30"))
+# Seconds between re-reads of sales_rollup_state while the rollups are not ready yet
+ROLLUP_STATE_INTERVAL = 10.0
+
+logger = logging.getLogger("3awan.rollups")
+
+
+def _hour(value: datetime.datetime) -> datetime.datetime:
+    """UTC hour bucket (naive) for an order_date as returned by the driver."""
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _contributions(db, order_ids):
+    """{(hour, menu_id): [quantity, revenue]} and {hour: order count} for the given orders."""
+    menus = defaultdict(lambda: [0, 0.0])
+    orders = defaultdict(int)
+    if not order_ids:
+        return menus, orders
+    rows = db.execute(
+        select(
+            Order.order_id,
+            Order.order_date,
+            OrderItem.menu_id,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.price * OrderItem.quantity),
+        )
+        .select_from(OrderItem)
+        .join(Order, and_(
+            OrderItem.order_id == Order.order_id,
+            OrderItem.deleted_at.is_(None),
+            Order.deleted_at.is_(None),
+        ))
+        .where(Order.order_id.in_(order_ids))
+        .group_by(Order.order_id, Order.order_date, OrderItem.menu_id)
+    ).all()
+    counted = set()
+    for order_id, order_date, menu_id, quantity, revenue in rows:
+        hour = _hour(order_date)
+        entry = menus[(hour, menu_id)]
+        entry[0] += int(quantity or 0)
+        entry[1] += float(revenue or 0)
+        if order_id not in counted:
+            counted.add(order_id)
+            orders[hour] += 1
+    return menus, orders
+
+
+def _upsert_add(db, model, key_names, rows):
+    """Add rows' value columns onto existing rows (matched by key_names), inserting missing ones."""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    value_names = [name for name in rows[0] if name not in key_names]
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_names),
+            set_={name: table.c[name] + stmt.excluded[name] for name in value_names},
+        )
+        db.execute(stmt, rows)
+        return
+    # Portable fallback: update, insert when nothing matched
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(*[table.c[k] == row[k] for k in key_names])
+            .values({name: table.c[name] + row[name] for name in value_names})
+        )
+        if result.rowcount == 0:
+            db.execute(insert(table), [row])
+
+
+def _lock_orders(db, order_ids):
+    """SELECT ... FOR UPDATE the orders about to change, so concurrent writers of one
+    order read its "before" contribution one after the other."""
+    if not order_ids or db.get_bind().dialect.name == "sqlite":
+        # No row locks on SQLite; its single write lock already makes the second writer fail
+        return
+    db.execute(
+        select(Order.order_id).where(Order.order_id.in_(order_ids)).order_by(Order.order_id).with_for_update()
+    )
+
+
+class OrderRollupChange:
+    """Rollup contribution of some orders captured before a write; apply() books the difference."""
+
+    def __init__(self, db, order_ids, new_order_ids=()):
+        self.db = db
+        self.order_ids = set(order_ids) | set(new_order_ids)
+        self.before = None
+        if ROLLUPS_ENABLED:
+            # Orders inserted by this transaction have no contribution yet and nobody else sees them
+            existing = sorted(set(order_ids) - set(new_order_ids))
+            _lock_orders(db, existing)
+            self.before = _contributions(db, existing)
+
+    def apply(self):
+        if not ROLLUPS_ENABLED:
+            return
+        # SessionLocal does not autoflush; pending ORM changes must be visible to the re-read
+        self.db.flush()
+        after_menus, after_orders = _contributions(self.db, self.order_ids)
+        before_menus, before_orders = self.before
+
+        changes = {}  # (hour, menu_id) -> [orders, quantity, revenue]
+        for key in set(before_menus) | set(after_menus):
+            quantity = after_menus[key][0] - before_menus[key][0]
+            revenue = after_menus[key][1] - before_menus[key][1]
+            if quantity or revenue:
+                changes[key] = [0, quantity, revenue]
+        for hour in set(before_orders) | set(after_orders):
+            count = after_orders[hour] - before_orders[hour]
+            if count:
+                # An order only (un)counts with its items, so some menu row of the hour changed too
+                key = min((k for k in changes if k[0] == hour), default=(hour, None))
+                changes.setdefault(key, [0, 0, 0.0])[0] += count
+        if not changes:
+            return
+        # Appended, not upserted: concurrent orders never wait on the current hour/day rows
+        self.db.execute(insert(SalesRollupDelta), [
+            {"bucket_start": hour, "bucket_date": hour.date(), "menu_id": menu_id,
+             "orders": o, "quantity": q, "revenue": r}
+            for (hour, menu_id), (o, q, r) in changes.items()
+        ])
+        rollup_folder.ensure_started()
+
+
+def track_orders(db, order_ids, new_order_ids=()):
+    """Start tracking rollup changes for order_ids (call before modifying them).
+
+    Existing orders are locked for the rest of the transaction; new_order_ids are
+    orders this transaction just inserted (nothing to read or lock).
+    """
+    return OrderRollupChange(db, order_ids, new_order_ids)
+
+
+# Folding -----------------------------------------------------------------------
+
+class RollupFolder:
+    """Per-process daemon thread folding the pending deltas every ``interval`` seconds (0 = never)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._started_pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the thread (once per process, so each gunicorn worker gets its own after fork)."""
+        if not ROLLUPS_ENABLED or self.interval <= 0 or self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+        thread = threading.Thread(target=self._fold_forever, name="rollup-fold", daemon=True)
+        thread.start()
+
+    def _fold_forever(self):
+        from app.config.database import SessionLocal, engine
+
+        while True:
+            time.sleep(self.interval)
+            # The sync engine: under asgi.py SessionLocal is bound to the async engine
+            with SessionLocal(bind=engine) as db:
+                try:
+                    fold(db)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    logger.exception("Failed to fold sales rollup deltas")
+
+
+rollup_folder = RollupFolder(ROLLUP_FOLD_INTERVAL)
+
+
+def _pending_deltas(db):
+    """Remove and return the pending delta rows."""
+    table = SalesRollupDelta.__table__
+    columns = (table.c.bucket_start, table.c.bucket_date, table.c.menu_id,
+               table.c.orders, table.c.quantity, table.c.revenue)
+    if db.get_bind().dialect.delete_returning:
+        # Exactly the rows deleted get folded, whatever writers commit meanwhile
+        return db.execute(delete(table).returning(*columns)).all()
+    last = db.execute(select(func.max(table.c.delta_id))).scalar()
+    if last is None:
+        return []
+    rows = db.execute(select(*columns).where(table.c.delta_id <= last)).all()
+    db.execute(delete(table).where(table.c.delta_id <= last))
+    return rows
+
+
+def fold(db):
+    """Add the pending deltas onto the rollup tables (caller commits); returns the rows folded."""
+    rows = _pending_deltas(db)
+    if not rows:
+        return 0
+    hourly = defaultdict(lambda: [0, 0, 0.0])
+    daily = defaultdict(lambda: [0, 0, 0.0])
+    menu_hourly = defaultdict(lambda: [0, 0.0])
+    menu_daily = defaultdict(lambda: [0, 0.0])
+    for bucket_start, bucket_date, menu_id, orders, quantity, revenue in rows:
+        for totals in (hourly[bucket_start], daily[bucket_date]):
+            totals[0] += orders
+            totals[1] += quantity
+            totals[2] += revenue
+        if menu_id is not None:
+            for totals in (menu_hourly[(bucket_start, menu_id)], menu_daily[(bucket_date, menu_id)]):
+                totals[0] += quantity
+                totals[1] += revenue
+
+    # Sorted so concurrent folds lock rows in the same order
+    _upsert_add(db, SalesHourly, ("bucket_start",), [
+        {"bucket_start": hour, "orders": o, "quantity": q, "revenue": r}
+        for hour, (o, q, r) in sorted(hourly.items()) if o or q or r
+    ])
+    _upsert_add(db, SalesDaily, ("bucket_date",), [
+        {"bucket_date": day, "orders": o, "quantity": q, "revenue": r}
+        for day, (o, q, r) in sorted(daily.items()) if o or q or r
+    ])
+    _upsert_add(db, MenuSalesHourly, ("bucket_start", "menu_id"), [
+        {"bucket_start": hour, "menu_id": menu_id, "quantity": q, "revenue": r}
+        for (hour, menu_id), (q, r) in sorted(menu_hourly.items()) if q or r
+    ])
+    _upsert_add(db, MenuSalesDaily, ("bucket_date", "menu_id"), [
+        {"bucket_date": day, "menu_id": menu_id, "quantity": q, "revenue": r}
+        for (day, menu_id), (q, r) in sorted(menu_daily.items()) if q or r
+    ])
+    if any(row.quantity < 0 for row in rows):
+        # Buckets emptied by deletes would otherwise linger as zero rows in the reports
+        # (items always have quantity >= 1, so quantity 0 means nothing left)
+        for model, bucket, keys in (
+            (SalesHourly, SalesHourly.bucket_start, hourly), (MenuSalesHourly, MenuSalesHourly.bucket_start, hourly),
+            (SalesDaily, SalesDaily.bucket_date, daily), (MenuSalesDaily, MenuSalesDaily.bucket_date, daily),
+        ):
+            db.execute(delete(model).where(bucket.in_(list(keys)), model.quantity == 0))
+    return len(rows)
+
+
+# Readiness ---------------------------------------------------------------------
+
+class RollupState:
+    """Per-process view of sales_rollup_state.ready (cached for good once true)."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.ready = False
+        self._next_check = 0.0
+
+    @property
+    def usable(self) -> bool:
+        """True when reports may read the rollup tables."""
+        return ROLLUPS_ENABLED and self.ready
+
+    def refresh(self, db):
+        """Re-read the state row if not ready yet (at most every ``interval`` seconds)."""
+        if self.ready or not ROLLUPS_ENABLED or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + self.interval
+        self.ready = bool(db.execute(select(SalesRollupState.ready).where(SalesRollupState.id == 1)).scalar())
+
+
+rollup_state = RollupState(ROLLUP_STATE_INTERVAL)
+
+
+def mark_ready(conn):
+    """Record that the rollups now cover all history (after a full rebuild)."""
+    conn.execute(
+        update(SalesRollupState)
+        .where(SalesRollupState.id == 1)
+        .values(ready=True, rebuilt_at=datetime.datetime.now(datetime.timezone.utc))
+    )
+
+
+# Rebuild -----------------------------------------------------------------------
+
+def _hour_expr(dialect_name):
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", func.timezone("UTC", Order.order_date))
+    # Same text format SQLAlchemy uses for DateTime values on SQLite
+    return func.strftime("%Y-%m-%d %H:00:00.000000", Order.order_date)
+
+
+def _day_expr(column, dialect_name):
+    if dialect_name == "postgresql":
+        return cast(column, Date)
+    return func.date(column)
+
+
+def _lock_deltas(conn):
+    """Keep delta writers and folds out until the rebuild commits.
+
+    Without it, under READ COMMITTED a writer that commits between the delta
+    DELETE and the base-table reads below would be counted twice: once in the
+    rebuilt rows and once by its surviving delta. EXCLUSIVE mode waits for
+    transactions that already appended deltas and blocks new appends and
+    folds, while reports (plain SELECTs) keep running. SQLite needs nothing:
+    the first DELETE takes its database-wide write lock.
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"LOCK TABLE {SalesRollupDelta.__tablename__} IN EXCLUSIVE MODE"))
+
+
+def rebuild(conn, start: datetime.date = None, end: datetime.date = None):
+    """Recompute the rollups for UTC days [start, end) (everything by default) from base tables."""
+    dialect = conn.dialect.name
+    _lock_deltas(conn)
+    bounds = BucketBounds(*(
+        datetime.datetime.combine(day, datetime.time()) if day is not None else None for day in (start, end)
+    ))
+    for model, column in (
+        (SalesHourly, SalesHourly.bucket_start), (MenuSalesHourly, MenuSalesHourly.bucket_start),
+        (SalesDaily, SalesDaily.bucket_date), (MenuSalesDaily, MenuSalesDaily.bucket_date),
+        (SalesRollupDelta, SalesRollupDelta.bucket_start),
+    ):
+        conn.execute(delete(model).where(*bounds.criteria(column)))
+
+    hour = _hour_expr(dialect).label("bucket_start")
+    active = select().select_from(OrderItem).join(Order, and_(
+        OrderItem.order_id == Order.order_id,
+        OrderItem.deleted_at.is_(None),
+        Order.deleted_at.is_(None),
+        *bounds.criteria(Order.order_date),
+    ))
+    conn.execute(insert(MenuSalesHourly).from_select(
+        ["bucket_start", "menu_id", "quantity", "revenue"],
+        active.add_columns(
+            hour, OrderItem.menu_id,
+            func.sum(OrderItem.quantity), func.sum(OrderItem.price * OrderItem.quantity),
+        ).group_by(hour, OrderItem.menu_id),
+    ))
+    conn.execute(insert(SalesHourly).from_select(
+        ["bucket_start", "orders", "quantity", "revenue"],
+        active.add_columns(
+            hour, func.count(distinct(Order.order_id)),
+            func.sum(OrderItem.quantity), func.sum(OrderItem.price * OrderItem.quantity),
+        ).group_by(hour),
+    ))
+
+    # Daily rollups are sums of the freshly rebuilt hourly rows
+    day = _day_expr(MenuSalesHourly.bucket_start, dialect).label("bucket_date")
+    conn.execute(insert(MenuSalesDaily).from_select(
+        ["bucket_date", "menu_id", "quantity", "revenue"],
+        select(day, MenuSalesHourly.menu_id, func.sum(MenuSalesHourly.quantity), func.sum(MenuSalesHourly.revenue))
+        .where(*bounds.criteria(MenuSalesHourly.bucket_start))
+        .group_by(day, MenuSalesHourly.menu_id),
+    ))
+    day = _day_expr(SalesHourly.bucket_start, dialect).label("bucket_date")
+    conn.execute(insert(SalesDaily).from_select(
+        ["bucket_date", "orders", "quantity", "revenue"],
+        select(day, func.sum(SalesHourly.orders), func.sum(SalesHourly.quantity), func.sum(SalesHourly.revenue))
+        .where(*bounds.criteria(SalesHourly.bucket_start))
+        .group_by(day),
+    ))
+
+
+def rebuild_batches(conn, start: datetime.date = None, end: datetime.date = None, batch_days: int = 7):
+    """Split [start, end) into day ranges of batch_days for rebuild (None = open bound).
+
+    Open bounds are narrowed to the days holding orders; the first and last
+    ranges stay open so stale rollup rows outside them are cleared too.
+    """
+    first, last = conn.execute(select(func.min(Order.order_date), func.max(Order.order_date))).one()
+    if first is None:
+        return [(start, end)]
+    lower = start or _hour(first).date()
+    upper = end or _hour(last).date() + datetime.timedelta(days=1)
+    step = datetime.timedelta(days=batch_days)
+    edges = [lower]
+    while edges[-1] + step < upper:
+        edges.append(edges[-1] + step)
+    batches = list(zip(edges, edges[1:] + [upper]))
+    batches[0] = (start, batches[0][1])
+    batches[-1] = (batches[-1][0], end)
+    return batches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.utils.rollups", description="Sales rollup maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser("rebuild", help="recompute rollups from orders/order_items")
+    rebuild_parser.add_argument("--from", dest="start", type=datetime.date.fromisoformat,
+                                help="first UTC day to rebuild (default: all history)")
+    rebuild_parser.add_argument("--to", dest="end", type=datetime.date.fromisoformat,
+                                help="UTC day after the last one to rebuild (exclusive)")
+    rebuild_parser.add_argument("--batch-days", type=int, default=7,
+                                help="days recomputed per transaction (default: 7)")
+    commands.add_parser("fold", help="move pending deltas into the rollup tables")
+    args = parser.parse_args(argv)
+
+    from app.config.database import SessionLocal, engine
+    from app.utils.request_logging import configure_logging
+
+    configure_logging()
+    started = datetime.datetime.now()
+    if args.command == "fold":
+        with SessionLocal() as db:
+            folded = fold(db)
+            db.commit()
+        logger.info("Folded %d sales rollup deltas in %.2fs", folded,
+                    (datetime.datetime.now() - started).total_seconds())
+        return 0
+    with engine.connect() as conn:
+        batches = rebuild_batches(conn, args.start, args.end, max(args.batch_days, 1))
+    for batch_start, batch_end in batches:
+        # One transaction per batch: writers wait on the delta lock for one batch at most
+        with engine.begin() as conn:
+            rebuild(conn, batch_start, batch_end)
+        logger.info("Rebuilt sales rollups %s .. %s", batch_start or "start", batch_end or "now")
+    if args.start is None and args.end is None:
+        with engine.begin() as conn:
+            mark_ready(conn)
+    logger.info("Rebuilt sales rollups (%s .. %s) in %.2fs", args.start or "start", args.end or "now",
+                (datetime.datetime.now() - started).total_seconds())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
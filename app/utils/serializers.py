@@ -1,85 +1,280 @@
-"""Helper functions for serializing models to dictionaries."""
-from datetime import datetime
-from typing import Optional
+"""Helper functions for serializing models to dictionaries.
+
+Serializers are compiled once per (model, column set, timezone options) and
+cached: the column list, which columns are datetimes and the ZoneInfo object
+are all resolved at compile time, so serializing a row is a single generated
+dict literal with no reflection, isinstance checks or timezone lookups.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Sequence
 from zoneinfo import ZoneInfo
 
+from flask import current_app, has_app_context
+from sqlalchemy import DateTime
+from sqlalchemy import inspect as sa_inspect
+
+
+@lru_cache(maxsize=64)
+def _resolve_tz(tz_name: Optional[str]):
+    """ZoneInfo for tz_name, or None when not requested/unsupported."""
+    if not tz_name:
+        return None
+    try:
+        return ZoneInfo(tz_name)
+    except Exception:
+        # Fallback: leave values as-is if timezone unsupported
+        return None
+
+
+def _datetime_formatter(tz_name: Optional[str] = None, tz_style: str = "offset"):
+    """Build a formatter converting a datetime to an ISO string for the given options."""
+    tz = _resolve_tz(tz_name)
+    zero = timedelta(0)
+
+    def fmt(value):
+        if not value:
+            return None
+        try:
+            if tz is not None:
+                value = value.astimezone(tz)
+            s = value.isoformat()
+            if tz_style == "z" and value.tzinfo and value.utcoffset() == zero:
+                # If datetime is UTC, replace "+00:00" with "Z"
+                s = s.replace("+00:00", "Z")
+            return s
+        except Exception:
+            # Safe fallback
+            return value.isoformat()
+
+    return fmt
+
+
 def _serialize_datetime(value: Optional[datetime], tz_name: Optional[str] = None, tz_style: str = "offset"):
     """Serialize datetime with optional timezone conversion and formatting.
     - tz_name: e.g., "Asia/Jakarta" to convert from UTC to local.
     - tz_style: "offset" (default) yields "+HH:MM"; "z" yields "Z" when UTC.
     """
-    if not value:
-        return None
-    try:
-        # Convert timezone if requested
-        if tz_name:
-            try:
-                tz = ZoneInfo(tz_name)
-                value = value.astimezone(tz)
-            except Exception:
-                # Fallback: leave as-is if timezone unsupported
-                pass
-        s = value.isoformat()
-        if tz_style == "z":
-            # If datetime is UTC, replace "+00:00" with "Z"
-            if value.tzinfo and value.utcoffset() == datetime.timedelta(0):
-                s = s.replace("+00:00", "Z")
-        return s
-    except Exception:
-        # Safe fallback
-        return value.isoformat()
+    return _datetime_formatter(tz_name, tz_style)(value)
+
+
+def _native_datetime() -> bool:
+    """True when the app's JSON provider encodes datetimes as isoformat() itself."""
+    return has_app_context() and getattr(current_app.json, "native_datetime", False)
+
+
+def _passthrough(tz_name, tz_style, native) -> bool:
+    # Values can be left as datetimes only when no conversion/rewriting is asked for
+    return native and tz_style == "offset" and _resolve_tz(tz_name) is None
+
+
+def _column_names(model, exclude_fields=None):
+    names = tuple(c.name for c in model.__table__.columns)
+    if exclude_fields:
+        names = tuple(n for n in names if n not in exclude_fields)
+    return names
+
+
+def _dict_literal(model, columns: Sequence[str], access, passthrough=False):
+    table_columns = model.__table__.columns
+    fields = []
+    for i, name in enumerate(columns):
+        if not name.isidentifier():
+            raise ValueError(f"Unsupported column name {name!r}")
+        value = access(i, name)
+        if not passthrough and isinstance(table_columns[name].type, DateTime):
+            value = f"_fmt({value})"
+        fields.append(f"{name!r}: {value}")
+    return "{" + ", ".join(fields) + "}"
+
+
+def _compile(model, columns: Sequence[str], tz_name, tz_style, source: str, native=False):
+    """Generate `serialize(obj)` returning a dict literal over columns.
+
+    source is "attr" (ORM instance) or "row" (tuple in column order). ORM
+    instances are read straight from their __dict__ (where loaded column
+    values live), falling back to attribute access for unloaded/expired ones.
+    With native=True and no timezone options, datetimes are left for the JSON
+    provider to encode.
+    """
+    passthrough = _passthrough(tz_name, tz_style, native)
+    if source == "row":
+        code = (
+            "def serialize(obj):\n"
+            f"    return {_dict_literal(model, columns, lambda i, name: f'obj[{i}]', passthrough)}\n"
+        )
+    else:
+        code = (
+            "def serialize(obj):\n"
+            "    d = obj.__dict__\n"
+            "    try:\n"
+            f"        return {_dict_literal(model, columns, lambda i, name: f'd[{name!r}]', passthrough)}\n"
+            "    except KeyError:\n"
+            f"        return {_dict_literal(model, columns, lambda i, name: f'obj.{name}', passthrough)}\n"
+        )
+    namespace = {"_fmt": _datetime_formatter(tz_name, tz_style)}
+    exec(compile(code, f"<serializer {model.__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(model, columns: Optional[tuple] = None, tz_name: Optional[str] = None,
+                       tz_style: str = "offset", native: bool = False):
+    """Cached serializer for ORM instances of model (all columns by default)."""
+    return _compile(model, columns or _column_names(model), tz_name, tz_style, "attr", native)
+
+
+@lru_cache(maxsize=256)
+def compile_row_serializer(model, columns: Optional[tuple] = None, tz_name: Optional[str] = None,
+                           tz_style: str = "offset", native: bool = False):
+    """Cached serializer for plain row tuples selected in `columns` order (no ORM hydration)."""
+    return _compile(model, columns or _column_names(model), tz_name, tz_style, "row", native)
+
+
+def row_columns(model, columns: Optional[tuple] = None):
+    """Table columns to select so rows match compile_row_serializer(model, columns)."""
+    table_columns = model.__table__.columns
+    return [table_columns[name] for name in (columns or _column_names(model))]
+
 
 def model_to_dict(model, exclude_fields=None, tz_name: Optional[str] = None, tz_style: str = "offset"):
     """Convert a model instance to a dictionary with timezone-aware datetime serialization."""
-    if exclude_fields is None:
-        exclude_fields = set()
-    
-    data = {}
-    for column in model.__table__.columns:
-        if column.name not in exclude_fields:
-            value = getattr(model, column.name)
-            # Handle datetime values
-            if isinstance(value, datetime):
-                value = _serialize_datetime(value, tz_name=tz_name, tz_style=tz_style)
-            data[column.name] = value
-    return data
-
-def serialize_category(category):
-    """Serialize a Category model to a dictionary."""
-    return model_to_dict(category)
+    columns = _column_names(type(model), exclude_fields)
+    return compile_serializer(type(model), columns, tz_name, tz_style)(model)
+
+
+def serialize_rows(model, rows, columns: Optional[tuple] = None, tz_name: Optional[str] = None,
+                   tz_style: str = "offset"):
+    """Serialize row tuples selected with row_columns(model, columns), without ORM objects."""
+    serialize = compile_row_serializer(model, columns, tz_name, tz_style, _native_datetime())
+    return [serialize(r) for r in rows]
+
+
+def _related_model(model, name):
+    return sa_inspect(model).relationships[name].mapper.class_
+
+
+def _category_serializer(model, native=False):
+    return compile_serializer(model, None, None, "offset", native)
+
+
+@lru_cache(maxsize=64)
+def _menu_serializer(menu_model, tz_name=None, tz_style="offset", native=False):
+    base = compile_serializer(menu_model, None, tz_name, tz_style, native)
+    # Categories are always emitted without timezone conversion
+    category_serializer = _category_serializer(_related_model(menu_model, 'category'), native)
+
+    def serialize(menu):
+        data = base(menu)
+        category = menu.category
+        if category:
+            data['category'] = category_serializer(category)
+        return data
+
+    return serialize
+
+
+@lru_cache(maxsize=64)
+def _order_item_serializer(order_item_model, tz_name=None, tz_style="offset", native=False):
+    base = compile_serializer(order_item_model, None, tz_name, tz_style, native)
+    menu_serializer = _menu_serializer(_related_model(order_item_model, 'menu'), tz_name, tz_style, native)
+
+    def serialize(order_item):
+        data = base(order_item)
+        menu = order_item.menu
+        if menu:
+            data['menu'] = menu_serializer(menu)
+        return data
+
+    return serialize
+
+
+@lru_cache(maxsize=64)
+def _order_serializer(order_model, tz_name=None, tz_style="offset", native=False):
+    base = compile_serializer(order_model, None, tz_name, tz_style, native)
+    item_serializer = _order_item_serializer(_related_model(order_model, 'order_items'), tz_name, tz_style,
+                                             native)
+
+    def serialize(order):
+        data = base(order)
+        data['order_items'] = [item_serializer(oi) for oi in order.order_items]
+        return data
+
+    return serialize
+
+
+@lru_cache(maxsize=256)
+def compile_shape_serializer(shape, tz_name=None, tz_style="offset", native=False):
+    """Cached serializer emitting shape.fields and only the relations in shape.expand."""
+    base = compile_serializer(shape.model, shape.fields, tz_name, tz_style, native)
+    if not shape.expand:
+        return base
+    relationships = sa_inspect(shape.model).relationships
+    nested = []
+    for name, child in shape.expand:
+        if name == 'category':
+            # Categories are always emitted without timezone conversion
+            child_serializer = compile_shape_serializer(child, None, "offset", native)
+        else:
+            child_serializer = compile_shape_serializer(child, tz_name, tz_style, native)
+        nested.append((name, relationships[name].uselist, child_serializer))
+
+    def serialize(obj):
+        data = base(obj)
+        for name, many, child_serializer in nested:
+            value = getattr(obj, name)
+            if many:
+                data[name] = [child_serializer(v) for v in value]
+            elif value is not None:
+                data[name] = child_serializer(value)
+        return data
+
+    return serialize
+
+
+def _serialize_list(items, default_factory, shape, tz_name, tz_style):
+    if not items:
+        return []
+    if shape is None:
+        serialize = default_factory(type(items[0]), tz_name, tz_style, _native_datetime())
+    else:
+        serialize = compile_shape_serializer(shape, tz_name, tz_style, _native_datetime())
+    return [serialize(item) for item in items]
+
+
+def serialize_category(category, shape=None):
+    """Serialize a Category model to a dictionary (restricted to shape when given)."""
+    if shape is not None:
+        return compile_shape_serializer(shape, None, "offset", _native_datetime())(category)
+    return _category_serializer(type(category), _native_datetime())(category)
 
 def serialize_categories(categories):
     """Serialize a list of Category models."""
-    return [serialize_category(c) for c in categories]
+    if not categories:
+        return []
+    serialize = _category_serializer(type(categories[0]), _native_datetime())
+    return [serialize(c) for c in categories]
 
-def serialize_menu(menu, tz_name: Optional[str] = None, tz_style: str = "offset"):
-    """Serialize a Menu model to a dictionary."""
-    data = model_to_dict(menu, tz_name=tz_name, tz_style=tz_style)
-    if menu.category:
-        data['category'] = serialize_category(menu.category)
-    return data
+def serialize_menu(menu, tz_name: Optional[str] = None, tz_style: str = "offset", shape=None):
+    """Serialize a Menu model to a dictionary (restricted to shape when given)."""
+    return _serialize_list([menu], _menu_serializer, shape, tz_name, tz_style)[0]
 
-def serialize_menus(menus):
+def serialize_menus(menus, shape=None):
     """Serialize a list of Menu models."""
-    return [serialize_menu(m) for m in menus]
+    return _serialize_list(menus, _menu_serializer, shape, None, "offset")
 
-def serialize_order_item(order_item, tz_name: Optional[str] = None, tz_style: str = "offset"):
-    """Serialize an OrderItem model to a dictionary."""
-    data = model_to_dict(order_item, tz_name=tz_name, tz_style=tz_style)
-    if order_item.menu:
-        data['menu'] = serialize_menu(order_item.menu, tz_name=tz_name, tz_style=tz_style)
-    return data
+def serialize_order_item(order_item, tz_name: Optional[str] = None, tz_style: str = "offset", shape=None):
+    """Serialize an OrderItem model to a dictionary (restricted to shape when given)."""
+    return _serialize_list([order_item], _order_item_serializer, shape, tz_name, tz_style)[0]
 
-def serialize_order_items(order_items, tz_name: Optional[str] = None, tz_style: str = "offset"):
+def serialize_order_items(order_items, tz_name: Optional[str] = None, tz_style: str = "offset", shape=None):
     """Serialize a list of OrderItem models."""
-    return [serialize_order_item(oi, tz_name=tz_name, tz_style=tz_style) for oi in order_items]
+    return _serialize_list(order_items, _order_item_serializer, shape, tz_name, tz_style)
 
-def serialize_order(order, tz_name: Optional[str] = None, tz_style: str = "offset"):
-    """Serialize an Order model to a dictionary."""
-    data = model_to_dict(order, tz_name=tz_name, tz_style=tz_style)
-    data['order_items'] = serialize_order_items(order.order_items, tz_name=tz_name, tz_style=tz_style)
-    return data
+def serialize_order(order, tz_name: Optional[str] = None, tz_style: str = "offset", shape=None):
+    """Serialize an Order model to a dictionary (restricted to shape when given)."""
+    return _serialize_list([order], _order_serializer, shape, tz_name, tz_style)[0]
 
-def serialize_orders(orders, tz_name: Optional[str] = None, tz_style: str = "offset"):
+def serialize_orders(orders, tz_name: Optional[str] = None, tz_style: str = "offset", shape=None):
     """Serialize a list of Order models."""
-    return [serialize_order(o, tz_name=tz_name, tz_style=tz_style) for o in orders]
\ No newline at end of file
+    return _serialize_list(orders, _order_serializer, shape, tz_name, tz_style)
@@ -0,0 +1,60 @@
+"""Streaming (NDJSON) export helpers for large list endpoints.
+
+Rows are read with a server-side cursor (``yield_per`` implies
+``stream_results``) and written to the client as they are serialized, so
+worker memory stays flat regardless of table size.
+"""
+import logging
+import os
+
+from flask import Response, current_app, request, stream_with_context
+
+from app.config.database import SessionLocal
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+logger = logging.getLogger("3awan.streaming")
+
+
+def wants_ndjson() -> bool:
+    """True when the client asked for NDJSON via ?format=ndjson or the Accept header."""
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt.lower() == "ndjson"
+    # Only an explicit NDJSON entry counts; "*/*" keeps the regular JSON array
+    accept = request.accept_mimetypes
+    if NDJSON_MIMETYPE not in accept.values():
+        return False
+    return accept.quality(NDJSON_MIMETYPE) >= accept.quality("application/json")
+
+
+def stream_ndjson(build_query, serialize, batch_size: int = STREAM_BATCH_SIZE):
+    """Return a streaming response writing one serialized row per line.
+
+    build_query(db) must return an ordered ORM query (pagination.keyset_order
+    applies the sort and an ``after`` cursor); it runs on a dedicated session
+    that lives as long as the response is being consumed. The app's JSON
+    provider must offer dumps_compact() (json_provider.FastJSONProvider).
+    """
+    def generate():
+        db = SessionLocal()
+        dumps = current_app.json.dumps_compact
+        try:
+            query = build_query(db).yield_per(batch_size)
+            chunk = []
+            for row in query:
+                chunk.append(dumps(serialize(row)))
+                if len(chunk) >= batch_size:
+                    yield "\n".join(chunk) + "\n"
+                    chunk = []
+            if chunk:
+                yield "\n".join(chunk) + "\n"
+        except Exception:
+            # Headers are already sent; the truncated stream is the only signal left
+            logger.exception("Failed while streaming NDJSON export")
+            raise
+        finally:
+            db.close()
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -43,21 +43,88 @@ def validate_number(data, field, required=True, min_value=None, max_value=None,
     
     return value
 
-def validate_foreign_key(data, field, model, required=True):
-    """Validate a foreign key reference exists."""
+class ReferenceBatch:
+    """Collects foreign-key references during validation and resolves them together.
+
+    Validators register (model, id) pairs instead of querying one at a time;
+    resolve() then loads each model's referenced rows with a single IN query
+    and reports every missing or soft-deleted reference in one ValueError.
+    The loaded instances stay available to the controller via get()/instances().
+    With strict=False nothing is raised and missing() reports the unresolved ids
+    (bulk endpoints reject only the rows that reference them).
+    lookups maps a model to a callable(db, ids) -> {id: active instance} used
+    instead of the IN query (e.g. the in-process menu price index).
+    """
+
+    def __init__(self, lookups=None):
+        self._ids = {}
+        self._resolved = {}
+        self._missing = {}
+        self._lookups = lookups or {}
+
+    def add(self, model, value):
+        self._ids.setdefault(model, set()).add(value)
+
+    def resolve(self, db, strict=True):
+        errors = []
+        for model, ids in self._ids.items():
+            if model in self._lookups:
+                found = self._lookups[model](db, ids)
+            else:
+                pk = model.__mapper__.primary_key[0]
+                found = {
+                    getattr(obj, pk.key): obj
+                    for obj in db.query(model).filter(pk.in_(ids)).all()
+                    if getattr(obj, 'deleted_at', None) is None
+                }
+            missing = sorted(ids - set(found))
+            self._missing[model] = set(missing)
+            if missing:
+                errors.append(f"Referenced {model.__name__} with id {', '.join(str(i) for i in missing)} not found")
+            self._resolved[model] = found
+        if errors and strict:
+            raise ValueError("; ".join(errors))
+        return self._resolved
+
+    def missing(self, model):
+        return self._missing.get(model, set())
+
+    def instances(self, model):
+        return self._resolved.get(model, {})
+
+    def get(self, model, value):
+        return self._resolved.get(model, {}).get(value)
+
+def validate_id(data, field, required=True):
+    """Validate an ID field's type and return it as an int."""
     if required:
         value = validate_required(data, field, (int, str))
     else:
         value = data.get(field)
         if value is not None and not isinstance(value, (int, str)):
             raise ValueError(f"{field} must be a valid ID")
-    
-    if value is not None:
-        # Query the referenced model
-        instance = model.query.get(value)
-        if not instance or getattr(instance, 'deleted_at', None) is not None:
-            raise ValueError(f"Referenced {model.__name__} with id {value} not found")
-    
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a valid ID")
+
+def validate_foreign_key(data, field, model, required=True, references=None):
+    """Validate a foreign key reference exists.
+
+    With a ReferenceBatch the existence check is deferred to references.resolve().
+    """
+    value = validate_id(data, field, required=required)
+    if value is None:
+        return None
+    if references is not None:
+        references.add(model, value)
+        return value
+    # Query the referenced model
+    instance = model.query.get(value)
+    if not instance or getattr(instance, 'deleted_at', None) is not None:
+        raise ValueError(f"Referenced {model.__name__} with id {value} not found")
     return value
 
 def validate_enum(data, field, enum_class, required=True):
@@ -83,7 +150,7 @@ def validate_category_input(data):
         'category_name': validate_string(data, 'category_name', max_length=100)
     }
 
-def validate_menu_input(data, partial=False):
+def validate_menu_input(data, partial=False, references=None):
     """Validate menu creation/update input."""
     from app.models.category import Category
     
@@ -97,13 +164,13 @@ def validate_menu_input(data, partial=False):
     if 'price' in data or required:
         validated['price'] = validate_number(data, 'price', required=required, min_value=0)
     if 'category_id' in data or required:
-        validated['category_id'] = validate_foreign_key(data, 'category_id', Category, required=required)
+        validated['category_id'] = validate_foreign_key(data, 'category_id', Category, required=required, references=references)
     if 'image_url' in data:
         validated['image_url'] = validate_string(data, 'image_url', required=False, max_length=255)
     
     return validated
 
-def validate_order_item_input(data, partial=False):
+def validate_order_item_input(data, partial=False, references=None):
     """Validate order item creation/update input."""
     from app.models.menu import Menu
     from app.models.order import Order
@@ -112,9 +179,9 @@ def validate_order_item_input(data, partial=False):
     required = not partial
     
     if 'order_id' in data or required:
-        validated['order_id'] = validate_foreign_key(data, 'order_id', Order, required=required)
+        validated['order_id'] = validate_foreign_key(data, 'order_id', Order, required=required, references=references)
     if 'menu_id' in data or required:
-        validated['menu_id'] = validate_foreign_key(data, 'menu_id', Menu, required=required)
+        validated['menu_id'] = validate_foreign_key(data, 'menu_id', Menu, required=required, references=references)
     if 'quantity' in data or required:
         validated['quantity'] = validate_number(data, 'quantity', required=required, min_value=1, field_type=int)
     if 'price' in data:  # price is usually set from menu price
@@ -122,21 +189,21 @@ def validate_order_item_input(data, partial=False):
     
     return validated
 
-def validate_order_item_for_create(data):
+def validate_order_item_for_create(data, references=None):
     """Validate an order item in the context of creating a new order.
     Requires menu_id and quantity; does NOT require order_id because it is set after the order is created.
     """
     from app.models.menu import Menu
     validated = {}
     # menu_id and quantity are required for creating order items via /orders
-    validated['menu_id'] = validate_foreign_key(data, 'menu_id', Menu, required=True)
+    validated['menu_id'] = validate_foreign_key(data, 'menu_id', Menu, required=True, references=references)
     validated['quantity'] = validate_number(data, 'quantity', required=True, min_value=1, field_type=int)
     # price optional; if omitted, controller will default from menu
     if 'price' in data:
         validated['price'] = validate_number(data, 'price', required=False, min_value=0)
     return validated
 
-def validate_order_input(data, partial=False):
+def validate_order_input(data, partial=False, references=None):
     """Validate order creation/update input."""
     validated = {}
     required = not partial
@@ -157,7 +224,7 @@ def validate_order_input(data, partial=False):
                 raise ValueError("Each order item must be an object")
             # In the context of creating/updating an order, order_id is set by the controller.
             # Require menu_id and quantity for each item.
-            validated_items.append(validate_order_item_for_create(item))
+            validated_items.append(validate_order_item_for_create(item, references=references))
         validated['order_items'] = validated_items
     elif required:
         raise ValueError("order_items is required")
@@ -0,0 +1,24 @@
+"""ASGI entry point: the Flask app served on the event loop with the async engine.
+
+    pip install -r requirements-async.txt
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT --workers 2
+
+Every request runs the Flask app (same routes, hooks, errors, compression and
+headers as under gunicorn) in a SQLAlchemy greenlet (app/utils/greenlet_wsgi.py).
+SessionLocal and Model.query are bound to the async engine's sync facade, so
+each statement awaits asyncpg / aiosqlite instead of blocking a thread. The
+async engine's pool is the only pool serving requests.
+"""
+from app.config.async_database import async_engine
+from app.config.database import use_request_engine
+
+# Before the app is imported: Flask-SQLAlchemy picks up the engine in db.init_app()
+use_request_engine(async_engine.sync_engine)
+
+from app.utils.greenlet_wsgi import GreenletWSGIMiddleware  # noqa: E402
+from app.utils.profiler import profile_engine  # noqa: E402
+from main import app as flask_app  # noqa: E402
+
+profile_engine(async_engine.sync_engine)
+
+app = GreenletWSGIMiddleware(flask_app, on_shutdown=[async_engine.dispose])
@@ -0,0 +1,76 @@
+"""Benchmark: serialize + JSON-encode an order list with each JSON provider.
+
+Measures the full response body path (serializers -> app.json.response) for
+the stdlib provider Flask ships with and for FastJSONProvider, with and
+without native datetime passthrough. Uses the in-memory graphs from
+bench_serializers, so no database is needed:
+
+    python benchmarks/bench_json.py --orders 2000 --items 3
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app.utils import serializers  # noqa: E402
+from app.utils.json_provider import FastJSONProvider  # noqa: E402
+from bench_serializers import build_orders  # noqa: E402
+
+
+class _StringDatetimeProvider(FastJSONProvider):
+    # orjson encoding, but datetimes still formatted by the serializers
+    native_datetime = False
+
+
+def _make_app(provider_class):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tz", default=None, help="e.g. Asia/Jakarta")
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders, args.items)
+    cases = {
+        "stdlib json": _make_app(DefaultJSONProvider),
+        "orjson": _make_app(_StringDatetimeProvider),
+        "orjson + native dt": _make_app(FastJSONProvider),
+    }
+
+    def encode(app):
+        with app.app_context():
+            data = serializers.serialize_orders(orders, tz_name=args.tz)
+            return app.json.response(data).get_data()
+
+    bodies = {name: encode(app) for name, app in cases.items()}
+    baseline = json.loads(bodies["stdlib json"])
+    for name, body in bodies.items():
+        assert json.loads(body) == baseline, f"{name} output differs from stdlib output"
+
+    print(f"{args.orders} orders x {args.items} items, tz={args.tz}, "
+          f"body {len(bodies['stdlib json']) / 1024:.0f} KiB")
+    results = {}
+    for name, app in cases.items():
+        best = min(timeit.repeat(lambda: encode(app), number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"  {name:<20} {best * 1000:8.1f} ms")
+    for name in list(cases)[1:]:
+        print(f"  speedup {name}: {results['stdlib json'] / results[name]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
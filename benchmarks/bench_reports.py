@@ -0,0 +1,93 @@
+"""Benchmark: report queries over base tables vs the sales rollup tables.
+
+Seeds a throwaway SQLite database (or uses DATABASE_URL when --url is given)
+with synthetic orders spread over --days days, rebuilds the rollups and times
+each report statement both ways:
+
+    python benchmarks/bench_reports.py --orders 50000 --items 3 --days 90
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _seed(conn, orders, items, days, menus=40):
+    from sqlalchemy import insert
+    from app.models.category import Category
+    from app.models.menu import Menu
+    from app.models.order import Order
+    from app.models.order_item import OrderItem
+
+    rng = random.Random(42)
+    now = datetime.datetime(2024, 1, 1)
+    conn.execute(insert(Category), [{"category_id": i, "category_name": f"Category {i}", "created_at": now}
+                                    for i in range(1, 5)])
+    conn.execute(insert(Menu), [{"menu_id": i, "menu_name": f"Menu {i}", "price": rng.randint(5, 50),
+                                 "category_id": i % 4 + 1, "created_at": now} for i in range(1, menus + 1)])
+    conn.execute(insert(Order), [
+        {"order_id": i, "order_date": now + datetime.timedelta(seconds=rng.randrange(days * 86400)),
+         "created_at": now, "customer_name": f"Customer {i % 500}"}
+        for i in range(1, orders + 1)
+    ])
+    conn.execute(insert(OrderItem), [
+        {"order_id": i, "menu_id": rng.randint(1, menus), "quantity": rng.randint(1, 4),
+         "price": rng.randint(5, 50), "created_at": now}
+        for i in range(1, orders + 1) for _ in range(items)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", action="store_true", help="use DATABASE_URL instead of a temp SQLite file (must be empty)")
+    args = parser.parse_args()
+    if not args.url:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    from app.config.database import engine
+    from app.migrations import upgrade
+    from app.models.order import Order
+    from app.utils import analytics, rollups
+    from app.utils.filters import BucketBounds
+
+    upgrade()
+    with engine.begin() as conn:
+        _seed(conn, args.orders, args.items, args.days)
+    started = timeit.default_timer()
+    with engine.begin() as conn:
+        rollups.rebuild(conn)
+    print(f"{args.orders} orders x {args.items} items over {args.days} days; "
+          f"rebuild {timeit.default_timer() - started:.2f}s")
+
+    dialect = engine.dialect.name
+    start, end = datetime.datetime(2024, 1, 15), datetime.datetime(2024, 3, 1)
+    criteria = [Order.order_date >= start, Order.order_date < end]
+    bounds = BucketBounds(start, end)
+    cases = {
+        "revenue/day": (analytics.revenue_by_period_stmt(criteria, "day", dialect),
+                        analytics.rollup_revenue_by_period_stmt(bounds, "day", dialect)),
+        "revenue/hour": (analytics.revenue_by_period_stmt(criteria, "hour", dialect),
+                         analytics.rollup_revenue_by_period_stmt(bounds, "hour", dialect)),
+        "menus": (analytics.menu_sales_stmt(criteria), analytics.rollup_menu_sales_stmt(bounds)),
+        "categories": (analytics.category_sales_stmt(criteria), analytics.rollup_category_sales_stmt(bounds)),
+        "basket": (analytics.basket_stmt(criteria), analytics.rollup_basket_stmt(bounds)),
+    }
+    with engine.connect() as conn:
+        for name, (base, rollup) in cases.items():
+            timings = [min(timeit.repeat(lambda: conn.execute(stmt).all(), number=1, repeat=args.repeat))
+                       for stmt in (base, rollup)]
+            print(f"  {name:<12} base {timings[0] * 1000:8.1f} ms   rollup {timings[1] * 1000:7.2f} ms   "
+                  f"{timings[0] / timings[1]:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Micro-benchmark: compiled serializers vs the previous reflective model_to_dict.
+
+Builds transient Order -> OrderItem -> Menu -> Category graphs in memory with
+every column populated (as for rows loaded from the database), so no database
+is needed:
+
+    python benchmarks/bench_serializers.py --orders 2000 --items 3
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.models.category import Category  # noqa: E402
+from app.models.menu import Menu  # noqa: E402
+from app.models.order import Order  # noqa: E402
+from app.models.order_item import OrderItem  # noqa: E402
+from app.utils import serializers  # noqa: E402
+
+
+# Previous implementation, kept here as the comparison baseline ---------------
+
+def _legacy_serialize_datetime(value, tz_name=None, tz_style="offset"):
+    if not value:
+        return None
+    try:
+        if tz_name:
+            try:
+                value = value.astimezone(ZoneInfo(tz_name))
+            except Exception:
+                pass
+        s = value.isoformat()
+        if tz_style == "z":
+            if value.tzinfo and value.utcoffset() == timedelta(0):
+                s = s.replace("+00:00", "Z")
+        return s
+    except Exception:
+        return value.isoformat()
+
+
+def _legacy_model_to_dict(model, tz_name=None, tz_style="offset"):
+    data = {}
+    for column in model.__table__.columns:
+        value = getattr(model, column.name)
+        if isinstance(value, datetime):
+            value = _legacy_serialize_datetime(value, tz_name=tz_name, tz_style=tz_style)
+        data[column.name] = value
+    return data
+
+
+def _legacy_serialize_order(order, tz_name=None, tz_style="offset"):
+    data = _legacy_model_to_dict(order, tz_name, tz_style)
+    items = []
+    for oi in order.order_items:
+        item = _legacy_model_to_dict(oi, tz_name, tz_style)
+        menu = _legacy_model_to_dict(oi.menu, tz_name, tz_style)
+        menu["category"] = _legacy_model_to_dict(oi.menu.category)
+        item["menu"] = menu
+        items.append(item)
+    data["order_items"] = items
+    return data
+
+
+# Dataset ---------------------------------------------------------------------
+
+def build_orders(n_orders, items_per_order, n_menus=50):
+    now = datetime.utcnow()
+    categories = [
+        Category(category_id=i, category_name=f"Category {i}", created_at=now, updated_at=None, deleted_at=None)
+        for i in range(5)
+    ]
+    menus = [
+        Menu(menu_id=i, menu_name=f"Menu {i}", description="Lorem ipsum", price=10.0 + i, image_url=None,
+             category_id=i % 5, created_at=now, updated_at=now, deleted_at=None)
+        for i in range(n_menus)
+    ]
+    for m in menus:
+        m.category = categories[m.category_id]
+    orders = []
+    for o in range(n_orders):
+        order = Order(order_id=o, order_date=now, customer_name=f"Customer {o}", created_at=now,
+                      updated_at=None, deleted_at=None)
+        for j in range(items_per_order):
+            menu = menus[(o + j) % n_menus]
+            oi = OrderItem(order_item_id=o * items_per_order + j, order_id=o, menu_id=menu.menu_id,
+                           quantity=1 + j, price=menu.price, created_at=now, updated_at=None, deleted_at=None)
+            oi.menu = menu
+            order.order_items.append(oi)
+        orders.append(order)
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tz", default=None, help="e.g. Asia/Jakarta")
+    args = parser.parse_args()
+
+    orders = build_orders(args.orders, args.items)
+    legacy = [_legacy_serialize_order(o, args.tz) for o in orders]
+    compiled = serializers.serialize_orders(orders, tz_name=args.tz)
+    assert legacy == compiled, "compiled serializer output differs from legacy output"
+
+    cases = {
+        "legacy model_to_dict": lambda: [_legacy_serialize_order(o, args.tz) for o in orders],
+        "compiled serializers": lambda: serializers.serialize_orders(orders, tz_name=args.tz),
+    }
+    print(f"{args.orders} orders x {args.items} items, tz={args.tz}")
+    results = {}
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"  {name:<22} {best * 1000:8.1f} ms")
+    print(f"  speedup {results['legacy model_to_dict'] / results['compiled serializers']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
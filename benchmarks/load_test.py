@@ -0,0 +1,543 @@
+"""Load test: drive every API route against a seeded synthetic dataset.
+
+Seeds a throwaway SQLite database (or DATABASE_URL with --url, which must be
+an empty, migrated-or-new database) with --categories/--menus/--orders and
+--items per order, then sends --requests requests to each route in
+app/routes/web.py and reports p50/p95/p99 latency, throughput and SQL
+statements per request. Results are written as JSON so two runs can be
+compared:
+
+    python benchmarks/load_test.py run --output before.json
+    python benchmarks/load_test.py run --output after.json --compare before.json
+    python benchmarks/load_test.py compare before.json after.json --threshold 15
+
+By default requests go through the Flask test client in this process
+(statements are counted with an engine event, so streamed responses are
+included). With --gunicorn N (or --uvicorn N for the ASGI mode in asgi.py) a
+server with N workers is started on the seeded database, and --concurrency client threads send real HTTP
+requests; statements per request then come from the X-DB-Query-Count header
+(SQL_DEBUG_HEADERS is switched on for the server). --server URL targets an
+already running server instead; it must use the database seeded via --url.
+
+Write routes are exercised so that the dataset stays the same size: deletes
+alternate between soft delete and restore (categories, menus) or work
+through a reserved range of orders/items that the read routes never touch.
+"""
+import argparse
+import datetime
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULT_FORMAT = 1
+
+
+# Dataset ---------------------------------------------------------------------
+
+def seed(conn, categories, menus, orders, items, days, rng):
+    """Insert the synthetic dataset; returns {"categories": [...ids], "menus": [...], "orders": [...], "order_items": [...]}."""
+    from sqlalchemy import insert
+    from app.models.category import Category
+    from app.models.menu import Menu
+    from app.models.order import Order
+    from app.models.order_item import OrderItem
+
+    # Ids come back from RETURNING so PostgreSQL sequences stay in step for the write routes
+    now = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    category_ids = conn.scalars(
+        insert(Category).returning(Category.category_id, sort_by_parameter_order=True),
+        [{"category_name": f"Category {i}", "created_at": now} for i in range(categories)],
+    ).all()
+    menu_ids = conn.scalars(
+        insert(Menu).returning(Menu.menu_id, sort_by_parameter_order=True),
+        [{"menu_name": f"Menu {i}", "price": rng.randint(5, 50), "description": f"Synthetic menu {i}",
+          "category_id": category_ids[i % categories], "created_at": now} for i in range(menus)],
+    ).all()
+    order_ids = conn.scalars(
+        insert(Order).returning(Order.order_id, sort_by_parameter_order=True),
+        [{"order_date": now - datetime.timedelta(seconds=rng.randrange(days * 86400)),
+          "created_at": now, "customer_name": f"Customer {i % 500}"} for i in range(orders)],
+    ).all()
+    item_ids = conn.scalars(
+        insert(OrderItem).returning(OrderItem.order_item_id, sort_by_parameter_order=True),
+        [{"order_id": order_id, "menu_id": rng.choice(menu_ids), "quantity": rng.randint(1, 4),
+          "price": rng.randint(5, 50), "created_at": now}
+         for order_id in order_ids for _ in range(items)],
+    ).all()
+    return {"categories": list(category_ids), "menus": list(menu_ids),
+            "orders": list(order_ids), "order_items": list(item_ids)}
+
+
+def prepare_database(args):
+    from app.config.database import engine
+    from app.migrations import upgrade
+    from app.utils import rollups
+
+    upgrade()
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        ids = seed(conn, args.categories, args.menus, args.orders, args.items, args.days, random.Random(args.seed))
+        rollups.rebuild(conn)
+    print(f"seeded {args.categories} categories, {args.menus} menus, {args.orders} orders x {args.items} items "
+          f"({engine.dialect.name}) in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return engine.dialect.name, ids
+
+
+# Scenarios -------------------------------------------------------------------
+
+class Scenario:
+    """One route: rule as registered (for coverage), plus a factory for the i-th request."""
+
+    def __init__(self, name, method, rule, make):
+        self.name = name
+        self.method = method
+        self.rule = rule
+        self.make = make  # i -> (path, body, content_type)
+
+
+def _json(path, body=None):
+    return path, None if body is None else json.dumps(body).encode(), "application/json"
+
+
+def scenarios(ids, count, clients=1):
+    """Scenarios for every route in app/routes/web.py, for request indexes 0..count-1 (warmup included)."""
+    categories, menus, orders, items = ids["categories"], ids["menus"], ids["orders"], ids["order_items"]
+    if len(categories) <= clients or len(menus) <= clients:
+        raise SystemExit("--categories and --menus must be larger than --concurrency")
+    if len(orders) < 4 * count or not items:
+        raise SystemExit(f"--orders must be at least 4 x (--requests + --warmup) = {4 * count} "
+                         f"(and --items at least 1) so the write routes have rows to work through")
+    per_order = len(items) // len(orders)
+    # Orders are split into four ranges so no request hits a row another scenario changed:
+    # read/updated orders, items to delete, items to read/update, orders to delete
+    read_orders = orders[:count]
+    deletable_items = items[count * per_order:][:count]
+    read_items = items[2 * count * per_order:][:count]
+    deletable_orders = orders[-count:]
+    # Soft delete / restore alternate on rows kept out of the read ids; every client
+    # thread takes its own row so concurrent requests never race on one
+    toggle_categories, toggle_menus = categories[-clients:], menus[-clients:]
+    toggle_slots = itertools.count()
+    local = threading.local()
+    deleted = set()
+
+    def toggle(resource, rows):
+        if not hasattr(local, "slot"):
+            local.slot = next(toggle_slots)
+        row = rows[local.slot % len(rows)]
+        if (resource, row) in deleted:
+            deleted.discard((resource, row))
+            return f"/api/{resource}/{row}/2"
+        deleted.add((resource, row))
+        return f"/api/{resource}/{row}/1"
+
+    today = datetime.datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    window = urllib.parse.urlencode({"from": (today - datetime.timedelta(days=30)).isoformat(),
+                                     "to": today.isoformat()})
+
+    def pick(values):
+        return lambda i: values[i % len(values)]
+
+    menu = pick(menus[:-clients])
+    category = pick(categories[:-clients])
+    order = pick(read_orders)
+    item = pick(read_items)
+
+    def order_items(i):
+        return [{"menu_id": menu(i + k), "quantity": 1 + k} for k in range(3)]
+
+    def catalog_csv(i):
+        body = "category_name,menu_name,price\n" + "".join(
+            f"Imported {i % 5},Imported menu {i % 5}-{k},{10 + k}\n" for k in range(20))
+        return "/api/catalog/import", body.encode(), "text/csv"
+
+    return [
+        Scenario("index", "GET", "/api/", lambda i: _json("/api/")),
+        # Categories
+        Scenario("categories.list", "GET", "/api/categories", lambda i: _json("/api/categories")),
+        Scenario("categories.all", "GET", "/api/categories/all", lambda i: _json("/api/categories/all")),
+        Scenario("categories.get", "GET", "/api/categories/<int:category_id>",
+                 lambda i: _json(f"/api/categories/{category(i)}")),
+        Scenario("categories.create", "POST", "/api/categories",
+                 lambda i: _json("/api/categories", {"category_name": f"Load category {i}"})),
+        Scenario("categories.bulk_create", "POST", "/api/categories/bulk",
+                 lambda i: _json("/api/categories/bulk", [{"category_name": f"Bulk {i}-{k}"} for k in range(10)])),
+        Scenario("categories.bulk_update", "PUT", "/api/categories/bulk",
+                 lambda i: _json("/api/categories/bulk", [{"category_id": category(i + k),
+                                                           "category_name": f"Category {i}-{k}"} for k in range(10)])),
+        Scenario("categories.update", "PUT", "/api/categories/<int:category_id>",
+                 lambda i: _json(f"/api/categories/{category(i)}", {"category_name": f"Category v{i}"})),
+        Scenario("categories.delete", "DELETE", "/api/categories/<int:category_id>/<int:type>",
+                 lambda i: _json(toggle("categories", toggle_categories))),
+        # Menus
+        Scenario("menus.list", "GET", "/api/menus", lambda i: _json("/api/menus")),
+        Scenario("menus.list_by_category", "GET", "/api/menus",
+                 lambda i: _json(f"/api/menus?category_id={category(i)}")),
+        Scenario("menus.all", "GET", "/api/menus/all", lambda i: _json("/api/menus/all")),
+        Scenario("menus.static", "GET", "/api/menus_static", lambda i: _json("/api/menus_static")),
+        Scenario("menus.get", "GET", "/api/menus/<int:menu_id>", lambda i: _json(f"/api/menus/{menu(i)}")),
+        Scenario("menus.create", "POST", "/api/menus",
+                 lambda i: _json("/api/menus", {"menu_name": f"Load menu {i}", "price": 12,
+                                                "category_id": category(i)})),
+        Scenario("menus.bulk_create", "POST", "/api/menus/bulk",
+                 lambda i: _json("/api/menus/bulk", [{"menu_name": f"Bulk menu {i}-{k}", "price": 10 + k,
+                                                      "category_id": category(i + k)} for k in range(10)])),
+        Scenario("menus.bulk_update", "PUT", "/api/menus/bulk",
+                 lambda i: _json("/api/menus/bulk", [{"menu_id": menu(i + k), "price": 20 + k} for k in range(10)])),
+        Scenario("menus.update", "PUT", "/api/menus/<int:menu_id>",
+                 lambda i: _json(f"/api/menus/{menu(i)}", {"price": 10 + i % 7})),
+        Scenario("menus.delete", "DELETE", "/api/menus/<int:menu_id>/<int:type>",
+                 lambda i: _json(toggle("menus", toggle_menus))),
+        # Orders
+        Scenario("orders.list", "GET", "/api/orders", lambda i: _json("/api/orders")),
+        Scenario("orders.page", "GET", "/api/orders", lambda i: _json("/api/orders?limit=50")),
+        Scenario("orders.all", "GET", "/api/orders/all", lambda i: _json("/api/orders/all")),
+        Scenario("orders.get", "GET", "/api/orders/<int:order_id>", lambda i: _json(f"/api/orders/{order(i)}")),
+        Scenario("orders.create", "POST", "/api/orders",
+                 lambda i: _json("/api/orders", {"customer_name": f"Load {i}", "order_items": order_items(i)})),
+        Scenario("orders.update", "PUT", "/api/orders/<int:order_id>",
+                 lambda i: _json(f"/api/orders/{order(i)}", {"order_items": order_items(i + 1)})),
+        Scenario("orders.delete", "DELETE", "/api/orders/<int:order_id>",
+                 lambda i: _json(f"/api/orders/{deletable_orders[i % len(deletable_orders)]}")),
+        # Order items
+        Scenario("order_items.list", "GET", "/api/order_items", lambda i: _json("/api/order_items")),
+        Scenario("order_items.page", "GET", "/api/order_items", lambda i: _json("/api/order_items?limit=50")),
+        Scenario("order_items.all", "GET", "/api/order_items/all", lambda i: _json("/api/order_items/all")),
+        Scenario("order_items.get", "GET", "/api/order_items/<int:order_item_id>",
+                 lambda i: _json(f"/api/order_items/{item(i)}")),
+        Scenario("order_items.create", "POST", "/api/order_items",
+                 lambda i: _json("/api/order_items", {"order_id": order(i), "menu_id": menu(i), "quantity": 2})),
+        Scenario("order_items.update", "PUT", "/api/order_items/<int:order_item_id>",
+                 lambda i: _json(f"/api/order_items/{item(i)}", {"quantity": 1 + i % 5})),
+        Scenario("order_items.delete", "DELETE", "/api/order_items/<int:order_item_id>",
+                 lambda i: _json(f"/api/order_items/{deletable_items[i % len(deletable_items)]}")),
+        # Reports (hour-aligned window, so the rollup tables are used)
+        Scenario("reports.revenue", "GET", "/api/reports/revenue",
+                 lambda i: _json(f"/api/reports/revenue?{window}")),
+        Scenario("reports.revenue_hourly", "GET", "/api/reports/revenue",
+                 lambda i: _json(f"/api/reports/revenue?{window}&granularity=hour")),
+        Scenario("reports.menus", "GET", "/api/reports/menus", lambda i: _json(f"/api/reports/menus?{window}")),
+        Scenario("reports.categories", "GET", "/api/reports/categories",
+                 lambda i: _json(f"/api/reports/categories?{window}")),
+        Scenario("reports.basket", "GET", "/api/reports/basket", lambda i: _json(f"/api/reports/basket?{window}")),
+        # Catalog
+        Scenario("catalog.export", "GET", "/api/catalog/export", lambda i: _json("/api/catalog/export")),
+        Scenario("catalog.import", "POST", "/api/catalog/import", catalog_csv),
+    ]
+
+
+def uncovered_rules(app, scenario_list):
+    """(method, rule) pairs of the web blueprint that no scenario exercises."""
+    covered = {(s.method, s.rule) for s in scenario_list}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if not rule.endpoint.startswith("web."):
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            if (method, rule.rule) not in covered:
+                missing.append((method, rule.rule))
+    return missing
+
+
+# Clients ---------------------------------------------------------------------
+
+class TestClientDriver:
+    """Flask test client in this process; statements counted with an engine event."""
+
+    concurrency = 1
+
+    def __init__(self, app, engine):
+        from sqlalchemy import event
+
+        self.client = app.test_client()
+        self._statements = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self._statements += 1
+
+    def send(self, method, path, body, content_type):
+        self._statements = 0
+        started = time.perf_counter()
+        response = self.client.open(path, method=method, data=body, content_type=content_type)
+        response.get_data()  # drain streamed bodies
+        elapsed = time.perf_counter() - started
+        return response.status_code, elapsed, self._statements
+
+
+class HTTPDriver:
+    """Real HTTP with one keep-alive connection per client thread."""
+
+    def __init__(self, base_url, concurrency):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.concurrency = concurrency
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return conn
+
+    def send(self, method, path, body, content_type):
+        headers = {"Content-Type": content_type} if body is not None else {}
+        started = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._local.conn = None
+            return 0, time.perf_counter() - started, None
+        elapsed = time.perf_counter() - started
+        count = response.getheader("X-DB-Query-Count")
+        return response.status, elapsed, int(count) if count is not None else None
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+SERVERS = {
+    "gunicorn": lambda workers, port: ["-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "main:app"],
+    "uvicorn": lambda workers, port: ["-m", "uvicorn", "asgi:app", "--workers", str(workers),
+                                      "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+}
+
+
+def start_server(kind, workers):
+    port = _free_port()
+    env = {**os.environ, "SQL_DEBUG_HEADERS": "1"}
+    process = subprocess.Popen([sys.executable, *SERVERS[kind](workers, port)], cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{kind} exited during startup (is it installed?)")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"{kind} did not start within 30s")
+
+
+# Measurement -----------------------------------------------------------------
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def run_scenario(driver, scenario, requests, warmup):
+    for i in range(warmup):
+        driver.send(scenario.method, *scenario.make(requests + i))
+    samples = []
+    started = time.perf_counter()
+    if driver.concurrency == 1:
+        samples = [driver.send(scenario.method, *scenario.make(i)) for i in range(requests)]
+    else:
+        with ThreadPoolExecutor(driver.concurrency) as pool:
+            samples = list(pool.map(lambda i: driver.send(scenario.method, *scenario.make(i)), range(requests)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed for _, elapsed, _ in samples)
+    statements = [count for _, _, count in samples if count is not None]
+    statuses = {}
+    for status, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "method": scenario.method,
+        "rule": scenario.rule,
+        "requests": len(samples),
+        "errors": sum(1 for status, _, _ in samples if status == 0 or status >= 500),
+        "status": statuses,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_rps": round(len(samples) / wall, 1) if wall else None,
+        "queries_per_request": round(sum(statements) / len(statements), 2) if statements else None,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    # Slow-query and N+1 warnings would flood the output; the report carries the numbers
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    if args.url or args.server:
+        if not os.getenv("DATABASE_URL"):
+            raise SystemExit("--url/--server need DATABASE_URL")
+    else:
+        os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "load.db")
+
+    import main as application
+    from app.config.database import engine
+
+    dialect, ids = prepare_database(args)
+    server_kind = "gunicorn" if args.gunicorn else "uvicorn" if args.uvicorn else None
+    clients = args.concurrency if server_kind or args.server else 1
+    scenario_list = scenarios(ids, args.requests + args.warmup, clients)
+    missing = uncovered_rules(application.app, scenario_list)
+    if missing:
+        print("routes without a scenario: " + ", ".join(f"{m} {r}" for m, r in missing), file=sys.stderr)
+    if args.only:
+        scenario_list = [s for s in scenario_list if any(s.name.startswith(prefix) for prefix in args.only)]
+
+    server = None
+    if server_kind:
+        # The server's pool must not share connections opened while seeding
+        engine.dispose()
+        server, base_url = start_server(server_kind, args.gunicorn or args.uvicorn)
+        driver, mode = HTTPDriver(base_url, args.concurrency), server_kind
+    elif args.server:
+        driver, mode = HTTPDriver(args.server, args.concurrency), "http"
+    else:
+        driver, mode = TestClientDriver(application.app, engine), "test_client"
+
+    routes = {}
+    try:
+        for scenario in scenario_list:
+            routes[scenario.name] = result = run_scenario(driver, scenario, args.requests, args.warmup)
+            print(f"  {scenario.name:<26} p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+                  f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps'] or 0:8.1f} req/s  "
+                  f"{result['queries_per_request'] if result['queries_per_request'] is not None else '-':>6} q/req"
+                  f"{'  errors ' + str(result['errors']) if result['errors'] else ''}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "format": RESULT_FORMAT,
+        "meta": {
+            "revision": _git_revision(),
+            "started_at": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dialect": dialect,
+            "mode": mode,
+            "server_workers": args.gunicorn or args.uvicorn,
+            "concurrency": driver.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "dataset": {"categories": args.categories, "menus": args.menus, "orders": args.orders,
+                        "items_per_order": args.items, "days": args.days, "seed": args.seed},
+        },
+        "routes": routes,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    status = 1 if any(r["errors"] for r in routes.values()) else 0
+    if args.compare:
+        with open(args.compare) as f:
+            status = max(status, compare(json.load(f), report, args.threshold))
+    return status
+
+
+# Comparison ------------------------------------------------------------------
+
+def compare(baseline, current, threshold):
+    """Print per-route deltas; returns 1 when a route's p95 grew by more than threshold % or it runs more queries."""
+    for key in ("dialect", "mode", "concurrency", "dataset"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"note: {key} differs ({baseline['meta'].get(key)} -> {current['meta'].get(key)})", file=sys.stderr)
+    regressions = []
+    print(f"{'route':<26} {'p95 before':>11} {'p95 after':>10} {'change':>8} {'q/req':>13}")
+    for name, after in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            print(f"{name:<26} {'-':>11} {after['p95_ms']:10.2f}      new")
+            continue
+        change = (after["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        queries_before, queries_after = before.get("queries_per_request"), after.get("queries_per_request")
+        more_queries = queries_before is not None and queries_after is not None and queries_after > queries_before
+        flag = ""
+        if change > threshold or more_queries:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<26} {before['p95_ms']:11.2f} {after['p95_ms']:10.2f} {change:+7.1f}% "
+              f"{str(queries_before):>6}->{str(queries_after):<6}{flag}")
+    for name in baseline["routes"].keys() - current["routes"].keys():
+        print(f"{name:<26} missing from the current run")
+    if regressions:
+        print(f"{len(regressions)} route(s) regressed (p95 > +{threshold:g}% or more queries per request)")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed a dataset and load-test every route")
+    run_parser.add_argument("--categories", type=int, default=10)
+    run_parser.add_argument("--menus", type=int, default=200)
+    run_parser.add_argument("--orders", type=int, default=2000, help="at least 4 x (--requests + --warmup)")
+    run_parser.add_argument("--items", type=int, default=3, help="items per order")
+    run_parser.add_argument("--days", type=int, default=60, help="spread order dates over this many days")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    run_parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per route")
+    run_parser.add_argument("--only", nargs="+", metavar="PREFIX", help="only scenarios whose name starts with PREFIX")
+    run_parser.add_argument("--url", action="store_true", help="seed DATABASE_URL instead of a temp SQLite file (must be empty)")
+    servers = run_parser.add_mutually_exclusive_group()
+    servers.add_argument("--gunicorn", type=int, metavar="WORKERS", help="serve main:app with gunicorn and send real HTTP requests")
+    servers.add_argument("--uvicorn", type=int, metavar="WORKERS", help="serve asgi:app (async mode) with uvicorn")
+    servers.add_argument("--server", metavar="URL", help="send HTTP requests to a running server (implies --url)")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="client threads for --gunicorn/--uvicorn/--server")
+    run_parser.add_argument("--output", "-o", help="write results JSON here (default: stdout)")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous results JSON")
+    run_parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 increase in %% for --compare")
+
+    compare_parser = commands.add_parser("compare", help="compare two results JSON files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 increase in %%")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return compare(baseline, current, args.threshold)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
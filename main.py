@@ -5,12 +5,17 @@ import logging
 
 # Import our blueprint and database
 from app.routes.web import web
-from app.config.database import db
-
-print("DEBUG DATABASE_URL =", os.getenv("DATABASE_URL"))
+from app.config.database import db, get_pool_stats
+from app.utils.compression import compress_response
+from app.utils.json_provider import FastJSONProvider
+from app.utils.metrics import init_metrics
+from app.utils.profiler import init_profiler
+from app.utils.request_logging import REQUEST_ID_HEADER, configure_logging, init_request_logging
 
 
 app = Flask(__name__)
+# orjson-backed JSON encoding (falls back to the stdlib provider if not installed)
+app.json = FastJSONProvider(app)
 
 # Configure Flask settings
 app.config.update(
@@ -21,11 +26,8 @@ app.config.update(
 # Ensure exceptions propagate so our error handlers/logging can capture them
 app.config['PROPAGATE_EXCEPTIONS'] = True
 
-# Configure application logging
-logging.basicConfig(
-    level=os.getenv("LOG_LEVEL", "INFO"),
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
-)
+# Structured (JSON) logging through a background queue listener
+configure_logging()
 logger = logging.getLogger("3awan")
 logger.info("Starting 3awan CafeResto API")
 
@@ -33,7 +35,7 @@ logger.info("Starting 3awan CafeResto API")
 db.init_app(app)
 
 # Import all model modules to ensure SQLAlchemy relationships/backrefs are registered
-from app.models import category, menu, order, order_item  # noqa: F401
+from app.models import category, menu, order, order_item, catalog_version, sales_rollup  # noqa: F401
 
 # Configure CORS (dapat dikonfigurasi via env CORS_ORIGINS)
 origins_env = os.environ.get("CORS_ORIGINS", app.config.get('CORS_ORIGINS', '*'))
@@ -42,40 +44,51 @@ if origins_env.strip() == "*":
 else:
     allowed_origins = [o.strip() for o in origins_env.split(",") if o.strip()]
 
+cors_options = {
+    "origins": allowed_origins,
+    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    "allow_headers": [
+        "Content-Type",
+        "Authorization",
+        "X-Requested-With",
+        "Accept",
+        "Origin",
+        "Cache-Control",
+        "Pragma",
+        REQUEST_ID_HEADER,
+    ],
+    "expose_headers": [
+        "Content-Type",
+        "Authorization",
+        REQUEST_ID_HEADER,
+        "X-DB-Query-Count",
+        "X-DB-Time-Ms",
+        "X-DB-Max-Repeat",
+    ],
+    "max_age": 86400,
+}
+
 CORS(
     app,
-    resources={
-        r"/*": {
-            "origins": allowed_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": [
-                "Content-Type",
-                "Authorization",
-                "X-Requested-With",
-                "Accept",
-                "Origin",
-                "Cache-Control",
-                "Pragma",
-            ],
-            "expose_headers": [
-                "Content-Type",
-                "Authorization",
-            ],
-        }
-    },
+    resources={r"/*": cors_options},
     supports_credentials=False,
     send_wildcard=(allowed_origins == "*"),
-    max_age=86400,
 )
 
-# Buat tabel otomatis jika belum ada (di context aplikasi)
-with app.app_context():
-    try:
-        db.create_all()
-    except Exception:
-        # Jika database tidak terkonfigurasi/terjangkau, tetap lanjutkan
-        logger.exception("Failed to run db.create_all()")
-        pass
+# Request IDs (X-Request-ID) and the access log; registered first so every other
+# hook's records carry the ID and the access log sees the final response
+init_request_logging(app)
+
+# Prometheus metrics at /metrics; registered before compression so its after_request hook sees the sent body
+init_metrics(app)
+
+# X-DB-* query count/time headers (SQL_DEBUG_HEADERS) and the slow-query log
+init_profiler(app)
+
+# gzip/brotli for JSON responses (negotiated via Accept-Encoding)
+app.after_request(compress_response)
+
+# Schema changes are applied by `python -m app.migrations upgrade` (no DDL at startup)
 
 # Daftarkan blueprint
 app.register_blueprint(web)
@@ -92,6 +105,11 @@ def debug_routes():
         })
     return {"routes": routes}, 200
 
+# Connection pool usage and checkout wait time
+@app.route('/debug_pool', methods=['GET'])
+def debug_pool():
+    return get_pool_stats(), 200
+
 # Global error handlers to surface exceptions clearly
 @app.errorhandler(Exception)
 def handle_exception(e):
@@ -103,16 +121,6 @@ def handle_exception(e):
         # Fallback to plain text if jsonify fails
         return "Internal Server Error", 500
 
-# Basic request logging to trace endpoints
-@app.before_request
-def log_request_start():
-    logging.getLogger("3awan").info(f"Request start: {os.environ.get('REQUEST_ID','')} {__name__}")
-
-@app.after_request
-def log_request_end(response):
-    logging.getLogger("3awan").info(f"Request end: status={response.status_code} content_type={response.content_type}")
-    return response
-
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
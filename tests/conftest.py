@@ -0,0 +1,55 @@
+"""Shared test setup: every test module runs against one temporary SQLite database.
+
+The environment is set here because pytest imports conftest before the test
+modules, and the engine binds DATABASE_URL when ``main`` is first imported.
+The ``database`` fixture empties and re-migrates it, so each module starts
+from a fresh schema.
+"""
+import os
+import tempfile
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "tests.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + DATABASE_PATH
+# Background polls and folds would make the results depend on timing
+os.environ["CATALOG_SYNC"] = "false"
+os.environ["ROLLUP_FOLD_INTERVAL"] = "3600"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+
+
+def reset_schema(engine):
+    """Start over from an empty database file (no tables, not even schema_migrations)."""
+    engine.dispose()
+    if os.path.exists(DATABASE_PATH):
+        os.remove(DATABASE_PATH)
+
+
+@pytest.fixture
+def empty_database():
+    """Database without any tables; yields the engine."""
+    from app.config.database import engine
+
+    reset_schema(engine)
+    yield engine
+
+
+@pytest.fixture(scope="module")
+def database():
+    """Empty, fully migrated database for the module; yields the engine."""
+    from app.config.database import engine
+    from app.migrations import upgrade
+    from app.utils.cache import catalog_cache
+
+    reset_schema(engine)
+    upgrade()
+    # Cached catalog responses and menu prices belong to the previous module's rows
+    catalog_cache.invalidate()
+    yield engine
+
+
+@pytest.fixture(scope="module")
+def client(database):
+    import main
+
+    return main.app.test_client()
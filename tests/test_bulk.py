@@ -0,0 +1,108 @@
+"""Bulk create/update endpoints: per-row results, partial writes and ?atomic=true."""
+import pytest
+from sqlalchemy import func, select
+
+from app.models.category import Category
+from app.models.menu import Menu
+
+
+def _menu_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Menu)).scalar()
+
+
+@pytest.fixture(scope="module")
+def category_id(client):
+    response = client.post("/api/categories", json={"category_name": "Drinks"})
+    assert response.status_code == 201
+    return response.get_json()["category_id"]
+
+
+def _rows(category_id):
+    """Two valid rows around an invalid price and a missing category."""
+    return [
+        {"menu_name": "Tea", "price": 3, "category_id": category_id},
+        {"menu_name": "Coffee", "price": "free", "category_id": category_id},
+        {"menu_name": "Juice", "price": 4, "category_id": 999999},
+        {"menu_name": "Water", "price": 1, "category_id": category_id},
+    ]
+
+
+def test_partial_create_writes_the_valid_rows(client, database, category_id):
+    before = _menu_count(database)
+    response = client.post("/api/menus/bulk", json=_rows(category_id))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["created"], body["failed"]) == (2, 2)
+    assert [r["status"] for r in body["results"]] == ["created", "error", "error", "created"]
+    assert [r["index"] for r in body["results"]] == [0, 1, 2, 3]
+    assert "price" in body["results"][1]["error"]
+    assert body["results"][2]["error"] == "Referenced Category with id 999999 not found"
+    assert _menu_count(database) == before + 2
+
+    created = [r["menu_id"] for r in body["results"] if r["status"] == "created"]
+    with database.connect() as conn:
+        names = conn.execute(select(Menu.menu_name).where(Menu.menu_id.in_(created)).order_by(Menu.menu_id))
+        assert names.scalars().all() == ["Tea", "Water"]
+
+
+def test_atomic_create_rejects_the_whole_batch(client, database, category_id):
+    before = _menu_count(database)
+    response = client.post("/api/menus/bulk?atomic=true", json={"items": _rows(category_id)})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert (body["created"], body["failed"]) == (0, 2)
+    assert [r["status"] for r in body["results"]] == ["skipped", "error", "error", "skipped"]
+    assert _menu_count(database) == before
+
+
+def test_atomic_create_of_valid_rows(client, database, category_id):
+    before = _menu_count(database)
+    rows = [row for i, row in enumerate(_rows(category_id)) if i in (0, 3)]
+    response = client.post("/api/menus/bulk?atomic=true", json=rows)
+    assert response.status_code == 200
+    assert response.get_json()["created"] == 2
+    assert _menu_count(database) == before + 2
+
+
+def test_update_reports_missing_and_duplicate_ids(client, database, category_id):
+    tea, water = [r["menu_id"] for r in client.post(
+        "/api/menus/bulk", json=[{"menu_name": "Tea", "price": 3, "category_id": category_id},
+                                 {"menu_name": "Water", "price": 1, "category_id": category_id}],
+    ).get_json()["results"]]
+    rows = [
+        {"menu_id": tea, "price": 5},
+        {"menu_id": 999999, "price": 2},
+        {"menu_id": tea, "price": 6},
+        {"menu_id": water, "menu_name": "Sparkling water"},
+    ]
+
+    atomic = client.put("/api/menus/bulk?atomic=true", json=rows)
+    assert atomic.status_code == 400
+    assert [r["status"] for r in atomic.get_json()["results"]] == ["skipped", "error", "error", "skipped"]
+
+    response = client.put("/api/menus/bulk", json=rows)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["updated"], body["failed"]) == (2, 2)
+    assert body["results"][1]["error"] == "Menu not found"
+    assert body["results"][2]["error"] == f"Duplicate menu_id {tea}"
+    with database.connect() as conn:
+        stored = dict(conn.execute(select(Menu.menu_id, Menu.price).where(Menu.menu_id.in_([tea, water]))).all())
+        assert stored == {tea: 5, water: 1}
+        assert conn.execute(select(Menu.menu_name).where(Menu.menu_id == water)).scalar() == "Sparkling water"
+
+
+def test_category_bulk_create(client, database):
+    response = client.post("/api/categories/bulk", json=[{"category_name": "Snacks"}, {"category_name": "x" * 101}])
+    assert response.status_code == 200
+    assert [r["status"] for r in response.get_json()["results"]] == ["created", "error"]
+    with database.connect() as conn:
+        assert conn.execute(select(func.count()).where(Category.category_name == "Snacks")).scalar() == 1
+
+
+@pytest.mark.parametrize("body", [[], {}, {"items": "x"}, None])
+def test_malformed_body_returns_400(client, body):
+    response = client.post("/api/menus/bulk", json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a non-empty JSON array"}
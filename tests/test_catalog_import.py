@@ -0,0 +1,112 @@
+"""Catalog import: category auto-creation, menu upserts, per-line errors and dry runs."""
+import io
+
+import pytest
+from sqlalchemy import select
+
+from app.config.database import SessionLocal
+from app.models.category import Category
+from app.models.menu import Menu
+from app.utils.catalog_io import import_catalog
+
+CSV = """category_name,menu_name,price,description,image_url
+Drinks,Iced Tea,5.0,Cold,
+Drinks,Coffee,4.5,,
+Desserts,,,,
+Snacks,Fries,3,,http://img/fries.png
+"""
+
+
+def _import(client, body, content_type="text/csv", query=""):
+    return client.post(f"/api/catalog/import{query}", data=body, content_type=content_type)
+
+
+def _catalog(engine):
+    """{(category_name, menu_name): price} of the active catalog (menu_name None for empty categories)."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(Category.category_name, Menu.menu_name, Menu.price)
+            .outerjoin(Menu, Menu.category_id == Category.category_id)
+            .where(Category.deleted_at.is_(None))
+        )
+        return {(category, menu): price for category, menu, price in rows}
+
+
+@pytest.fixture(scope="module")
+def imported(client):
+    response = _import(client, CSV)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_creates_missing_categories_and_menus(imported, database):
+    assert imported["rows"] == 4
+    assert imported["categories_created"] == 3
+    assert (imported["menus_created"], imported["menus_updated"], imported["failed"]) == (3, 0, 0)
+    assert _catalog(database) == {
+        ("Drinks", "Iced Tea"): 5.0, ("Drinks", "Coffee"): 4.5,
+        ("Desserts", None): None, ("Snacks", "Fries"): 3.0,
+    }
+
+
+def test_reimport_updates_matching_menus(imported, client, database):
+    body = "category_name,menu_name,price\nDrinks,Coffee,6\nDrinks,Latte,7\nDesserts,Cake,8\n"
+    stats = _import(client, body).get_json()
+    assert (stats["categories_created"], stats["menus_created"], stats["menus_updated"]) == (0, 2, 1)
+    catalog = _catalog(database)
+    assert catalog[("Drinks", "Coffee")] == 6.0
+    assert catalog[("Drinks", "Latte")] == 7.0
+    assert catalog[("Desserts", "Cake")] == 8.0
+    with database.connect() as conn:
+        assert conn.execute(select(Menu.menu_id).where(Menu.menu_name == "Coffee")).scalars().all() == [2]
+
+
+def test_invalid_rows_are_reported_by_line(imported, client, database):
+    body = (
+        '{"category_name": "Tea", "menu_name": "Green", "price": 2}\n'
+        '{"category_name": "Tea", "menu_name": "Black", "price": -1}\n'
+        "\n"
+        "not json\n"
+        '{"menu_name": "Orphan", "price": 1}\n'
+        '["a list"]\n'
+    )
+    stats = _import(client, body, content_type="application/x-ndjson").get_json()
+    assert stats["rows"] == 5
+    assert (stats["menus_created"], stats["failed"]) == (1, 4)
+    assert [error["line"] for error in stats["errors"]] == [2, 4, 5, 6]
+    assert stats["errors"][1]["error"] == "invalid JSON"
+    assert stats["errors"][3]["error"] == "row must be an object"
+    assert _catalog(database)[("Tea", "Green")] == 2.0
+
+
+def test_dry_run_writes_nothing(imported, client, database):
+    before = _catalog(database)
+    stats = _import(client, "category_name,menu_name,price\nBrunch,Pancakes,9\n", query="?dry_run=true").get_json()
+    assert stats["dry_run"] is True
+    assert (stats["categories_created"], stats["menus_created"]) == (1, 1)
+    assert _catalog(database) == before
+
+
+@pytest.mark.parametrize("body, query", [
+    ("name,price\nx,1\n", ""),
+    (CSV, "?format=xml"),
+])
+def test_bad_header_or_format_returns_400(imported, client, body, query):
+    response = _import(client, body, query=query)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_chunks_resolve_categories_created_earlier(database):
+    lines = ["category_name,menu_name,price"] + [f"Chunked {i % 2},Item {i},1" for i in range(5)]
+    with SessionLocal() as db:
+        stats = import_catalog(db, io.StringIO("\n".join(lines) + "\n"), "csv", chunk_size=2)
+        db.rollback()
+    assert (stats.rows, stats.categories_created, stats.menus_created, stats.failed) == (5, 2, 5, 0)
+
+
+def test_export_round_trips_through_import(imported, client, database):
+    exported = client.get("/api/catalog/export?format=ndjson").get_data(as_text=True)
+    stats = _import(client, exported, content_type="application/x-ndjson", query="?dry_run=true").get_json()
+    assert (stats["failed"], stats["categories_created"], stats["menus_created"]) == (0, 0, 0)
+    assert stats["menus_updated"] == sum(1 for menu in _catalog(database).values() if menu is not None)
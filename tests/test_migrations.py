@@ -0,0 +1,84 @@
+"""Migration runner: ordering, targets, idempotency, rollback of a failed migration and seed rows."""
+import types
+
+import pytest
+from sqlalchemy import inspect, insert, select, text
+
+from app.migrations import __main__ as cli
+from app.migrations import discover_migrations, pending_migrations, runner, upgrade
+from app.models.catalog_version import CatalogVersion
+from app.models.order import Order
+from app.models.sales_rollup import SalesRollupState
+
+
+def _applied(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(runner.schema_migrations.c.version).order_by("version")).scalars().all()
+
+
+def test_versions_are_unique_and_ordered():
+    versions = [m.version for m in discover_migrations()]
+    assert versions == sorted(versions, key=int)
+    assert len(set(versions)) == len(versions)
+    assert all(m.description for m in discover_migrations())
+
+
+def test_upgrade_applies_everything_once(empty_database):
+    versions = [m.version for m in discover_migrations()]
+    assert upgrade() == versions
+    assert _applied(empty_database) == versions
+    assert pending_migrations() == []
+    assert upgrade() == []
+    assert {"orders", "order_items", "menus", "categories", "catalog_version"} <= set(
+        inspect(empty_database).get_table_names()
+    )
+
+
+def test_target_stops_after_that_version(empty_database):
+    assert upgrade(target="0003") == ["0001", "0002", "0003"]
+    assert [m.version for m in pending_migrations()][0] == "0004"
+    assert "catalog_version" not in inspect(empty_database).get_table_names()
+    assert upgrade()[0] == "0004"
+    assert pending_migrations() == []
+
+
+def test_failed_migration_is_rolled_back(empty_database, monkeypatch):
+    upgrade()
+
+    def broken(conn):
+        conn.execute(text("CREATE TABLE half_done (id INTEGER)"))
+        raise RuntimeError("boom")
+
+    module = types.SimpleNamespace(__doc__="Broken migration.", upgrade=broken)
+    migrations = discover_migrations() + [runner.Migration("9999", "broken", module)]
+    monkeypatch.setattr(runner, "discover_migrations", lambda: migrations)
+    with pytest.raises(RuntimeError, match="boom"):
+        upgrade()
+    assert "half_done" not in inspect(empty_database).get_table_names()
+    assert "9999" not in _applied(empty_database)
+    assert [m.version for m in pending_migrations()] == ["9999"]
+
+
+def test_seed_rows(empty_database):
+    upgrade()
+    with empty_database.connect() as conn:
+        assert conn.execute(select(CatalogVersion.id, CatalogVersion.version)).all() == [(1, 0)]
+        assert conn.execute(select(SalesRollupState.ready)).scalars().all() == [True]
+
+
+def test_rollups_start_unready_on_existing_orders(empty_database):
+    upgrade(target="0007")
+    with empty_database.begin() as conn:
+        conn.execute(insert(Order.__table__), [{"customer_name": "Existing"}])
+    upgrade()
+    with empty_database.connect() as conn:
+        assert conn.execute(select(SalesRollupState.ready)).scalar() is False
+
+
+def test_status_command(empty_database, capsys):
+    upgrade(target="0002")
+    assert cli.main(["status"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split()[:2] == ["0001", "applied"]
+    assert lines[2].split()[:2] == ["0003", "pending"]
+    assert len(lines) == len(discover_migrations())
@@ -0,0 +1,119 @@
+"""Keyset pagination: cursor encoding, page walks and rejected parameters."""
+import datetime
+
+import pytest
+from sqlalchemy import insert
+from werkzeug.datastructures import MultiDict
+
+from app.models.order import Order
+from app.utils.pagination import decode_cursor, encode_cursor, get_page_params
+
+ORDERS = 7
+START = datetime.datetime(2024, 5, 1, 12, 0)
+
+
+def _params(**args):
+    return get_page_params(MultiDict(args), Order.order_id, {"order_date": Order.order_date})
+
+
+@pytest.fixture(scope="module")
+def orders(database):
+    """Order ids; order_date repeats in pairs so date pages need the id tie-breaker."""
+    with database.begin() as conn:
+        return conn.execute(insert(Order).returning(Order.order_id), [
+            {"order_date": START + datetime.timedelta(hours=i // 2), "customer_name": f"Customer {i}"}
+            for i in range(ORDERS)
+        ]).scalars().all()
+
+
+def _walk(client, url):
+    """Follow next_cursor from url to the last page; returns (ids, pages)."""
+    ids, pages, after = [], 0, None
+    while True:
+        response = client.get(url + (f"&after={after}" if after else ""))
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        ids += [order["order_id"] for order in body["data"]]
+        pages += 1
+        after = body["next_cursor"]
+        if after is None:
+            return ids, pages
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("-order_date", [START, 42])
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == ("-order_date", [START.isoformat(), 42])
+
+    page = _params(sort="-order_date", after=cursor, limit="5")
+    assert page.after == [START, 42]
+    assert page.limit == 5
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", encode_cursor("id", [1])[:-2], "WyJpZCIsIDFd"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="after must be a cursor"):
+        _params(after=cursor)
+
+
+def test_cursor_must_match_sort():
+    with pytest.raises(ValueError, match="does not match the requested sort"):
+        _params(sort="order_date", after=encode_cursor("id", [3]))
+
+
+def test_limit_parsing():
+    assert not _params().paginated
+    assert _params(after=encode_cursor("id", [1])).limit == 50
+    assert _params(limit="100000").limit == 500
+    for limit in ("0", "ten"):
+        with pytest.raises(ValueError):
+            _params(limit=limit)
+
+
+def test_export_rejects_limit_but_keeps_after():
+    args = MultiDict({"after": encode_cursor("id", [4])})
+    page = get_page_params(args, Order.order_id, export=True)
+    assert page.after == [4] and not page.paginated
+    with pytest.raises(ValueError, match="limit does not apply"):
+        get_page_params(MultiDict({"limit": "5"}), Order.order_id, export=True)
+
+
+def test_pages_cover_every_row_once(client, orders):
+    ids, pages = _walk(client, "/api/orders?limit=3")
+    assert ids == sorted(orders)
+    assert pages == 3
+
+
+def test_descending_date_pages_break_ties_by_id(client, orders):
+    ids, _ = _walk(client, "/api/orders?limit=2&sort=-order_date")
+    assert ids == sorted(orders, key=lambda order_id: (orders.index(order_id) // 2, order_id), reverse=True)
+
+
+def test_last_page_has_no_cursor(client, orders):
+    body = client.get(f"/api/orders?limit={ORDERS}").get_json()
+    assert len(body["data"]) == ORDERS
+    assert body["next_cursor"] is None
+    assert body["limit"] == ORDERS
+
+
+def test_legacy_array_without_limit_or_after(client, orders):
+    body = client.get("/api/orders").get_json()
+    assert isinstance(body, list)
+    assert [order["order_id"] for order in body] == sorted(orders)
+
+
+@pytest.mark.parametrize("query", ["after=garbage", "limit=0", "limit=x", "sort=price",
+                                   f"sort=order_date&after={encode_cursor('id', [1])}"])
+def test_bad_page_arguments_return_400(client, orders, query):
+    response = client.get(f"/api/orders?{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_ndjson_export_resumes_after_cursor(client, orders):
+    cursor = client.get("/api/orders?limit=3").get_json()["next_cursor"]
+    response = client.get(f"/api/orders/all?format=ndjson&after={cursor}")
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == ORDERS - 3
+    assert client.get("/api/orders/all?format=ndjson&limit=3").status_code == 400
@@ -0,0 +1,119 @@
+"""SQL statements per request must not grow with the data.
+
+Seeds the test database (see conftest.py) at two sizes, counts the statements each
+route executes (engine ``before_cursor_execute``) and checks that the count
+is the same at both sizes and within the route's budget. A budget catches an
+extra per-request query even when its cost, not its count, grows with the
+tables (e.g. a full-table aggregate).
+"""
+import datetime
+
+import pytest
+from sqlalchemy import event, func, insert, select
+
+import main
+from app.config.database import engine
+from app.models.category import Category
+from app.models.menu import Menu
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.utils.cache import catalog_cache
+
+SMALL, LARGE = 5, 120
+
+# route -> most statements allowed per request (detail and order pages include the ETag validator)
+READ_BUDGETS = {
+    "/api/categories": 1,
+    "/api/categories/all": 1,
+    "/api/categories/1": 2,
+    "/api/menus": 1,
+    "/api/menus/all": 1,
+    "/api/menus?category_id=1": 1,
+    "/api/menus/1": 2,
+    "/api/orders": 4,
+    "/api/orders?limit=20&sort=-order_date": 4,
+    "/api/orders?fields=order_id,customer_name&expand=": 2,
+    "/api/orders?menu_id=1&from=2024-01-01": 4,
+    "/api/orders/all": 4,
+    "/api/orders/1": 2,
+    "/api/order_items": 3,
+    "/api/order_items/all": 3,
+    "/api/order_items/1": 3,
+    "/api/reports/revenue": 1,
+    "/api/reports/menus": 1,
+    "/api/reports/basket": 1,
+}
+ORDER_CREATE_BUDGET = 5
+
+
+def _seed(count):
+    """Add categories, menus and orders (3 items each, every 10th order soft-deleted) up to count."""
+    now = datetime.datetime(2024, 5, 1, 12, 0)
+    with engine.begin() as conn:
+        start = conn.execute(select(func.count()).select_from(Order)).scalar()
+        categories = conn.execute(insert(Category).returning(Category.category_id), [
+            {"category_name": f"Category {i}", "created_at": now} for i in range(start, count)
+        ]).scalars().all()
+        menus = conn.execute(insert(Menu).returning(Menu.menu_id), [
+            {"menu_name": f"Menu {i}", "price": 5 + i % 7, "category_id": categories[i % len(categories)],
+             "created_at": now}
+            for i in range(3 * (count - start))
+        ]).scalars().all()
+        orders = conn.execute(insert(Order).returning(Order.order_id), [
+            {"order_date": now + datetime.timedelta(minutes=i), "customer_name": f"Customer {i}",
+             "deleted_at": now if i % 10 == 9 else None}
+            for i in range(start, count)
+        ]).scalars().all()
+        conn.execute(insert(OrderItem), [
+            {"order_id": order_id, "menu_id": menus[(i + k) % len(menus)], "quantity": 1 + k, "price": 5.0}
+            for i, order_id in enumerate(orders) for k in range(3)
+        ])
+
+
+def _count(client, method, url, **kwargs):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = getattr(client, method)(url, **kwargs)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code in (200, 201), (url, response.status_code, response.get_data(as_text=True))
+    return len(statements)
+
+
+def _order_body():
+    return {"customer_name": "Test", "order_items": [{"menu_id": 1, "quantity": 2}, {"menu_id": 2, "quantity": 1}]}
+
+
+@pytest.fixture(scope="module")
+def counts(database):
+    client = main.app.test_client()
+    measured = {}
+    for size in (SMALL, LARGE):
+        _seed(size)
+        for url in READ_BUDGETS:
+            client.get(url)  # warm-up: configures the mappers
+            # Measure the database work, not a catalog cache hit
+            catalog_cache.invalidate()
+            measured.setdefault(url, []).append(_count(client, "get", url))
+        # Warm-up refills the price index after the invalidations above
+        client.post("/api/orders", json=_order_body())
+        measured.setdefault("POST /api/orders", []).append(_count(client, "post", "/api/orders", json=_order_body()))
+    return measured
+
+
+@pytest.mark.parametrize("url", sorted(READ_BUDGETS))
+def test_read_statements_do_not_grow(counts, url):
+    small, large = counts[url]
+    assert small == large, f"{url}: {small} statements with {SMALL} orders, {large} with {LARGE}"
+    assert large <= READ_BUDGETS[url], f"{url}: {large} statements (budget {READ_BUDGETS[url]})"
+
+
+def test_order_create_statements_do_not_grow(counts):
+    small, large = counts["POST /api/orders"]
+    assert small == large
+    assert large <= ORDER_CREATE_BUDGET, f"POST /api/orders: {large} statements (budget {ORDER_CREATE_BUDGET})"
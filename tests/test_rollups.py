@@ -0,0 +1,154 @@
+"""Sales rollups must equal a GROUP BY over the base tables after every kind of order write."""
+import datetime
+from collections import defaultdict
+
+import pytest
+from sqlalchemy import and_, insert, select
+
+from app.config.database import SessionLocal
+from app.models.category import Category
+from app.models.menu import Menu
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.sales_rollup import MenuSalesDaily, MenuSalesHourly, SalesDaily, SalesHourly, SalesRollupDelta
+from app.utils.rollups import fold, rebuild
+
+DAY = datetime.datetime(2024, 5, 1)
+REPORT_RANGE = "from=2024-04-30&to=2030-01-01"
+
+
+def _hour(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _base_totals(conn):
+    """The four rollups recomputed in Python from the active orders and items."""
+    rows = conn.execute(
+        select(Order.order_id, Order.order_date, OrderItem.menu_id, OrderItem.quantity, OrderItem.price)
+        .join(Order, and_(OrderItem.order_id == Order.order_id,
+                          OrderItem.deleted_at.is_(None), Order.deleted_at.is_(None)))
+    ).all()
+    orders = defaultdict(set)
+    totals = {name: defaultdict(lambda: [0, 0.0]) for name in ("hourly", "daily", "menu_hourly", "menu_daily")}
+    for order_id, order_date, menu_id, quantity, price in rows:
+        hour = _hour(order_date)
+        for name, key in (("hourly", hour), ("daily", hour.date()),
+                          ("menu_hourly", (hour, menu_id)), ("menu_daily", (hour.date(), menu_id))):
+            totals[name][key][0] += quantity
+            totals[name][key][1] += quantity * price
+        orders[hour].add(order_id)
+        orders[hour.date()].add(order_id)
+    result = {name: {key: (q, round(r, 2)) for key, (q, r) in values.items()} for name, values in totals.items()}
+    for name in ("hourly", "daily"):
+        result[name] = {key: (len(orders[key]), *value) for key, value in result[name].items()}
+    return result
+
+
+def _rollup_totals(conn):
+    def read(model, keys, values):
+        return {
+            row[0] if len(keys) == 1 else tuple(row[:len(keys)]):
+                tuple(row[len(keys):-1]) + (round(row[-1], 2),)
+            for row in conn.execute(select(*keys, *values))
+        }
+    return {
+        "hourly": read(SalesHourly, [SalesHourly.bucket_start],
+                       [SalesHourly.orders, SalesHourly.quantity, SalesHourly.revenue]),
+        "daily": read(SalesDaily, [SalesDaily.bucket_date],
+                      [SalesDaily.orders, SalesDaily.quantity, SalesDaily.revenue]),
+        "menu_hourly": read(MenuSalesHourly, [MenuSalesHourly.bucket_start, MenuSalesHourly.menu_id],
+                            [MenuSalesHourly.quantity, MenuSalesHourly.revenue]),
+        "menu_daily": read(MenuSalesDaily, [MenuSalesDaily.bucket_date, MenuSalesDaily.menu_id],
+                           [MenuSalesDaily.quantity, MenuSalesDaily.revenue]),
+    }
+
+
+def _fold(engine):
+    with SessionLocal(bind=engine) as db:
+        folded = fold(db)
+        db.commit()
+    return folded
+
+
+def _reports(client):
+    return [client.get(f"/api/reports/{name}?{REPORT_RANGE}").get_json()["data"] for name in ("revenue", "menus")]
+
+
+@pytest.fixture(scope="module")
+def seeded(database):
+    """Three menus and four orders over two days and three hours, rolled up by a full rebuild."""
+    with database.begin() as conn:
+        category_id = conn.execute(
+            insert(Category).returning(Category.category_id), [{"category_name": "Drinks"}]
+        ).scalar()
+        menus = conn.execute(insert(Menu).returning(Menu.menu_id), [
+            {"menu_name": name, "price": price, "category_id": category_id}
+            for name, price in (("Tea", 3.0), ("Coffee", 4.5), ("Juice", 5.25))
+        ]).scalars().all()
+        orders = conn.execute(insert(Order).returning(Order.order_id), [
+            {"order_date": DAY + offset, "customer_name": f"Customer {i}"}
+            for i, offset in enumerate((datetime.timedelta(hours=10, minutes=15), datetime.timedelta(hours=10, minutes=45),
+                                        datetime.timedelta(hours=11, minutes=30), datetime.timedelta(days=1, hours=9)))
+        ]).scalars().all()
+        conn.execute(insert(OrderItem), [
+            {"order_id": order_id, "menu_id": menus[(i + k) % 3], "quantity": 1 + k, "price": 3.0 + k}
+            for i, order_id in enumerate(orders) for k in range(2)
+        ])
+        rebuild(conn)
+    return menus, orders
+
+
+def _assert_rollups_match(database):
+    with database.connect() as conn:
+        assert _rollup_totals(conn) == _base_totals(conn)
+
+
+def test_rebuild_matches_base(seeded, database):
+    _assert_rollups_match(database)
+
+
+@pytest.mark.parametrize("step", ["create", "update", "move", "add_item", "delete_item", "delete_order"])
+def test_rollups_follow_order_writes(seeded, client, database, step):
+    menus, orders = seeded
+    if step == "create":
+        response = client.post("/api/orders", json={
+            "customer_name": "New", "order_items": [{"menu_id": menus[0], "quantity": 2}, {"menu_id": menus[2], "quantity": 1}],
+        })
+    elif step == "update":
+        # Replace the items of an order (new menu, quantity and explicit price)
+        response = client.put(f"/api/orders/{orders[0]}", json={
+            "order_items": [{"menu_id": menus[1], "quantity": 4, "price": 2.5}],
+        })
+    elif step == "move":
+        # An item of the second order moves to the next day's order (other hour and day)
+        with database.connect() as conn:
+            item_id = conn.execute(select(OrderItem.order_item_id).where(
+                OrderItem.order_id == orders[1], OrderItem.deleted_at.is_(None)).limit(1)).scalar()
+        response = client.put(f"/api/order_items/{item_id}", json={"order_id": orders[3], "quantity": 5})
+    elif step == "add_item":
+        response = client.post("/api/order_items", json={"order_id": orders[2], "menu_id": menus[0], "quantity": 3})
+    elif step == "delete_item":
+        with database.connect() as conn:
+            item_id = conn.execute(select(OrderItem.order_item_id).where(
+                OrderItem.order_id == orders[2], OrderItem.deleted_at.is_(None)).limit(1)).scalar()
+        response = client.delete(f"/api/order_items/{item_id}")
+    else:
+        response = client.delete(f"/api/orders/{orders[1]}")
+    assert response.status_code in (200, 201), response.get_json()
+
+    with database.connect() as conn:
+        assert conn.execute(select(SalesRollupDelta.delta_id)).first() is not None
+    # Reports add the pending deltas, so they don't change when the deltas are folded
+    before = _reports(client)
+    assert _fold(database) > 0
+    assert _reports(client) == before
+    _assert_rollups_match(database)
+
+
+def test_revenue_report_matches_base(seeded, client, database):
+    with database.connect() as conn:
+        daily = _base_totals(conn)["daily"]
+    report = client.get(f"/api/reports/revenue?{REPORT_RANGE}").get_json()["data"]
+    assert {row["period"]: (row["orders"], row["quantity"], round(row["revenue"], 2)) for row in report} == {
+        day.isoformat(): totals for day, totals in daily.items()
+    }